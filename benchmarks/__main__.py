@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import sys
+import tempfile
+from dataclasses import asdict
+from pathlib import Path
+from typing import Optional
+
+from benchmarks.compare import (
+    DEFAULT_TOLERANCE,
+    compare_results,
+    load_results,
+    save_results,
+)
+from benchmarks.suite import DEFAULT_SEED, DEFAULT_SEEK_SAMPLES, run_suite
+from benchmarks.synth import FULL_CASES, QUICK_CASES
+
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks", description="BubForge 性能基准（离线运行）"
+    )
+    parser.add_argument("--quick", action="store_true", help="只跑两个小视频")
+    parser.add_argument("--work-dir", type=Path, default=None, help="测试视频与临时项目目录")
+    parser.add_argument("--out", type=Path, default=Path("benchmark_results.json"))
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果保存为基线")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--seek-samples", type=int, default=DEFAULT_SEEK_SAMPLES)
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED)
+    parser.add_argument("--skip-exporters", action="store_true")
+    args = parser.parse_args(argv)
+
+    cases = QUICK_CASES if args.quick else FULL_CASES
+    work_dir = args.work_dir or Path(tempfile.gettempdir()) / "bubforge_bench"
+    results = run_suite(
+        cases,
+        work_dir,
+        seek_samples=args.seek_samples,
+        seed=args.seed,
+        exporters=not args.skip_exporters,
+    )
+
+    baseline = load_results(args.baseline)
+    regressions = 0
+    if baseline is not None:
+        deltas = compare_results(results, baseline, args.tolerance)
+        results["comparison"] = {
+            "baseline": str(args.baseline),
+            "tolerance": args.tolerance,
+            "deltas": [asdict(delta) for delta in deltas],
+        }
+        for delta in deltas:
+            regressions += delta.status == "regression"
+            print(
+                f"{delta.status:<11} {delta.metric:<60} "
+                f"{_format(delta.baseline):>12} -> {_format(delta.current):>12} "
+                f"({delta.change:+.1%})"
+            )
+    else:
+        for metric, value in sorted(results["metrics"].items()):
+            print(f"{metric:<60} {_format(value):>12}")
+    for entry in results["skipped"]:
+        print(f"跳过 {entry['case']}: {entry['reason']}", file=sys.stderr)
+
+    save_results(args.out, results)
+    if args.save_baseline:
+        baseline_payload = {key: value for key, value in results.items() if key != "comparison"}
+        save_results(args.baseline, baseline_payload)
+    return 1 if regressions else 0
+
+
+def _format(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.3f}"
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+DEFAULT_TOLERANCE = 0.15
+
+
+@dataclass(frozen=True)
+class MetricDelta:
+    metric: str
+    baseline: Optional[float]
+    current: Optional[float]
+    change: float
+    status: str
+
+
+def lower_is_better(metric: str) -> bool:
+    return metric.endswith("_ms")
+
+
+def compare_results(
+    current: dict[str, object],
+    baseline: dict[str, object],
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> list[MetricDelta]:
+    now = dict(current.get("metrics") or {})
+    before = dict(baseline.get("metrics") or {})
+    deltas: list[MetricDelta] = []
+    for metric in sorted(set(now) | set(before)):
+        value = now.get(metric)
+        reference = before.get(metric)
+        if value is None or reference is None:
+            status = "new" if reference is None else "missing"
+            deltas.append(MetricDelta(metric, reference, value, 0.0, status))
+            continue
+        change = (value - reference) / reference if reference else 0.0
+        gain = -change if lower_is_better(metric) else change
+        if gain < -tolerance:
+            status = "regression"
+        elif gain > tolerance:
+            status = "improvement"
+        else:
+            status = "ok"
+        deltas.append(MetricDelta(metric, reference, value, change, status))
+    return deltas
+
+
+def load_results(path: str | Path) -> Optional[dict[str, object]]:
+    try:
+        payload = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    return payload if isinstance(payload, dict) else None
+
+
+def save_results(path: str | Path, payload: dict[str, object]) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(path.name + ".tmp")
+    temp_path.write_text(
+        json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+    os.replace(temp_path, path)
+    return path
@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import os
+import platform
+import random
+import re
+import shutil
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional, Sequence
+
+import cv2
+
+from benchmarks.synth import VideoCase, generate_video
+from core.export.registry import EXPORTERS
+from core.metadata.journal import FrameJournal
+from core.metadata.reader import read_frames_csv
+from core.project.manager import ensure_video_subdirs, init_project, resolve_video_folder
+from core.video.capture import VideoCaptureController
+from core.video.extractor import extract_range_frames
+from core.video.frame_writer import save_keyframe
+from utils.ffmpeg_check import FFmpegToolchain, get_toolchain
+
+RESULTS_VERSION = 1
+DEFAULT_SEEK_SAMPLES = 60
+DEFAULT_KEYFRAME_SAMPLES = 30
+DEFAULT_EXTRACT_FPS = 5.0
+DEFAULT_SEED = 0
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    weight = position - lower
+    return ordered[lower] * (1 - weight) + ordered[upper] * weight
+
+
+def bench_seek(
+    video_path: Path, samples: int = DEFAULT_SEEK_SAMPLES, seed: int = DEFAULT_SEED
+) -> dict[str, float]:
+    capture = VideoCaptureController()
+    capture.open(video_path)
+    try:
+        rng = random.Random(seed)
+        last = max(capture.total_frames - 1, 0)
+        latencies: list[float] = []
+        for _ in range(samples):
+            target = rng.randint(0, last)
+            started = time.perf_counter()
+            capture.get_frame_at(target)
+            latencies.append((time.perf_counter() - started) * 1000)
+    finally:
+        capture.close()
+    return {
+        "seek_p50_ms": percentile(latencies, 0.5),
+        "seek_p95_ms": percentile(latencies, 0.95),
+    }
+
+
+def bench_sequential(video_path: Path) -> dict[str, float]:
+    capture = VideoCaptureController()
+    capture.open(video_path)
+    try:
+        frames = 0
+        started = time.perf_counter()
+        while capture.read_next() is not None:
+            frames += 1
+        elapsed = time.perf_counter() - started
+    finally:
+        capture.close()
+    return {"read_next_fps": frames / elapsed if elapsed > 0 else 0.0}
+
+
+def bench_save_keyframe(
+    project_dir: Path,
+    video_path: Path,
+    video_folder: str,
+    samples: int = DEFAULT_KEYFRAME_SAMPLES,
+) -> dict[str, float]:
+    capture = VideoCaptureController()
+    capture.open(video_path)
+    journal = FrameJournal(project_dir)
+    latencies: list[float] = []
+    try:
+        while len(latencies) < samples:
+            frame = capture.read_next()
+            if frame is None:
+                break
+            started = time.perf_counter()
+            save_keyframe(
+                project_dir=project_dir,
+                video_folder=video_folder,
+                video_id=video_folder,
+                src_video_path=str(video_path),
+                timestamp_ms=frame.timestamp_ms,
+                frame_index=frame.frame_index,
+                image=frame.image,
+                journal=journal,
+            )
+            journal.flush()
+            latencies.append((time.perf_counter() - started) * 1000)
+    finally:
+        journal.close()
+        capture.close()
+    return {
+        "save_keyframe_p50_ms": percentile(latencies, 0.5),
+        "save_keyframe_p95_ms": percentile(latencies, 0.95),
+    }
+
+
+def bench_extract(
+    project_dir: Path,
+    video_path: Path,
+    video_folder: str,
+    video_fps: float,
+    duration_ms: int,
+    fps: float = DEFAULT_EXTRACT_FPS,
+) -> dict[str, float]:
+    journal = FrameJournal(project_dir)
+    started = time.perf_counter()
+    result = extract_range_frames(
+        project_dir=project_dir,
+        video_path=video_path,
+        video_folder=video_folder,
+        video_id=video_folder,
+        src_video_path=str(video_path),
+        start_ms=0,
+        end_ms=duration_ms,
+        fps=fps,
+        video_fps=video_fps,
+        journal=journal,
+    )
+    journal.close()
+    elapsed = time.perf_counter() - started
+    frames = len(result.records)
+    return {"extract_fps": frames / elapsed if elapsed > 0 else 0.0}
+
+
+def bench_exporters(project_dir: Path, output_root: Path) -> dict[str, float]:
+    frames = len(read_frames_csv(project_dir / "metadata" / "frames.csv"))
+    results: dict[str, float] = {}
+    for name, exporter in EXPORTERS.items():
+        output_dir = output_root / _slug(name)
+        shutil.rmtree(output_dir, ignore_errors=True)
+        started = time.perf_counter()
+        exporter(project_dir, output_dir)
+        elapsed = time.perf_counter() - started
+        results[f"export_{_slug(name)}_fps"] = frames / elapsed if elapsed > 0 else 0.0
+    return results
+
+
+def run_suite(
+    cases: Sequence[VideoCase],
+    work_dir: str | Path,
+    seek_samples: int = DEFAULT_SEEK_SAMPLES,
+    seed: int = DEFAULT_SEED,
+    exporters: bool = True,
+) -> dict[str, object]:
+    work_dir = Path(work_dir)
+    toolchain = _optional_toolchain()
+    metrics: dict[str, float] = {}
+    skipped: list[dict[str, str]] = []
+
+    for case in cases:
+        video_path = generate_video(case, work_dir / "videos", toolchain)
+        if video_path is None:
+            skipped.append({"case": case.name, "reason": "无法生成该编码的测试视频"})
+            continue
+        project_dir = work_dir / "projects" / case.name
+        shutil.rmtree(project_dir, ignore_errors=True)
+        init_project(project_dir)
+        video_folder = resolve_video_folder(project_dir, video_path)
+        ensure_video_subdirs(project_dir, video_folder)
+
+        case_metrics: dict[str, float] = {}
+        case_metrics.update(bench_seek(video_path, seek_samples, seed))
+        case_metrics.update(bench_sequential(video_path))
+        case_metrics.update(bench_save_keyframe(project_dir, video_path, video_folder))
+        if toolchain is None:
+            skipped.append({"case": case.name, "reason": "未找到 FFmpeg，跳过区间抽帧"})
+        else:
+            case_metrics.update(
+                bench_extract(
+                    project_dir,
+                    video_path,
+                    video_folder,
+                    video_fps=case.fps,
+                    duration_ms=int(case.duration_s * 1000),
+                )
+            )
+        if exporters:
+            case_metrics.update(
+                bench_exporters(project_dir, work_dir / "exports" / case.name)
+            )
+        for key, value in case_metrics.items():
+            metrics[f"{case.name}/{key}"] = round(value, 4)
+
+    return {
+        "version": RESULTS_VERSION,
+        "meta": _environment(toolchain),
+        "metrics": metrics,
+        "skipped": skipped,
+    }
+
+
+def _optional_toolchain() -> Optional[FFmpegToolchain]:
+    try:
+        return get_toolchain()
+    except FileNotFoundError:
+        return None
+
+
+def _environment(toolchain: Optional[FFmpegToolchain]) -> dict[str, object]:
+    return {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count() or 0,
+        "opencv": cv2.__version__,
+        "ffmpeg": toolchain.version if toolchain is not None else "",
+    }
+
+
+def _slug(name: str) -> str:
+    return re.sub(r"[^0-9a-z]+", "_", name.lower()).strip("_")
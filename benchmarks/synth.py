@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import hashlib
+import subprocess
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from utils.ffmpeg_check import FFmpegToolchain
+
+_FFMPEG_ENCODERS = {"h264": "libx264", "mpeg4": "mpeg4", "mjpeg": "mjpeg"}
+_CV2_FOURCC = {"mpeg4": "mp4v", "mjpeg": "MJPG"}
+_EXTENSIONS = {"h264": ".mp4", "mpeg4": ".mp4", "mjpeg": ".avi"}
+
+
+@dataclass(frozen=True)
+class VideoCase:
+    name: str
+    codec: str
+    width: int
+    height: int
+    fps: float = 25.0
+    gop: int = 25
+    vfr: bool = False
+    duration_s: float = 8.0
+
+    @property
+    def digest(self) -> str:
+        payload = repr(sorted(asdict(self).items())).encode("utf-8")
+        return hashlib.sha1(payload).hexdigest()[:8]
+
+
+QUICK_CASES = [
+    VideoCase("mjpeg_360p", "mjpeg", 640, 360, gop=1, duration_s=4.0),
+    VideoCase("mpeg4_360p_gop25", "mpeg4", 640, 360, gop=25, duration_s=4.0),
+]
+
+FULL_CASES = [
+    VideoCase("mjpeg_720p", "mjpeg", 1280, 720, gop=1),
+    VideoCase("mpeg4_720p_gop12", "mpeg4", 1280, 720, gop=12),
+    VideoCase("h264_720p_gop12", "h264", 1280, 720, gop=12),
+    VideoCase("h264_720p_gop250", "h264", 1280, 720, gop=250),
+    VideoCase("h264_1080p_gop50", "h264", 1920, 1080, gop=50),
+    VideoCase("h264_720p_vfr", "h264", 1280, 720, gop=50, vfr=True),
+]
+
+
+def generate_video(
+    case: VideoCase,
+    output_dir: str | Path,
+    toolchain: Optional[FFmpegToolchain] = None,
+) -> Optional[Path]:
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    path = output_dir / f"{case.name}__{case.digest}{_EXTENSIONS[case.codec]}"
+    if path.exists() and path.stat().st_size > 0:
+        return path
+
+    temp_path = path.with_name(f".{path.stem}.tmp{path.suffix}")
+    encoder = _FFMPEG_ENCODERS.get(case.codec, "")
+    if toolchain is not None and toolchain.has_encoder(encoder):
+        written = _generate_with_ffmpeg(case, temp_path, toolchain.ffmpeg, encoder)
+    elif case.codec in _CV2_FOURCC and not case.vfr:
+        written = _generate_with_opencv(case, temp_path)
+    else:
+        written = False
+    if not written:
+        temp_path.unlink(missing_ok=True)
+        return None
+    temp_path.replace(path)
+    return path
+
+
+def _generate_with_ffmpeg(
+    case: VideoCase, output_path: Path, ffmpeg: str, encoder: str
+) -> bool:
+    source = (
+        f"testsrc2=size={case.width}x{case.height}"
+        f":rate={case.fps}:duration={case.duration_s}"
+    )
+    cmd = [ffmpeg, "-hide_banner", "-loglevel", "error", "-y"]
+    cmd.extend(["-f", "lavfi", "-i", source, "-c:v", encoder, "-g", str(case.gop)])
+    if case.codec == "mjpeg":
+        cmd.extend(["-pix_fmt", "yuvj420p", "-q:v", "3"])
+    else:
+        cmd.extend(["-pix_fmt", "yuv420p"])
+    if case.codec == "mpeg4":
+        cmd.extend(["-q:v", "4"])
+    if case.codec == "h264":
+        cmd.extend(["-preset", "veryfast", "-bf", "0"])
+    if case.vfr:
+        cmd.extend(["-vf", r"select='not(mod(n\,3))+not(mod(n\,7))'"])
+        cmd.extend(["-fps_mode", "vfr"])
+    cmd.append(str(output_path))
+    try:
+        result = subprocess.run(cmd, capture_output=True, check=False, timeout=600)
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    return result.returncode == 0 and output_path.exists()
+
+
+def _generate_with_opencv(case: VideoCase, output_path: Path) -> bool:
+    fourcc = cv2.VideoWriter_fourcc(*_CV2_FOURCC[case.codec])
+    writer = cv2.VideoWriter(
+        str(output_path), fourcc, case.fps, (case.width, case.height)
+    )
+    if not writer.isOpened():
+        return False
+    total = int(round(case.duration_s * case.fps))
+    base = np.zeros((case.height, case.width, 3), dtype=np.uint8)
+    base[..., 0] = np.linspace(0, 255, case.width, dtype=np.uint8)[None, :]
+    base[..., 1] = np.linspace(0, 255, case.height, dtype=np.uint8)[:, None]
+    box = max(case.height // 6, 8)
+    try:
+        for frame_index in range(total):
+            frame = base.copy()
+            frame[..., 2] = (frame_index * 7) % 256
+            x = (frame_index * 11) % max(case.width - box, 1)
+            y = (frame_index * 5) % max(case.height - box, 1)
+            frame[y : y + box, x : x + box] = 255
+            cv2.putText(
+                frame,
+                str(frame_index),
+                (8, case.height - 12),
+                cv2.FONT_HERSHEY_SIMPLEX,
+                max(case.height / 360.0, 0.5),
+                (0, 0, 0),
+                2,
+            )
+            writer.write(frame)
+    finally:
+        writer.release()
+    return output_path.exists() and output_path.stat().st_size > 0
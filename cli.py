@@ -0,0 +1,450 @@
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import sys
+from dataclasses import asdict
+from pathlib import Path
+from typing import Callable, Optional, Sequence
+
+from core.export.common import DEFAULT_IO_WORKERS, LINK_MODES
+from core.export.presets import ExportPreset, load_preset, save_preset
+from core.export.registry import exporter_names, get_exporter
+from core.metadata.query import FrameQuery
+from core.project.manager import (
+    ensure_video_subdirs,
+    init_project,
+    project_paths,
+    resolve_video_folder,
+)
+from core.project.shards import (
+    load_shard_manifest,
+    merge_shards,
+    run_shard,
+    write_shard_manifests,
+)
+from core.project.sources import read_sources, resolve_source_path
+from core.video.batch import BatchEvent, autotune_plan, execute_batch, plan_batch
+from core.video.probe import probe_videos
+from core.video.spec import DEFAULT_SPEC_FPS, load_range_specs
+from core.video.tuning import (
+    DEFAULT_SAMPLE_MS,
+    TuningCache,
+    TuningResult,
+    autotune,
+    default_cpu_budget,
+    tuning_key,
+)
+from utils.ffmpeg_check import ensure_ffmpeg
+from utils.logging_config import configure_logging
+from utils.metrics import DEFAULT_DUMP_INTERVAL_S, start_metrics_dump
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_MISSING_TOOL = 3
+EXIT_NOT_FOUND = 4
+
+FRAME_KINDS = ("keyframe", "range")
+FRAME_WRITING_COMMANDS = ("extract", "shard-merge")
+
+
+def emit(event: str, **fields: object) -> None:
+    payload = {"event": event, **fields}
+    sys.stdout.write(json.dumps(payload, ensure_ascii=False, default=str) + "\n")
+    sys.stdout.flush()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="bubforge", description="BubForge 无界面命令行（输出为逐行 JSON）"
+    )
+    parser.add_argument(
+        "--metrics",
+        type=Path,
+        help="耗时指标输出文件（.prom 为 Prometheus 文本，否则为 JSON；默认 logs/metrics.json）",
+    )
+    parser.add_argument(
+        "--metrics-interval", type=float, default=DEFAULT_DUMP_INTERVAL_S
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    init_cmd = commands.add_parser("init", help="初始化项目目录")
+    init_cmd.add_argument("project", type=Path)
+
+    source_cmd = commands.add_parser("add-source", help="登记视频到 sources.csv")
+    source_cmd.add_argument("project", type=Path)
+    source_cmd.add_argument("videos", type=Path, nargs="+")
+
+    probe_cmd = commands.add_parser("probe", help="探测视频信息（默认全部已登记视频）")
+    probe_cmd.add_argument("project", type=Path)
+    probe_cmd.add_argument("videos", type=Path, nargs="*")
+    probe_cmd.add_argument("--workers", type=int, default=4)
+
+    extract_cmd = commands.add_parser(
+        "extract", help="按任务文件（JSON/CSV）抽取区间/均匀采样帧"
+    )
+    extract_cmd.add_argument("project", type=Path)
+    extract_cmd.add_argument("spec", type=Path)
+    extract_cmd.add_argument("--fps", type=float, default=DEFAULT_SPEC_FPS)
+    extract_cmd.add_argument(
+        "--cpu-budget", type=int, default=None, help="可用 CPU 核数（默认全部）"
+    )
+    extract_cmd.add_argument(
+        "--merge-gap-ms", type=int, default=0, help="同帧率区间间隔不超过此值时合并"
+    )
+    extract_cmd.add_argument("--hwaccel", action="store_true")
+    extract_cmd.add_argument(
+        "--autotune", action="store_true", help="先为未调优过的编码/分辨率测速"
+    )
+
+    tune_cmd = commands.add_parser(
+        "tune", help="测速并保存最佳 FFmpeg 进程数/线程数（按编码与分辨率）"
+    )
+    tune_cmd.add_argument("project", type=Path)
+    tune_cmd.add_argument("videos", type=Path, nargs="+")
+    tune_cmd.add_argument("--cpu-budget", type=int, default=None)
+    tune_cmd.add_argument("--sample-ms", type=int, default=DEFAULT_SAMPLE_MS)
+    tune_cmd.add_argument("--hwaccel", action="store_true")
+
+    export_cmd = commands.add_parser("export", help="导出数据集")
+    export_cmd.add_argument("project", type=Path)
+    export_cmd.add_argument("output", type=Path)
+    export_cmd.add_argument("--format", choices=exporter_names())
+    export_cmd.add_argument("--link-mode", choices=LINK_MODES, default="copy")
+    export_cmd.add_argument("--prune", action="store_true")
+    export_cmd.add_argument("--workers", type=int, default=DEFAULT_IO_WORKERS)
+    export_cmd.add_argument("--video", action="append", default=[], dest="videos")
+    export_cmd.add_argument("--kind", action="append", choices=FRAME_KINDS, default=[])
+    export_cmd.add_argument(
+        "--use-preset", action="store_true", help="沿用导出目录中保存的导出预设"
+    )
+
+    plan_cmd = commands.add_parser("shard-plan", help="把任务文件拆分为多个分片清单")
+    plan_cmd.add_argument("project", type=Path)
+    plan_cmd.add_argument("spec", type=Path)
+    plan_cmd.add_argument("output", type=Path)
+    plan_cmd.add_argument("--shards", type=int, required=True)
+    plan_cmd.add_argument("--fps", type=float, default=DEFAULT_SPEC_FPS)
+    plan_cmd.add_argument("--merge-gap-ms", type=int, default=0)
+
+    run_cmd = commands.add_parser("shard-run", help="在独立暂存目录中处理一个分片")
+    run_cmd.add_argument("manifest", type=Path)
+    run_cmd.add_argument("staging", type=Path)
+    run_cmd.add_argument("--cpu-budget", type=int, default=None)
+    run_cmd.add_argument("--hwaccel", action="store_true")
+    run_cmd.add_argument("--autotune", action="store_true")
+
+    merge_cmd = commands.add_parser("shard-merge", help="把分片暂存目录合并回项目")
+    merge_cmd.add_argument("project", type=Path)
+    merge_cmd.add_argument("staging", type=Path, nargs="+")
+
+    commands.add_parser("formats", help="列出可用的导出格式")
+    return parser
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.metrics is not None:
+        start_metrics_dump(args.metrics, args.metrics_interval)
+    if args.command == "formats":
+        emit("formats", names=exporter_names())
+        return EXIT_OK
+    if args.command == "shard-run":
+        return _cmd_shard_run(args)
+    if args.command == "init":
+        paths = init_project(args.project)
+        emit("project", path=str(paths.root.resolve()))
+        return EXIT_OK
+
+    args.project = args.project.resolve()
+    if not (args.project / "project.yaml").exists():
+        emit("error", message=f"项目不存在: {args.project}")
+        return EXIT_NOT_FOUND
+    if args.command in FRAME_WRITING_COMMANDS:
+        paths = init_project(args.project)
+    else:
+        paths = project_paths(args.project)
+    configure_logging(paths.logs_dir)
+    if args.metrics is None:
+        start_metrics_dump(paths.logs_dir / "metrics.json", args.metrics_interval)
+    handlers = {
+        "add-source": _cmd_add_source,
+        "probe": _cmd_probe,
+        "tune": _cmd_tune,
+        "extract": _cmd_extract,
+        "export": _cmd_export,
+        "shard-plan": _cmd_shard_plan,
+        "shard-merge": _cmd_shard_merge,
+    }
+    return handlers[args.command](args)
+
+
+def _cmd_add_source(args: argparse.Namespace) -> int:
+    failed = 0
+    for video in args.videos:
+        if not video.is_file():
+            emit("error", video=str(video), message="找不到视频文件")
+            failed += 1
+            continue
+        video_folder = resolve_video_folder(args.project, video)
+        ensure_video_subdirs(args.project, video_folder)
+        emit("source", video=str(video), video_id=video_folder)
+    return EXIT_FAILED if failed else EXIT_OK
+
+
+def _cmd_probe(args: argparse.Namespace) -> int:
+    videos = [str(video) for video in args.videos] or [
+        str(resolve_source_path(args.project, row["src_video_path"]))
+        for row in read_sources(args.project / "sources.csv")
+        if row.get("src_video_path")
+    ]
+    try:
+        ensure_ffmpeg()
+    except FileNotFoundError as exc:
+        emit("error", message=str(exc))
+        return EXIT_MISSING_TOOL
+    failed = 0
+    for result in probe_videos(videos, args.project, workers=args.workers):
+        if result.probe is None:
+            emit("error", video=result.video_path, message=result.error)
+            failed += 1
+            continue
+        emit("probe", **asdict(result.probe))
+    return EXIT_FAILED if failed else EXIT_OK
+
+
+def _cmd_tune(args: argparse.Namespace) -> int:
+    try:
+        ensure_ffmpeg()
+    except FileNotFoundError as exc:
+        emit("error", message=str(exc))
+        return EXIT_MISSING_TOOL
+    budget = args.cpu_budget or default_cpu_budget()
+    cache = TuningCache()
+    failed = 0
+    for result in probe_videos([str(video) for video in args.videos], args.project):
+        if result.probe is None:
+            emit("error", video=result.video_path, message=result.error)
+            failed += 1
+            continue
+        emit("start", command="tune", video=result.video_path, cpu_budget=budget)
+        candidates = autotune(
+            result.video_path,
+            result.probe,
+            budget,
+            sample_ms=args.sample_ms,
+            hwaccel=args.hwaccel,
+        )
+        for candidate in candidates:
+            emit("candidate", video=result.video_path, **_tuning_fields(candidate))
+        if not candidates:
+            emit("error", video=result.video_path, message="所有测速配置都失败了")
+            failed += 1
+            continue
+        key = tuning_key(result.probe, budget)
+        cache.put(key, candidates[0])
+        _emit_tuning(key, candidates[0])
+    cache.save()
+    return EXIT_FAILED if failed else EXIT_OK
+
+
+def _cmd_extract(args: argparse.Namespace) -> int:
+    try:
+        specs = load_range_specs(args.spec, default_fps=args.fps)
+    except (KeyError, TypeError, ValueError) as exc:
+        emit("error", message=str(exc))
+        return EXIT_USAGE
+    try:
+        ensure_ffmpeg()
+    except FileNotFoundError as exc:
+        emit("error", message=str(exc))
+        return EXIT_MISSING_TOOL
+
+    plan = plan_batch(args.project, specs, merge_gap_ms=args.merge_gap_ms)
+    for event in plan.errors:
+        emit("error", video=event.video_path, message=event.error)
+    if args.autotune:
+        autotune_plan(
+            plan, args.cpu_budget, hwaccel=args.hwaccel, on_result=_emit_tuning
+        )
+    emit("start", command="extract", videos=len(plan.jobs), total=plan.total_ranges)
+    report = execute_batch(
+        args.project,
+        plan,
+        cpu_budget=args.cpu_budget,
+        hwaccel=args.hwaccel,
+        on_event=_progress_reporter(plan.total_ranges),
+    )
+    emit(
+        "done",
+        command="extract",
+        frames=report.frames,
+        skipped=report.skipped,
+        failed=report.failed,
+    )
+    return EXIT_FAILED if report.failed else EXIT_OK
+
+
+def _cmd_shard_plan(args: argparse.Namespace) -> int:
+    try:
+        specs = load_range_specs(args.spec, default_fps=args.fps)
+    except (KeyError, TypeError, ValueError) as exc:
+        emit("error", message=str(exc))
+        return EXIT_USAGE
+    try:
+        ensure_ffmpeg()
+    except FileNotFoundError as exc:
+        emit("error", message=str(exc))
+        return EXIT_MISSING_TOOL
+    manifests, plan = write_shard_manifests(
+        args.project, specs, args.shards, args.output, merge_gap_ms=args.merge_gap_ms
+    )
+    for event in plan.errors:
+        emit("error", video=event.video_path, message=event.error)
+    for manifest in manifests:
+        emit("shard", manifest=str(manifest))
+    emit("done", command="shard-plan", shards=len(manifests), total=plan.total_ranges)
+    return EXIT_FAILED if plan.failed_specs else EXIT_OK
+
+
+def _cmd_shard_run(args: argparse.Namespace) -> int:
+    try:
+        shard, plan = load_shard_manifest(args.manifest)
+    except (OSError, KeyError, TypeError, ValueError) as exc:
+        emit("error", message=f"无法读取分片清单: {args.manifest} ({exc})")
+        return EXIT_USAGE
+    try:
+        ensure_ffmpeg()
+    except FileNotFoundError as exc:
+        emit("error", message=str(exc))
+        return EXIT_MISSING_TOOL
+    emit("start", command="shard-run", shard=shard, total=plan.total_ranges)
+    report = run_shard(
+        args.manifest,
+        args.staging,
+        cpu_budget=args.cpu_budget,
+        hwaccel=args.hwaccel,
+        on_event=_progress_reporter(plan.total_ranges),
+        autotune=args.autotune,
+    )
+    emit(
+        "done",
+        command="shard-run",
+        shard=shard,
+        frames=report.frames,
+        skipped=report.skipped,
+        failed=report.failed,
+    )
+    return EXIT_FAILED if report.failed else EXIT_OK
+
+
+def _cmd_shard_merge(args: argparse.Namespace) -> int:
+    report = merge_shards(args.project, args.staging)
+    for staging in report.incomplete:
+        emit("error", staging=staging, message="分片尚未完成，已跳过")
+    for staging in report.already_merged:
+        emit("skip", staging=staging, message="分片已合并到本项目，已跳过")
+    for conflict in report.conflicts:
+        emit("conflict", **asdict(conflict))
+    emit(
+        "done",
+        command="shard-merge",
+        shards=report.shards,
+        merged=report.merged,
+        duplicates=report.duplicates,
+        conflicts=len(report.conflicts),
+    )
+    return EXIT_FAILED if report.conflicts or report.incomplete else EXIT_OK
+
+
+def _tuning_fields(result: TuningResult) -> dict[str, object]:
+    return {
+        "threads": result.config.threads,
+        "filter_threads": result.config.filter_threads,
+        "processes": result.processes,
+        "wall_s": round(result.wall_s, 3),
+        "throughput": round(result.throughput, 3),
+    }
+
+
+def _emit_tuning(key: str, result: Optional[TuningResult]) -> None:
+    if result is None:
+        emit("error", key=key, message="所有测速配置都失败了")
+        return
+    emit("tuned", key=key, **_tuning_fields(result))
+
+
+def _progress_reporter(total: int) -> Callable[[BatchEvent], None]:
+    done = 0
+
+    def on_event(event: BatchEvent) -> None:
+        nonlocal done
+        done += 1
+        if event.error:
+            emit(
+                "error",
+                done=done,
+                total=total,
+                video=event.video_path,
+                start_ms=event.start_ms,
+                end_ms=event.end_ms,
+                message=event.error,
+            )
+            return
+        emit(
+            "progress",
+            done=done,
+            total=total,
+            video_id=event.video_id,
+            start_ms=event.start_ms,
+            end_ms=event.end_ms,
+            frames=event.frames,
+            skipped=event.skipped,
+        )
+
+    return on_event
+
+
+def _cmd_export(args: argparse.Namespace) -> int:
+    preset = load_preset(args.output) if args.use_preset else None
+    if preset is None:
+        if args.format is None:
+            emit("error", message="请指定 --format，或导出目录中没有可用的预设")
+            return EXIT_USAGE
+        preset = ExportPreset(
+            format=args.format,
+            link_mode=args.link_mode,
+            prune=args.prune,
+            workers=args.workers,
+        )
+    try:
+        exporter = get_exporter(preset.format)
+    except ValueError as exc:
+        emit("error", message=str(exc))
+        return EXIT_USAGE
+
+    query = FrameQuery.create(video_ids=args.videos, kinds=args.kind)
+    emit("start", command="export", format=preset.format, output=str(args.output))
+    try:
+        output = exporter(
+            args.project,
+            args.output,
+            link_mode=preset.link_mode,
+            prune=preset.prune,
+            workers=preset.workers,
+            query=None if query.is_empty else query,
+            transforms=preset.transforms or None,
+        )
+    except (OSError, ValueError) as exc:
+        emit("error", command="export", format=preset.format, message=str(exc))
+        return EXIT_FAILED
+    save_preset(args.output, preset)
+    emit("done", command="export", format=preset.format, output=str(output))
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,369 @@
+from __future__ import annotations
+
+import csv
+import io
+import json
+import os
+import tarfile
+import time
+import zipfile
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterator, Optional
+
+from core.export.common import DEFAULT_IO_WORKERS, ExportStats, bounded_map
+from core.export.transforms import transform_images, transformed_record
+from core.metadata.frames_csv import FrameRecord
+from core.metadata.query import FrameQuery, iter_selected_frames
+
+ARCHIVE_FORMATS = ("tar", "zip")
+DEFAULT_SHARD_BYTES = 1 << 30
+SHARDS_INDEX_NAME = "shards_index.csv"
+_SHARDS_INDEX_HEADER = ["key", "shard", "member", "offset", "size", "source_size", "mtime_ns"]
+_WRITE_BUFFER = 8 * 1024 * 1024
+_ZIP_LOCAL_HEADER_SIZE = 30
+
+
+@dataclass(frozen=True)
+class ShardEntry:
+    key: str
+    shard: str
+    member: str
+    offset: int
+    size: int
+    source_size: int
+    mtime_ns: int
+
+
+@dataclass(frozen=True)
+class _Sample:
+    key: str
+    record: FrameRecord
+    image_path: Path
+    source_size: int
+    mtime_ns: int
+
+
+def export_tar_shards(
+    project_dir: str | Path,
+    output_dir: str | Path,
+    link_mode: str = "copy",
+    prune: bool = False,
+    workers: int = DEFAULT_IO_WORKERS,
+    shard_max_bytes: int = DEFAULT_SHARD_BYTES,
+    query: Optional[FrameQuery] = None,
+    transforms: Optional[list[dict[str, object]]] = None,
+) -> Path:
+    return export_archive_shards(
+        project_dir,
+        output_dir,
+        "tar",
+        shard_max_bytes,
+        prune,
+        workers,
+        query,
+        transforms,
+    )
+
+
+def export_zip_shards(
+    project_dir: str | Path,
+    output_dir: str | Path,
+    link_mode: str = "copy",
+    prune: bool = False,
+    workers: int = DEFAULT_IO_WORKERS,
+    shard_max_bytes: int = DEFAULT_SHARD_BYTES,
+    query: Optional[FrameQuery] = None,
+    transforms: Optional[list[dict[str, object]]] = None,
+) -> Path:
+    return export_archive_shards(
+        project_dir,
+        output_dir,
+        "zip",
+        shard_max_bytes,
+        prune,
+        workers,
+        query,
+        transforms,
+    )
+
+
+def sample_key(record: FrameRecord) -> str:
+    relpath = Path(record.image_relpath)
+    video_folder = relpath.parent.parent.name
+    key = f"{video_folder}__{relpath.parent.name}__{relpath.stem}"
+    return key.replace(".", "_")
+
+
+def export_archive_shards(
+    project_dir: str | Path,
+    output_dir: str | Path,
+    archive_format: str = "tar",
+    shard_max_bytes: int = DEFAULT_SHARD_BYTES,
+    prune: bool = False,
+    workers: int = DEFAULT_IO_WORKERS,
+    query: Optional[FrameQuery] = None,
+    transforms: Optional[list[dict[str, object]]] = None,
+) -> Path:
+    if archive_format not in ARCHIVE_FORMATS:
+        raise ValueError(f"未知归档格式: {archive_format}")
+    project_dir = Path(project_dir)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    index = _read_shards_index(output_dir)
+    stale_shards: set[str] = set()
+    live_keys: set[str] = set()
+    pending: list[_Sample] = []
+    records = list(iter_selected_frames(project_dir, query))
+    sources: Optional[dict[Path, Path]] = None
+    if transforms:
+        sources = transform_images(
+            project_dir,
+            [project_dir / record.image_relpath for record in records],
+            transforms,
+            workers,
+        )
+    for record in records:
+        key = sample_key(record)
+        image_path = project_dir / record.image_relpath
+        if sources is not None:
+            if image_path not in sources:
+                continue
+            image_path = sources[image_path]
+            record = transformed_record(record, image_path)
+        try:
+            stat = image_path.stat()
+        except OSError:
+            continue
+        live_keys.add(key)
+        entry = index.get(key)
+        if (
+            entry is not None
+            and entry.source_size == stat.st_size
+            and entry.mtime_ns == stat.st_mtime_ns
+        ):
+            continue
+        if entry is not None:
+            stale_shards.add(entry.shard)
+        pending.append(
+            _Sample(key, record, image_path, stat.st_size, stat.st_mtime_ns)
+        )
+
+    stats = ExportStats(label=f"{archive_format}-shards")
+    writer: Optional[_ShardWriter] = None
+    shard_number = _next_shard_number(output_dir, archive_format)
+
+    def load(sample: _Sample) -> tuple[_Sample, bytes]:
+        return sample, sample.image_path.read_bytes()
+
+    for sample, payload in bounded_map(load, pending, workers):
+        if writer is None:
+            writer = _ShardWriter(output_dir, archive_format, shard_number)
+            shard_number += 1
+        ext = sample.image_path.suffix.lstrip(".").lower() or "jpg"
+        metadata = json.dumps(asdict(sample.record), ensure_ascii=False).encode("utf-8")
+        image_entry = writer.add(
+            f"{sample.key}.{ext}",
+            payload,
+            sample.key,
+            sample.source_size,
+            sample.mtime_ns,
+        )
+        writer.add(
+            f"{sample.key}.json",
+            metadata,
+            sample.key,
+            sample.source_size,
+            sample.mtime_ns,
+        )
+        index[sample.key] = image_entry
+        stats.add(len(payload))
+        if writer.size >= shard_max_bytes:
+            writer.close()
+            _write_shards_index(output_dir, index)
+            writer = None
+    if writer is not None:
+        writer.close()
+    stats.finish()
+
+    if prune:
+        for key in set(index) - live_keys:
+            stale_shards.add(index.pop(key).shard)
+    _write_shards_index(output_dir, index)
+    for shard in sorted(stale_shards):
+        _compact_shard(output_dir, archive_format, shard, index)
+        _write_shards_index(output_dir, index)
+    return output_dir
+
+
+class _ShardWriter:
+    def __init__(self, output_dir: Path, archive_format: str, number: int) -> None:
+        self.name = f"shard-{number:06d}.{archive_format}"
+        self._target = output_dir / self.name
+        self._temp_path = self._target.with_name(self.name + ".tmp")
+        self._handle = self._temp_path.open("wb", buffering=_WRITE_BUFFER)
+        self._entries: list[ShardEntry] = []
+        self._tar: Optional[tarfile.TarFile] = None
+        self._zip: Optional[zipfile.ZipFile] = None
+        if archive_format == "tar":
+            self._tar = tarfile.open(fileobj=self._handle, mode="w", format=tarfile.GNU_FORMAT)
+        else:
+            self._zip = zipfile.ZipFile(self._handle, mode="w", compression=zipfile.ZIP_STORED)
+
+    @property
+    def size(self) -> int:
+        return self._handle.tell()
+
+    def add(
+        self,
+        member: str,
+        payload: bytes,
+        key: str,
+        source_size: int,
+        mtime_ns: int,
+    ) -> ShardEntry:
+        if self._tar is not None:
+            info = tarfile.TarInfo(member)
+            info.size = len(payload)
+            info.mtime = int(time.time())
+            info.mode = 0o644
+            self._tar.addfile(info, io.BytesIO(payload))
+            padded = -(-info.size // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+            offset = self._tar.offset - padded
+        else:
+            assert self._zip is not None
+            info = zipfile.ZipInfo(member, date_time=time.localtime()[:6])
+            self._zip.writestr(info, payload)
+            offset = (
+                info.header_offset
+                + _ZIP_LOCAL_HEADER_SIZE
+                + len(info.filename.encode("utf-8"))
+                + len(info.extra)
+            )
+        entry = ShardEntry(
+            key=key,
+            shard=self.name,
+            member=member,
+            offset=offset,
+            size=len(payload),
+            source_size=source_size,
+            mtime_ns=mtime_ns,
+        )
+        self._entries.append(entry)
+        return entry
+
+    def close(self) -> None:
+        if self._tar is not None:
+            self._tar.close()
+        if self._zip is not None:
+            self._zip.close()
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+        self._handle.close()
+        os.replace(self._temp_path, self._target)
+        index_path = self._target.with_name(self.name + ".index.csv")
+        with index_path.open("w", newline="", encoding="utf-8") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(["key", "member", "offset", "size"])
+            for entry in self._entries:
+                writer.writerow([entry.key, entry.member, entry.offset, entry.size])
+
+
+def _next_shard_number(output_dir: Path, archive_format: str) -> int:
+    numbers = []
+    for path in output_dir.glob(f"shard-*.{archive_format}"):
+        number = _shard_number(path.name)
+        if number is not None:
+            numbers.append(number)
+    return max(numbers, default=-1) + 1
+
+
+def _shard_number(name: str) -> Optional[int]:
+    try:
+        return int(Path(name).stem.split("-", 1)[1])
+    except (IndexError, ValueError):
+        return None
+
+
+def _compact_shard(
+    output_dir: Path, archive_format: str, shard: str, index: dict[str, ShardEntry]
+) -> None:
+    path = output_dir / shard
+    number = _shard_number(shard)
+    if number is None or not path.exists():
+        return
+    kept = {key: entry for key, entry in index.items() if entry.shard == shard}
+    if not kept:
+        path.unlink(missing_ok=True)
+        path.with_name(shard + ".index.csv").unlink(missing_ok=True)
+        return
+    writer = _ShardWriter(output_dir, archive_format, number)
+    for member, payload in _iter_members(path, archive_format):
+        key = member.rsplit(".", 1)[0]
+        entry = kept.get(key)
+        if entry is None:
+            continue
+        written = writer.add(member, payload, key, entry.source_size, entry.mtime_ns)
+        if member == entry.member:
+            index[key] = written
+    writer.close()
+
+
+def _iter_members(path: Path, archive_format: str) -> Iterator[tuple[str, bytes]]:
+    if archive_format == "tar":
+        with tarfile.open(path, mode="r") as archive:
+            for info in archive:
+                handle = archive.extractfile(info) if info.isfile() else None
+                if handle is not None:
+                    yield info.name, handle.read()
+        return
+    with zipfile.ZipFile(path, mode="r") as archive:
+        for name in archive.namelist():
+            yield name, archive.read(name)
+
+
+def _read_shards_index(output_dir: Path) -> dict[str, ShardEntry]:
+    path = output_dir / SHARDS_INDEX_NAME
+    if not path.exists():
+        return {}
+    entries: dict[str, ShardEntry] = {}
+    with path.open("r", newline="", encoding="utf-8") as handle:
+        for row in csv.DictReader(handle):
+            try:
+                entry = ShardEntry(
+                    key=row["key"],
+                    shard=row["shard"],
+                    member=row["member"],
+                    offset=int(row["offset"]),
+                    size=int(row["size"]),
+                    source_size=int(row["source_size"]),
+                    mtime_ns=int(row["mtime_ns"]),
+                )
+            except (KeyError, TypeError, ValueError):
+                continue
+            if (output_dir / entry.shard).exists():
+                entries[entry.key] = entry
+    return entries
+
+
+def _write_shards_index(output_dir: Path, index: dict[str, ShardEntry]) -> None:
+    path = output_dir / SHARDS_INDEX_NAME
+    temp_path = path.with_name(path.name + ".tmp")
+    with temp_path.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(_SHARDS_INDEX_HEADER)
+        for key in sorted(index):
+            entry = index[key]
+            writer.writerow(
+                [
+                    entry.key,
+                    entry.shard,
+                    entry.member,
+                    entry.offset,
+                    entry.size,
+                    entry.source_size,
+                    entry.mtime_ns,
+                ]
+            )
+    os.replace(temp_path, path)
@@ -1,53 +1,98 @@
 from __future__ import annotations
 
-import json
 from pathlib import Path
+from typing import Optional
 
 import cv2
 
-from core.metadata.reader import read_frames_csv
+from core.export.common import (
+    DEFAULT_IO_WORKERS,
+    ExportStats,
+    bounded_map,
+    flat_export_name,
+)
+from core.export.coco_stream import CocoStreamWriter
+from core.export.manifest import ExportManifest
+from core.export.transforms import transform_images
+from core.metadata.frames_csv import FrameRecord
+from core.metadata.query import FrameQuery, iter_selected_frames
+from utils.image_header import read_image_size
 
 
-def export_coco(project_dir: str | Path, output_dir: str | Path) -> Path:
+def export_coco(
+    project_dir: str | Path,
+    output_dir: str | Path,
+    link_mode: str = "copy",
+    prune: bool = False,
+    workers: int = DEFAULT_IO_WORKERS,
+    compact: bool = False,
+    shard_size: int = 0,
+    query: Optional[FrameQuery] = None,
+    transforms: Optional[list[dict[str, object]]] = None,
+) -> Path:
     project_dir = Path(project_dir)
     output_dir = Path(output_dir)
     images_dir = output_dir / "images"
     images_dir.mkdir(parents=True, exist_ok=True)
+    manifest = ExportManifest(output_dir, project_dir)
 
-    frames_csv = project_dir / "metadata" / "frames.csv"
-    rows = read_frames_csv(frames_csv)
+    rows = iter_selected_frames(project_dir, query)
+    sources: Optional[dict[Path, Path]] = None
+    if transforms:
+        rows = list(rows)
+        sources = transform_images(
+            project_dir,
+            [project_dir / row.image_relpath for row in rows],
+            transforms,
+            workers,
+        )
 
-    images: list[dict[str, object]] = []
-    for idx, row in enumerate(rows, start=1):
+    def export_row(
+        item: tuple[int, FrameRecord],
+    ) -> tuple[dict[str, object] | None, int | None]:
+        idx, row = item
         image_path = project_dir / row.image_relpath
-        if not image_path.exists():
-            continue
-        target = images_dir / image_path.name
-        if not target.exists():
-            target.write_bytes(image_path.read_bytes())
-
-        width, height = _read_image_size(image_path)
-        images.append(
-            {
-                "id": idx,
-                "file_name": target.name,
-                "width": width,
-                "height": height,
-            }
-        )
+        source = image_path if sources is None else sources.get(image_path)
+        if source is None or not source.exists():
+            return None, None
+        name = Path(flat_export_name(image_path)).with_suffix(source.suffix).name
+        target = images_dir / name
+        written = None
+        if manifest.sync_file(source, target, link_mode):
+            written = source.stat().st_size
+
+        width, height = row.width, row.height
+        if width <= 0 or height <= 0 or source != image_path:
+            width, height = _read_image_size(source)
+        image = {
+            "id": idx,
+            "file_name": target.name,
+            "width": width,
+            "height": height,
+        }
+        return image, written
+
+    stats = ExportStats(label="coco")
+    with CocoStreamWriter(output_dir, compact=compact, shard_size=shard_size) as writer:
+        for image, written in bounded_map(
+            export_row, enumerate(rows, start=1), workers
+        ):
+            if image is None:
+                continue
+            stats.add(written)
+            writer.add_image(image)
+    stats.finish()
 
-    payload = {
-        "images": images,
-        "annotations": [],
-        "categories": [],
-    }
-    (output_dir / "annotations.json").write_text(
-        json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8"
-    )
+    if prune:
+        manifest.prune()
+    manifest.save()
     return output_dir
 
 
 def _read_image_size(image_path: Path) -> tuple[int, int]:
+    size = read_image_size(image_path)
+    if size is not None:
+        return size
     image = cv2.imread(str(image_path))
     if image is None:
         return 0, 0
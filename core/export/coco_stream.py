@@ -0,0 +1,152 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import IO, Iterable, Optional
+
+ANNOTATIONS_NAME = "annotations.json"
+SHARD_PATTERN = "annotations_{:05d}.json"
+
+
+class CocoStreamWriter:
+    def __init__(
+        self,
+        output_dir: str | Path,
+        compact: bool = False,
+        shard_size: int = 0,
+        categories: Optional[Iterable[dict[str, object]]] = None,
+    ) -> None:
+        self._output_dir = Path(output_dir)
+        self._compact = compact
+        self._shard_size = max(shard_size, 0)
+        self._categories = list(categories or [])
+        self._shard_index = -1
+        self._shard_images = 0
+        self._image_handle: Optional[IO[str]] = None
+        self._annotation_handle: Optional[IO[str]] = None
+        self._annotation_count = 0
+        self._temp_path: Optional[Path] = None
+        self._written: list[Path] = []
+
+    def __enter__(self) -> "CocoStreamWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._abort()
+
+    def add_image(self, image: dict[str, object]) -> None:
+        if self._image_handle is None or (
+            self._shard_size and self._shard_images >= self._shard_size
+        ):
+            self._finish_shard()
+            self._start_shard()
+        assert self._image_handle is not None
+        self._write_item(self._image_handle, image, self._shard_images)
+        self._shard_images += 1
+
+    def add_annotation(self, annotation: dict[str, object]) -> None:
+        if self._image_handle is None:
+            self._start_shard()
+        assert self._annotation_handle is not None
+        self._write_item(self._annotation_handle, annotation, self._annotation_count)
+        self._annotation_count += 1
+
+    def close(self) -> list[Path]:
+        if self._image_handle is None:
+            self._start_shard()
+        self._finish_shard()
+        self._remove_stale_outputs()
+        return list(self._written)
+
+    def _start_shard(self) -> None:
+        self._shard_index += 1
+        self._shard_images = 0
+        self._annotation_count = 0
+        self._output_dir.mkdir(parents=True, exist_ok=True)
+        target = self._shard_path(self._shard_index)
+        self._temp_path = target.with_name(target.name + ".tmp")
+        self._image_handle = self._temp_path.open("w", encoding="utf-8")
+        self._annotation_handle = tempfile.TemporaryFile(
+            "w+", encoding="utf-8", dir=self._output_dir
+        )
+        self._image_handle.write(
+            '{"images":[' if self._compact else '{\n  "images": ['
+        )
+
+    def _finish_shard(self) -> None:
+        handle = self._image_handle
+        if handle is None or self._temp_path is None:
+            return
+        spool = self._annotation_handle
+        handle.write(self._close_array(self._shard_images))
+        handle.write('"annotations":[' if self._compact else '  "annotations": [')
+        if spool is not None:
+            spool.seek(0)
+            while True:
+                chunk = spool.read(1024 * 1024)
+                if not chunk:
+                    break
+                handle.write(chunk)
+            spool.close()
+        handle.write(self._close_array(self._annotation_count))
+        if self._compact:
+            categories = json.dumps(
+                self._categories, ensure_ascii=False, separators=(",", ":")
+            )
+            handle.write(f'"categories":{categories}}}')
+        else:
+            categories = json.dumps(self._categories, ensure_ascii=False)
+            handle.write(f'  "categories": {categories}\n}}\n')
+        handle.close()
+
+        target = self._shard_path(self._shard_index)
+        os.replace(self._temp_path, target)
+        self._written.append(target)
+        self._image_handle = None
+        self._annotation_handle = None
+        self._temp_path = None
+
+    def _close_array(self, count: int) -> str:
+        if self._compact:
+            return "],"
+        return "\n  ],\n" if count else "],\n"
+
+    def _write_item(
+        self, handle: IO[str], item: dict[str, object], position: int
+    ) -> None:
+        if self._compact:
+            if position:
+                handle.write(",")
+            handle.write(json.dumps(item, ensure_ascii=False, separators=(",", ":")))
+            return
+        handle.write(",\n    " if position else "\n    ")
+        handle.write(json.dumps(item, ensure_ascii=False))
+
+    def _shard_path(self, index: int) -> Path:
+        if self._shard_size:
+            return self._output_dir / SHARD_PATTERN.format(index)
+        return self._output_dir / ANNOTATIONS_NAME
+
+    def _remove_stale_outputs(self) -> None:
+        written = set(self._written)
+        stale = list(self._output_dir.glob("annotations_*.json"))
+        stale.append(self._output_dir / ANNOTATIONS_NAME)
+        for path in stale:
+            if path not in written and path.exists():
+                path.unlink()
+
+    def _abort(self) -> None:
+        if self._image_handle is not None:
+            self._image_handle.close()
+        if self._annotation_handle is not None:
+            self._annotation_handle.close()
+        if self._temp_path is not None:
+            self._temp_path.unlink(missing_ok=True)
+        self._image_handle = None
+        self._annotation_handle = None
+        self._temp_path = None
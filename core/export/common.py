@@ -1,7 +1,97 @@
 from __future__ import annotations
 
+import logging
+import os
 import shutil
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional, TypeVar
+
+from core.metadata.query import FrameQuery, iter_selected_frames
+from utils.metrics import increment, observe, timed
+
+LINK_MODES = ("copy", "auto", "hardlink", "reflink", "symlink")
+
+DEFAULT_IO_WORKERS = 4
+
+_FICLONE = 0x40049409
+_IN_FLIGHT_PER_WORKER = 4
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+logger = logging.getLogger("bubforge.export")
+
+
+@dataclass
+class ExportStats:
+    label: str
+    files: int = 0
+    bytes: int = 0
+    skipped: int = 0
+    elapsed_s: float = 0.0
+    started_at: float = field(default_factory=time.perf_counter)
+
+    def add(self, written_bytes: int | None) -> None:
+        if written_bytes is None:
+            self.skipped += 1
+            return
+        self.files += 1
+        self.bytes += written_bytes
+
+    def merge(self, other: "ExportStats") -> None:
+        self.files += other.files
+        self.bytes += other.bytes
+        self.skipped += other.skipped
+
+    def finish(self) -> "ExportStats":
+        self.elapsed_s = time.perf_counter() - self.started_at
+        observe(f"export.{self.label}", self.elapsed_s * 1000)
+        increment("export.files", self.files)
+        increment("export.bytes", self.bytes)
+        logger.info(
+            "导出 %s: 写入 %d 个文件 / 跳过 %d 个, %.1f 文件/秒, %.1f MB/秒, 用时 %.2f 秒",
+            self.label,
+            self.files,
+            self.skipped,
+            self.files_per_s,
+            self.mb_per_s,
+            self.elapsed_s,
+        )
+        return self
+
+    @property
+    def files_per_s(self) -> float:
+        return self.files / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+    @property
+    def mb_per_s(self) -> float:
+        if self.elapsed_s <= 0:
+            return 0.0
+        return self.bytes / (1024 * 1024) / self.elapsed_s
+
+
+def bounded_map(
+    fn: Callable[[T], R], items: Iterable[T], workers: int = DEFAULT_IO_WORKERS
+) -> Iterator[R]:
+    workers = max(workers, 1)
+    if workers == 1:
+        for item in items:
+            yield fn(item)
+        return
+    window = workers * _IN_FLIGHT_PER_WORKER
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending: deque[Future[R]] = deque()
+        for item in items:
+            pending.append(pool.submit(fn, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
 
 
 def collect_frame_images(project_dir: str | Path) -> list[Path]:
@@ -15,14 +105,91 @@ def collect_frame_images(project_dir: str | Path) -> list[Path]:
     return sorted(images)
 
 
-def copy_images(images: list[Path], output_dir: str | Path) -> list[Path]:
+def select_frame_images(
+    project_dir: str | Path, query: Optional[FrameQuery] = None
+) -> list[Path]:
+    if query is None or query.is_empty:
+        return collect_frame_images(project_dir)
+    project_dir = Path(project_dir)
+    records = iter_selected_frames(project_dir, query)
+    return sorted({project_dir / record.image_relpath for record in records})
+
+
+def flat_export_name(image_path: str | Path) -> str:
+    image_path = Path(image_path)
+    return f"{image_path.parent.parent.name}__{image_path.name}"
+
+
+def copy_images(
+    images: list[Path], output_dir: str | Path, link_mode: str = "copy"
+) -> list[Path]:
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
     copied: list[Path] = []
     for image_path in images:
-        target = output_dir / image_path.name
+        target = output_dir / flat_export_name(image_path)
         if target.exists():
             continue
-        shutil.copy2(image_path, target)
+        place_file(image_path, target, link_mode)
         copied.append(target)
     return copied
+
+
+def same_filesystem(src: str | Path, dst_dir: str | Path) -> bool:
+    try:
+        return os.stat(src).st_dev == os.stat(dst_dir).st_dev
+    except OSError:
+        return False
+
+
+@timed("export.place_file")
+def place_file(src: str | Path, dst: str | Path, link_mode: str = "copy") -> str:
+    src = Path(src)
+    dst = Path(dst)
+    if link_mode not in LINK_MODES:
+        raise ValueError(f"未知链接方式: {link_mode}")
+
+    if link_mode == "symlink":
+        try:
+            dst.symlink_to(src.resolve())
+            return "symlink"
+        except (OSError, NotImplementedError):
+            pass
+
+    if link_mode in ("auto", "hardlink", "reflink") and same_filesystem(
+        src, dst.parent
+    ):
+        if link_mode in ("auto", "reflink") and _try_reflink(src, dst):
+            return "reflink"
+        if link_mode in ("auto", "hardlink"):
+            try:
+                os.link(src, dst)
+                return "hardlink"
+            except OSError:
+                pass
+
+    shutil.copy2(src, dst)
+    return "copy"
+
+
+def _try_reflink(src: Path, dst: Path) -> bool:
+    if sys.platform.startswith("linux"):
+        import fcntl
+
+        try:
+            with src.open("rb") as source, dst.open("wb") as target:
+                fcntl.ioctl(target.fileno(), _FICLONE, source.fileno())
+        except OSError:
+            dst.unlink(missing_ok=True)
+            return False
+        shutil.copystat(src, dst)
+        return True
+    if sys.platform == "darwin":
+        import ctypes
+
+        libc = ctypes.CDLL("libc.dylib", use_errno=True)
+        clonefile = getattr(libc, "clonefile", None)
+        if clonefile is None:
+            return False
+        return clonefile(os.fsencode(src), os.fsencode(dst), 0) == 0
+    return False
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+import csv
+import os
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Optional
+
+from core.export.common import (
+    DEFAULT_IO_WORKERS,
+    ExportStats,
+    bounded_map,
+    flat_export_name,
+    place_file,
+)
+
+MANIFEST_NAME = "export_manifest.csv"
+MANIFEST_HEADER = ["target_relpath", "source_path", "size", "mtime_ns"]
+
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    target_relpath: str
+    source_path: str
+    size: int
+    mtime_ns: int
+
+
+@dataclass(frozen=True)
+class SyncSummary:
+    added: int
+    updated: int
+    unchanged: int
+    pruned: int
+
+
+class ExportManifest:
+    def __init__(
+        self, output_dir: str | Path, project_dir: Optional[str | Path] = None
+    ) -> None:
+        self.output_dir = Path(output_dir)
+        self._project_dir = None if project_dir is None else Path(project_dir)
+        self._path = self.output_dir / MANIFEST_NAME
+        self._entries = self._load()
+        self._lock = threading.Lock()
+        self._seen: set[str] = set()
+        self._added = 0
+        self._updated = 0
+        self._unchanged = 0
+        self._pruned = 0
+
+    def target_relpath(self, target: str | Path) -> str:
+        return Path(target).relative_to(self.output_dir).as_posix()
+
+    def sync_file(
+        self, source: str | Path, target: str | Path, link_mode: str = "copy"
+    ) -> bool:
+        source = Path(source)
+        target = Path(target)
+        relpath = self.target_relpath(target)
+        stat = source.stat()
+        with self._lock:
+            self._seen.add(relpath)
+            entry = self._entries.get(relpath)
+
+        if entry is not None and os.path.lexists(target):
+            if entry.size == stat.st_size and entry.mtime_ns == stat.st_mtime_ns:
+                with self._lock:
+                    self._unchanged += 1
+                return False
+        elif entry is None and target.exists() and target.stat().st_size == stat.st_size:
+            with self._lock:
+                self._record(relpath, source, stat)
+                self._unchanged += 1
+            return False
+
+        existed = os.path.lexists(target)
+        if existed:
+            target.unlink()
+        target.parent.mkdir(parents=True, exist_ok=True)
+        place_file(source, target, link_mode)
+        with self._lock:
+            self._record(relpath, source, stat)
+            if existed:
+                self._updated += 1
+            else:
+                self._added += 1
+        return True
+
+    def sync_files(
+        self,
+        pairs: Iterable[tuple[Path, Path]],
+        link_mode: str = "copy",
+        workers: int = DEFAULT_IO_WORKERS,
+        label: str = "",
+    ) -> ExportStats:
+        stats = ExportStats(label=label or self.output_dir.name)
+
+        def sync_pair(pair: tuple[Path, Path]) -> int | None:
+            source, target = pair
+            if not self.sync_file(source, target, link_mode):
+                return None
+            return source.stat().st_size
+
+        for written in bounded_map(sync_pair, pairs, workers):
+            stats.add(written)
+        return stats
+
+    def release(self, target: str | Path) -> None:
+        relpath = self.target_relpath(target)
+        with self._lock:
+            self._entries.pop(relpath, None)
+            self._seen.discard(relpath)
+
+    def prune(self) -> list[str]:
+        removed: list[str] = []
+        for relpath in sorted(set(self._entries) - self._seen):
+            target = self.output_dir / relpath
+            if os.path.lexists(target):
+                target.unlink()
+            del self._entries[relpath]
+            removed.append(relpath)
+        self._pruned += len(removed)
+        return removed
+
+    def summary(self) -> SyncSummary:
+        return SyncSummary(
+            added=self._added,
+            updated=self._updated,
+            unchanged=self._unchanged,
+            pruned=self._pruned,
+        )
+
+    def save(self) -> Path:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        temp_path = self._path.with_name(self._path.name + ".tmp")
+        with temp_path.open("w", newline="", encoding="utf-8") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(MANIFEST_HEADER)
+            for relpath in sorted(self._entries):
+                entry = self._entries[relpath]
+                writer.writerow(
+                    [entry.target_relpath, entry.source_path, entry.size, entry.mtime_ns]
+                )
+        os.replace(temp_path, self._path)
+        return self._path
+
+    def _record(self, relpath: str, source: Path, stat: os.stat_result) -> None:
+        self._entries[relpath] = ManifestEntry(
+            target_relpath=relpath,
+            source_path=self._source_label(source),
+            size=stat.st_size,
+            mtime_ns=stat.st_mtime_ns,
+        )
+
+    def _source_label(self, source: Path) -> str:
+        if self._project_dir is not None:
+            try:
+                return source.relative_to(self._project_dir).as_posix()
+            except ValueError:
+                pass
+        return str(source)
+
+    def _load(self) -> dict[str, ManifestEntry]:
+        if not self._path.exists():
+            return {}
+        entries: dict[str, ManifestEntry] = {}
+        with self._path.open("r", newline="", encoding="utf-8") as handle:
+            for row in csv.DictReader(handle):
+                try:
+                    entry = ManifestEntry(
+                        target_relpath=row["target_relpath"],
+                        source_path=row["source_path"],
+                        size=int(row["size"]),
+                        mtime_ns=int(row["mtime_ns"]),
+                    )
+                except (KeyError, TypeError, ValueError):
+                    continue
+                entries[entry.target_relpath] = entry
+        return entries
+
+
+def sync_images(
+    images: list[Path],
+    output_dir: str | Path,
+    manifest: ExportManifest,
+    link_mode: str = "copy",
+    workers: int = DEFAULT_IO_WORKERS,
+    sources: Optional[dict[Path, Path]] = None,
+) -> ExportStats:
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    def pair(image: Path) -> tuple[Path, Path]:
+        source = image if sources is None else sources[image]
+        name = Path(flat_export_name(image)).with_suffix(source.suffix).name
+        return source, output_dir / name
+
+    pairs = (
+        pair(image) for image in images if sources is None or image in sources
+    )
+    return manifest.sync_files(pairs, link_mode, workers, label=output_dir.name)
@@ -0,0 +1,273 @@
+from __future__ import annotations
+
+import argparse
+import json
+import mmap
+import os
+import random
+import shutil
+import sys
+import time
+from dataclasses import fields
+from pathlib import Path
+from typing import IO, Optional
+
+import numpy as np
+
+from core.export.common import DEFAULT_IO_WORKERS, ExportStats, bounded_map
+from core.export.transforms import transform_images, transformed_record
+from core.metadata.frames_csv import FrameRecord
+from core.metadata.query import FrameQuery, iter_selected_frames
+
+PACKED_HEADER_NAME = "packed.json"
+PACKED_INDEX_NAME = "index.npy"
+PACKED_METADATA_NAME = "metadata.npz"
+BLOB_PATTERN = "blob-{:05d}.bin"
+DEFAULT_BLOB_BYTES = 2 << 30
+PACKED_VERSION = 1
+
+INDEX_DTYPE = np.dtype([("blob", "<u2"), ("offset", "<u8"), ("length", "<u4")])
+_INT_COLUMNS = {"timestamp_ms": "<i8", "frame_index": "<i8", "width": "<i4", "height": "<i4"}
+_WRITE_BUFFER = 8 * 1024 * 1024
+
+
+def export_packed(
+    project_dir: str | Path,
+    output_dir: str | Path,
+    link_mode: str = "copy",
+    prune: bool = False,
+    workers: int = DEFAULT_IO_WORKERS,
+    blob_max_bytes: int = DEFAULT_BLOB_BYTES,
+    query: Optional[FrameQuery] = None,
+    transforms: Optional[list[dict[str, object]]] = None,
+) -> Path:
+    project_dir = Path(project_dir)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    staging_dir = output_dir / ".packed.tmp"
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    staging_dir.mkdir()
+
+    records = list(iter_selected_frames(project_dir, query))
+    sources: Optional[dict[Path, Path]] = None
+    if transforms:
+        sources = transform_images(
+            project_dir,
+            [project_dir / record.image_relpath for record in records],
+            transforms,
+            workers,
+        )
+
+    def load(record: FrameRecord) -> Optional[bytes]:
+        image_path = project_dir / record.image_relpath
+        if sources is not None:
+            image_path = sources.get(image_path)
+            if image_path is None:
+                return None
+        try:
+            return image_path.read_bytes()
+        except OSError:
+            return None
+
+    stats = ExportStats(label="packed")
+    kept: list[FrameRecord] = []
+    entries: list[tuple[int, int, int]] = []
+    blobs: list[str] = []
+    handle: Optional[IO[bytes]] = None
+    for record, payload in zip(records, bounded_map(load, records, workers)):
+        if payload is None:
+            stats.add(None)
+            continue
+        if handle is None or (
+            blob_max_bytes > 0
+            and handle.tell()
+            and handle.tell() + len(payload) > blob_max_bytes
+        ):
+            if handle is not None:
+                handle.close()
+            blobs.append(BLOB_PATTERN.format(len(blobs)))
+            handle = (staging_dir / blobs[-1]).open("wb", buffering=_WRITE_BUFFER)
+        entries.append((len(blobs) - 1, handle.tell(), len(payload)))
+        handle.write(payload)
+        if sources is not None:
+            record = transformed_record(
+                record, sources[project_dir / record.image_relpath]
+            )
+        kept.append(record)
+        stats.add(len(payload))
+    if handle is not None:
+        handle.close()
+
+    np.save(staging_dir / PACKED_INDEX_NAME, np.array(entries, dtype=INDEX_DTYPE))
+    np.savez(staging_dir / PACKED_METADATA_NAME, **_metadata_columns(kept))
+    header = {
+        "version": PACKED_VERSION,
+        "count": len(kept),
+        "blobs": blobs,
+        "columns": [field.name for field in fields(FrameRecord)],
+    }
+    (staging_dir / PACKED_HEADER_NAME).write_text(
+        json.dumps(header, ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+
+    for stale in output_dir.glob("blob-*.bin"):
+        if stale.name not in blobs:
+            stale.unlink()
+    for path in staging_dir.iterdir():
+        os.replace(path, output_dir / path.name)
+    staging_dir.rmdir()
+    stats.finish()
+    return output_dir
+
+
+def _metadata_columns(records: list[FrameRecord]) -> dict[str, np.ndarray]:
+    columns: dict[str, np.ndarray] = {}
+    for field in fields(FrameRecord):
+        values = [getattr(record, field.name) for record in records]
+        dtype = _INT_COLUMNS.get(field.name)
+        if dtype is not None:
+            columns[field.name] = np.array(values, dtype=dtype)
+        else:
+            columns[field.name] = np.array(values, dtype=np.str_)
+    return columns
+
+
+class PackedReader:
+    def __init__(self, packed_dir: str | Path) -> None:
+        self.packed_dir = Path(packed_dir)
+        header = json.loads(
+            (self.packed_dir / PACKED_HEADER_NAME).read_text(encoding="utf-8")
+        )
+        if header.get("version") != PACKED_VERSION:
+            raise ValueError(f"不支持的打包格式版本: {header.get('version')}")
+        self.index = np.load(self.packed_dir / PACKED_INDEX_NAME, mmap_mode="r")
+        self._metadata: Optional[dict[str, np.ndarray]] = None
+        self._files: list[IO[bytes]] = []
+        self._maps: list[Optional[mmap.mmap]] = []
+        self._views: list[Optional[memoryview]] = []
+        for name in header["blobs"]:
+            handle = (self.packed_dir / name).open("rb")
+            self._files.append(handle)
+            if os.fstat(handle.fileno()).st_size == 0:
+                self._maps.append(None)
+                self._views.append(None)
+                continue
+            mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps.append(mapped)
+            self._views.append(memoryview(mapped))
+
+    def __enter__(self) -> "PackedReader":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def __getitem__(self, position: int) -> memoryview:
+        blob, offset, length = self.index[position]
+        view = self._views[int(blob)]
+        if view is None:
+            return memoryview(b"")
+        return view[int(offset) : int(offset) + int(length)]
+
+    def read(self, position: int) -> bytes:
+        return bytes(self[position])
+
+    @property
+    def metadata(self) -> dict[str, np.ndarray]:
+        if self._metadata is None:
+            with np.load(self.packed_dir / PACKED_METADATA_NAME) as archive:
+                self._metadata = {name: archive[name] for name in archive.files}
+        return self._metadata
+
+    def record(self, position: int) -> FrameRecord:
+        values = {}
+        for field in fields(FrameRecord):
+            column = self.metadata.get(field.name)
+            if column is None:
+                continue
+            value = column[position]
+            values[field.name] = int(value) if field.name in _INT_COLUMNS else str(value)
+        return FrameRecord(**values)
+
+    def close(self) -> None:
+        for view in self._views:
+            if view is not None:
+                view.release()
+        for mapped in self._maps:
+            if mapped is None:
+                continue
+            try:
+                mapped.close()
+            except BufferError:
+                pass
+        for handle in self._files:
+            handle.close()
+        self._views = []
+        self._maps = []
+        self._files = []
+
+
+def benchmark_random_access(
+    packed_dir: str | Path,
+    ultralytics_dir: str | Path,
+    samples: int = 2000,
+    seed: int = 0,
+) -> dict[str, dict[str, float]]:
+    rng = random.Random(seed)
+    results: dict[str, dict[str, float]] = {}
+
+    with PackedReader(packed_dir) as reader:
+        if len(reader):
+            order = [rng.randrange(len(reader)) for _ in range(samples)]
+            started = time.perf_counter()
+            total = 0
+            for position in order:
+                total += len(reader.read(position))
+            results["packed"] = _throughput(len(order), total, started)
+
+    images = sorted(
+        path
+        for path in (Path(ultralytics_dir) / "images").rglob("*")
+        if path.is_file()
+    )
+    if images:
+        order = [rng.randrange(len(images)) for _ in range(samples)]
+        started = time.perf_counter()
+        total = 0
+        for position in order:
+            total += len(images[position].read_bytes())
+        results["ultralytics"] = _throughput(len(order), total, started)
+    return results
+
+
+def _throughput(count: int, total_bytes: int, started: float) -> dict[str, float]:
+    elapsed = time.perf_counter() - started
+    return {
+        "samples": count,
+        "elapsed_s": elapsed,
+        "samples_per_s": count / elapsed if elapsed > 0 else 0.0,
+        "mb_per_s": total_bytes / (1024 * 1024) / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="打包格式与 Ultralytics 目录随机读取对比")
+    parser.add_argument("packed_dir", help="打包导出目录")
+    parser.add_argument("ultralytics_dir", help="Ultralytics 导出目录")
+    parser.add_argument("--samples", type=int, default=2000, help="随机读取次数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    args = parser.parse_args(argv)
+
+    results = benchmark_random_access(
+        args.packed_dir, args.ultralytics_dir, samples=args.samples, seed=args.seed
+    )
+    json.dump(results, sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write("\n")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from core.export.common import DEFAULT_IO_WORKERS
+from core.export.transforms import TransformPipeline
+
+PRESET_NAME = "export_preset.json"
+
+
+@dataclass
+class ExportPreset:
+    format: str
+    link_mode: str = "copy"
+    prune: bool = False
+    workers: int = DEFAULT_IO_WORKERS
+    transforms: list[dict[str, object]] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, payload: dict[str, object]) -> "ExportPreset":
+        pipeline = TransformPipeline.from_list(payload.get("transforms") or [])
+        return cls(
+            format=str(payload["format"]),
+            link_mode=str(payload.get("link_mode", "copy")),
+            prune=bool(payload.get("prune", False)),
+            workers=int(payload.get("workers", DEFAULT_IO_WORKERS)),
+            transforms=pipeline.to_list() if pipeline is not None else [],
+        )
+
+    def to_dict(self) -> dict[str, object]:
+        return asdict(self)
+
+
+def load_preset(output_dir: str | Path) -> Optional[ExportPreset]:
+    path = Path(output_dir) / PRESET_NAME
+    if not path.exists():
+        return None
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+        return ExportPreset.from_dict(payload)
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def save_preset(output_dir: str | Path, preset: ExportPreset) -> Path:
+    path = Path(output_dir) / PRESET_NAME
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(path.name + ".tmp")
+    temp_path.write_text(
+        json.dumps(preset.to_dict(), ensure_ascii=False, indent=2), encoding="utf-8"
+    )
+    os.replace(temp_path, path)
+    return path
@@ -1,21 +1,132 @@
 from __future__ import annotations
 
-import shutil
+import os
 from pathlib import Path
+from typing import Iterator, Optional
 
+from core.export.common import DEFAULT_IO_WORKERS, ExportStats
+from core.export.manifest import ExportManifest
+from core.export.transforms import transform_images, transformed_record
+from core.metadata.frames_csv import BACKUP_SUFFIX, FrameRecord, write_frames_csv
+from core.metadata.journal import (
+    FRAMES_LOCK_NAME,
+    JOURNAL_DIR_NAME,
+    LEGACY_JOURNAL_NAME,
+)
+from core.metadata.query import FrameQuery, iter_selected_frames
+from core.project.integrity import INTEGRITY_CACHE_NAME
+from core.project.shards import MERGE_CONFLICTS_NAME
+from core.video.probe import PROBE_CACHE_NAME
 
-def export_raw(project_dir: str | Path, output_dir: str | Path) -> Path:
+_SKIP_SUFFIXES = (".staging", ".tmp", BACKUP_SUFFIX)
+_METADATA_SKIP_NAMES = frozenset(
+    {
+        JOURNAL_DIR_NAME,
+        LEGACY_JOURNAL_NAME,
+        FRAMES_LOCK_NAME,
+        INTEGRITY_CACHE_NAME,
+        PROBE_CACHE_NAME,
+        MERGE_CONFLICTS_NAME,
+    }
+)
+
+
+def export_raw(
+    project_dir: str | Path,
+    output_dir: str | Path,
+    link_mode: str = "copy",
+    prune: bool = False,
+    workers: int = DEFAULT_IO_WORKERS,
+    query: Optional[FrameQuery] = None,
+    transforms: Optional[list[dict[str, object]]] = None,
+) -> Path:
     project_dir = Path(project_dir)
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
+    manifest = ExportManifest(output_dir, project_dir)
 
     frames_src = project_dir / "frames"
     metadata_src = project_dir / "metadata"
 
-    frames_dst = output_dir / "frames"
-    metadata_dst = output_dir / "metadata"
-    if frames_src.exists() and not frames_dst.exists():
-        shutil.copytree(frames_src, frames_dst)
-    if metadata_src.exists() and not metadata_dst.exists():
-        shutil.copytree(metadata_src, metadata_dst)
+    rewrite = bool(transforms) or (query is not None and not query.is_empty)
+    stats = ExportStats(label="raw")
+    if rewrite:
+        records, frame_pairs = _record_pairs(
+            project_dir,
+            output_dir,
+            list(iter_selected_frames(project_dir, query)),
+            transforms,
+            workers,
+        )
+        metadata_pairs = (
+            pair
+            for pair in _target_pairs(
+                project_dir, output_dir, metadata_src, _METADATA_SKIP_NAMES
+            )
+            if pair[0].name != "frames.csv"
+        )
+    else:
+        frame_pairs = _target_pairs(project_dir, output_dir, frames_src)
+        metadata_pairs = _target_pairs(
+            project_dir, output_dir, metadata_src, _METADATA_SKIP_NAMES
+        )
+    stats.merge(manifest.sync_files(frame_pairs, link_mode, workers))
+    stats.merge(manifest.sync_files(metadata_pairs, "copy", workers))
+    if rewrite:
+        frames_target = output_dir / "metadata" / "frames.csv"
+        frames_target.parent.mkdir(parents=True, exist_ok=True)
+        write_frames_csv(frames_target, records)
+        manifest.release(frames_target)
+    stats.finish()
+
+    if prune:
+        manifest.prune()
+    manifest.save()
     return output_dir
+
+
+def _record_pairs(
+    project_dir: Path,
+    output_dir: Path,
+    records: list[FrameRecord],
+    transforms: Optional[list[dict[str, object]]],
+    workers: int,
+) -> tuple[list[FrameRecord], list[tuple[Path, Path]]]:
+    images = [project_dir / record.image_relpath for record in records]
+    sources = transform_images(project_dir, images, transforms, workers)
+    exported: list[FrameRecord] = []
+    pairs: list[tuple[Path, Path]] = []
+    for record, image_path in zip(records, images):
+        source = sources.get(image_path)
+        if source is None or not source.is_file():
+            continue
+        if source != image_path:
+            record = transformed_record(record, source)
+        exported.append(record)
+        pairs.append((source, output_dir / record.image_relpath))
+    return exported, pairs
+
+
+def _target_pairs(
+    project_dir: Path,
+    output_dir: Path,
+    root: Path,
+    skip_names: frozenset[str] = frozenset(),
+) -> Iterator[tuple[Path, Path]]:
+    if not root.exists():
+        return
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(
+            name
+            for name in dirnames
+            if not name.startswith(".") and name not in skip_names
+        )
+        for name in sorted(filenames):
+            if (
+                name.startswith(".")
+                or name.endswith(_SKIP_SUFFIXES)
+                or name in skip_names
+            ):
+                continue
+            source = Path(dirpath) / name
+            yield source, output_dir / source.relative_to(project_dir)
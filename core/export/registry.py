@@ -3,18 +3,30 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Callable
 
+from core.export.archive import export_tar_shards, export_zip_shards
 from core.export.coco import export_coco
+from core.export.packed import export_packed
 from core.export.raw import export_raw
 from core.export.ultralytics import export_ultralytics
 
-Exporter = Callable[[str | Path, str | Path], Path]
+Exporter = Callable[..., Path]
+
+EXPORTERS: dict[str, Exporter] = {
+    "RawFrames + Metadata": export_raw,
+    "Ultralytics Skeleton": export_ultralytics,
+    "COCO Skeleton": export_coco,
+    "WebDataset Shards (tar)": export_tar_shards,
+    "Zip Shards": export_zip_shards,
+    "Packed Blobs": export_packed,
+}
+
+
+def exporter_names() -> list[str]:
+    return list(EXPORTERS)
 
 
 def get_exporter(name: str) -> Exporter:
-    if name == "RawFrames + Metadata":
-        return export_raw
-    if name == "Ultralytics Skeleton":
-        return export_ultralytics
-    if name == "COCO Skeleton":
-        return export_coco
-    raise ValueError(f"未知导出格式: {name}")
+    exporter = EXPORTERS.get(name)
+    if exporter is None:
+        raise ValueError(f"未知导出格式: {name}")
+    return exporter
@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import csv
+import hashlib
+import os
+from pathlib import Path
+
+from core.metadata.frames_csv import parse_frame_filename
+
+SPLITS = ("train", "val", "test")
+DEFAULT_RATIOS = (0.8, 0.1, 0.1)
+SPLIT_GROUPS = ("video", "segment", "frame")
+DEFAULT_SEGMENT_MS = 60_000
+SPLITS_NAME = "splits.csv"
+
+
+def split_group_key(
+    image_path: str | Path,
+    group_by: str = "segment",
+    segment_ms: int = DEFAULT_SEGMENT_MS,
+) -> str:
+    image_path = Path(image_path)
+    video_folder = image_path.parent.parent.name
+    if group_by == "video":
+        return video_folder
+    if group_by == "frame":
+        return f"{video_folder}/{image_path.parent.name}/{image_path.name}"
+    if group_by == "segment":
+        parsed = parse_frame_filename(image_path.name)
+        if parsed is None:
+            return f"{video_folder}/{image_path.name}"
+        segment = parsed[0] // max(segment_ms, 1)
+        return f"{video_folder}@{segment}"
+    raise ValueError(f"未知分组方式: {group_by}")
+
+
+def hash_split(key: str, ratios: tuple[float, float, float] = DEFAULT_RATIOS) -> str:
+    total = sum(max(ratio, 0.0) for ratio in ratios)
+    if total <= 0:
+        raise ValueError("划分比例之和必须大于 0")
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest()
+    position = int.from_bytes(digest, "big") / float(1 << 64)
+    threshold = 0.0
+    for split, ratio in zip(SPLITS, ratios):
+        threshold += max(ratio, 0.0) / total
+        if position < threshold:
+            return split
+    return SPLITS[-1]
+
+
+class SplitAssignments:
+    def __init__(
+        self,
+        output_dir: str | Path,
+        ratios: tuple[float, float, float] = DEFAULT_RATIOS,
+    ) -> None:
+        self._path = Path(output_dir) / SPLITS_NAME
+        self._ratios = ratios
+        self._assigned = self._load()
+        self._dirty = False
+
+    def assign(self, key: str) -> str:
+        split = self._assigned.get(key)
+        if split is None:
+            split = hash_split(key, self._ratios)
+            self._assigned[key] = split
+            self._dirty = True
+        return split
+
+    def save(self) -> None:
+        if not self._dirty:
+            return
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = self._path.with_name(self._path.name + ".tmp")
+        with temp_path.open("w", newline="", encoding="utf-8") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(["group_key", "split"])
+            for key in sorted(self._assigned):
+                writer.writerow([key, self._assigned[key]])
+        os.replace(temp_path, self._path)
+        self._dirty = False
+
+    def _load(self) -> dict[str, str]:
+        if not self._path.exists():
+            return {}
+        assigned: dict[str, str] = {}
+        with self._path.open("r", newline="", encoding="utf-8") as handle:
+            for row in csv.DictReader(handle):
+                key = row.get("group_key")
+                split = row.get("split")
+                if key and split in SPLITS:
+                    assigned[key] = split
+        return assigned
@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from pathlib import Path
+from typing import Iterable, Optional
+
+import cv2
+import numpy as np
+
+from core.export.common import DEFAULT_IO_WORKERS, bounded_map, logger
+from core.metadata.frames_csv import FrameRecord
+from utils.hash_gen import content_fingerprint
+from utils.image_header import read_image_size
+from utils.metrics import timed
+
+TRANSFORM_OPS = ("resize", "letterbox", "encode")
+ENCODE_FORMATS = ("jpg", "png")
+DEFAULT_CHUNK_SIZE = 64
+DEFAULT_LETTERBOX_COLOR = (114, 114, 114)
+TRANSFORM_CACHE_DIR = Path("cache") / "transforms"
+_TRANSFORM_VERSION = 1
+
+
+class TransformPipeline:
+    def __init__(self, steps: Iterable[dict[str, object]]) -> None:
+        self.steps = [_normalize_step(step) for step in steps]
+
+    @classmethod
+    def from_list(
+        cls, steps: Optional[Iterable[dict[str, object]]]
+    ) -> Optional["TransformPipeline"]:
+        steps = list(steps or [])
+        if not steps:
+            return None
+        return cls(steps)
+
+    def to_list(self) -> list[dict[str, object]]:
+        return [dict(step) for step in self.steps]
+
+    @property
+    def digest(self) -> str:
+        payload = json.dumps(
+            {"version": _TRANSFORM_VERSION, "steps": self.steps},
+            sort_keys=True,
+            separators=(",", ":"),
+        )
+        return hashlib.blake2b(payload.encode("utf-8"), digest_size=8).hexdigest()
+
+    def output_ext(self, source_ext: str) -> str:
+        ext = source_ext.lstrip(".").lower()
+        for step in self.steps:
+            if step["op"] == "encode":
+                ext = str(step["format"])
+        return "jpg" if ext == "jpeg" else ext
+
+    def apply(self, image: np.ndarray) -> np.ndarray:
+        for step in self.steps:
+            if step["op"] == "resize":
+                image = _resize(
+                    image, int(step["width"]), int(step["height"]), bool(step["keep_ratio"])
+                )
+            elif step["op"] == "letterbox":
+                image = _letterbox(
+                    image, int(step["width"]), int(step["height"]), step["color"]
+                )
+        return image
+
+    def encode_params(self) -> list[int]:
+        for step in reversed(self.steps):
+            if step["op"] == "encode" and step["format"] == "jpg":
+                return [cv2.IMWRITE_JPEG_QUALITY, int(step["quality"])]
+            if step["op"] == "encode":
+                return [cv2.IMWRITE_PNG_COMPRESSION, int(step["compression"])]
+        return []
+
+
+@timed("export.transform")
+def transform_images(
+    project_dir: str | Path,
+    images: Iterable[Path],
+    transforms: Optional[Iterable[dict[str, object]]],
+    workers: int = DEFAULT_IO_WORKERS,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> dict[Path, Path]:
+    images = list(images)
+    pipeline = TransformPipeline.from_list(transforms)
+    if pipeline is None:
+        return {image: image for image in images}
+
+    cache_dir = Path(project_dir) / TRANSFORM_CACHE_DIR / pipeline.digest
+    mapping: dict[Path, Path] = {}
+    pending: list[tuple[str, str]] = []
+
+    def cached_path(image: Path) -> Optional[Path]:
+        try:
+            fingerprint = content_fingerprint(image)
+        except OSError:
+            return None
+        ext = pipeline.output_ext(image.suffix)
+        return cache_dir / fingerprint[:2] / f"{fingerprint}.{ext}"
+
+    for image, target in zip(images, bounded_map(cached_path, images, workers)):
+        if target is None:
+            continue
+        mapping[image] = target
+        if not target.exists():
+            pending.append((str(image), str(target)))
+
+    if pending:
+        chunks = [
+            pending[start : start + max(chunk_size, 1)]
+            for start in range(0, len(pending), max(chunk_size, 1))
+        ]
+        failed: set[str] = set()
+        with ProcessPoolExecutor(max_workers=max(workers, 1)) as pool:
+            results = pool.map(
+                _transform_chunk, [pipeline.steps] * len(chunks), chunks
+            )
+            for chunk_failed in results:
+                failed.update(chunk_failed)
+        if failed:
+            logger.warning("图像变换失败 %d 张，已跳过", len(failed))
+            mapping = {
+                image: target
+                for image, target in mapping.items()
+                if str(image) not in failed
+            }
+    logger.info(
+        "图像变换 %s: 新生成 %d 张, 复用缓存 %d 张",
+        pipeline.digest,
+        len(pending),
+        len(mapping) - len(pending),
+    )
+    return mapping
+
+
+def transformed_record(record: FrameRecord, output_path: Path) -> FrameRecord:
+    relpath = Path(record.image_relpath).with_suffix(output_path.suffix).as_posix()
+    width, height = read_image_size(output_path) or (record.width, record.height)
+    return replace(record, image_relpath=relpath, width=width, height=height)
+
+
+def _transform_chunk(
+    steps: list[dict[str, object]], items: list[tuple[str, str]]
+) -> list[str]:
+    pipeline = TransformPipeline(steps)
+    params = pipeline.encode_params()
+    failed: list[str] = []
+    for source, target in items:
+        image = cv2.imread(source, cv2.IMREAD_COLOR)
+        if image is None:
+            failed.append(source)
+            continue
+        output = pipeline.apply(image)
+        ok, encoded = cv2.imencode(Path(target).suffix, output, params)
+        if not ok:
+            failed.append(source)
+            continue
+        target_path = Path(target)
+        target_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = target_path.with_name(f"{target_path.name}.{os.getpid()}.tmp")
+        temp_path.write_bytes(encoded.tobytes())
+        os.replace(temp_path, target_path)
+    return failed
+
+
+def _normalize_step(step: dict[str, object]) -> dict[str, object]:
+    op = step.get("op")
+    if op not in TRANSFORM_OPS:
+        raise ValueError(f"未知图像变换: {op}")
+    if op in ("resize", "letterbox"):
+        width = int(step.get("width", 0))
+        height = int(step.get("height", width))
+        if width <= 0 or height <= 0:
+            raise ValueError(f"{op} 需要正的 width/height")
+        if op == "resize":
+            return {
+                "op": op,
+                "width": width,
+                "height": height,
+                "keep_ratio": bool(step.get("keep_ratio", True)),
+            }
+        color = [int(value) for value in step.get("color", DEFAULT_LETTERBOX_COLOR)]
+        return {"op": op, "width": width, "height": height, "color": color}
+    fmt = str(step.get("format", "jpg")).lower()
+    fmt = "jpg" if fmt == "jpeg" else fmt
+    if fmt not in ENCODE_FORMATS:
+        raise ValueError(f"不支持的输出格式: {fmt}")
+    if fmt == "jpg":
+        quality = min(max(int(step.get("quality", 95)), 1), 100)
+        return {"op": op, "format": fmt, "quality": quality}
+    compression = min(max(int(step.get("compression", 3)), 0), 9)
+    return {"op": op, "format": fmt, "compression": compression}
+
+
+def _resize(image: np.ndarray, width: int, height: int, keep_ratio: bool) -> np.ndarray:
+    src_h, src_w = image.shape[:2]
+    if keep_ratio:
+        scale = min(width / src_w, height / src_h)
+        width = max(int(round(src_w * scale)), 1)
+        height = max(int(round(src_h * scale)), 1)
+    if (width, height) == (src_w, src_h):
+        return image
+    interpolation = cv2.INTER_AREA if width < src_w else cv2.INTER_LINEAR
+    return cv2.resize(image, (width, height), interpolation=interpolation)
+
+
+def _letterbox(
+    image: np.ndarray, width: int, height: int, color: object
+) -> np.ndarray:
+    resized = _resize(image, width, height, keep_ratio=True)
+    res_h, res_w = resized.shape[:2]
+    top = (height - res_h) // 2
+    left = (width - res_w) // 2
+    return cv2.copyMakeBorder(
+        resized,
+        top,
+        height - res_h - top,
+        left,
+        width - res_w - left,
+        cv2.BORDER_CONSTANT,
+        value=tuple(color),
+    )
@@ -1,31 +1,76 @@
 from __future__ import annotations
 
-import math
+import filecmp
+import os
 from pathlib import Path
+from typing import Optional
 
 import yaml
 
-from core.export.common import collect_frame_images, copy_images
+from core.export.common import (
+    DEFAULT_IO_WORKERS,
+    ExportStats,
+    flat_export_name,
+    select_frame_images,
+)
+from core.export.manifest import ExportManifest, sync_images
+from core.export.transforms import transform_images
+from core.export.splits import (
+    DEFAULT_RATIOS,
+    DEFAULT_SEGMENT_MS,
+    SPLITS,
+    SplitAssignments,
+    split_group_key,
+)
+from core.metadata.frames_csv import parse_frame_filename
+from core.metadata.query import FrameQuery
 
 
-def export_ultralytics(project_dir: str | Path, output_dir: str | Path) -> Path:
+def export_ultralytics(
+    project_dir: str | Path,
+    output_dir: str | Path,
+    link_mode: str = "copy",
+    prune: bool = False,
+    workers: int = DEFAULT_IO_WORKERS,
+    ratios: tuple[float, float, float] = DEFAULT_RATIOS,
+    group_by: str = "segment",
+    segment_ms: int = DEFAULT_SEGMENT_MS,
+    query: Optional[FrameQuery] = None,
+    transforms: Optional[list[dict[str, object]]] = None,
+) -> Path:
     project_dir = Path(project_dir)
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
+    manifest = ExportManifest(output_dir, project_dir)
 
-    images = collect_frame_images(project_dir)
-    train_dir = output_dir / "images" / "train"
-    val_dir = output_dir / "images" / "val"
-    test_dir = output_dir / "images" / "test"
+    images = select_frame_images(project_dir, query)
+    assignments = SplitAssignments(output_dir, ratios)
+    split_images: dict[str, list[Path]] = {split: [] for split in SPLITS}
+    placement: dict[str, str] = {}
+    for image_path in images:
+        key = split_group_key(image_path, group_by, segment_ms)
+        split = assignments.assign(key)
+        split_images[split].append(image_path)
+        placement[Path(flat_export_name(image_path)).stem] = split
+    assignments.save()
+    _remove_moved_images(output_dir, manifest, placement)
+    sources = None
+    if transforms:
+        sources = transform_images(project_dir, images, transforms, workers)
+    _adopt_legacy_images(output_dir, manifest, split_images, sources, prune)
 
-    split_train, split_val = _split_counts(len(images))
-    train_images = images[:split_train]
-    val_images = images[split_train : split_train + split_val]
-    test_images = images[split_train + split_val :]
-
-    copy_images(train_images, train_dir)
-    copy_images(val_images, val_dir)
-    copy_images(test_images, test_dir)
+    stats = ExportStats(label="ultralytics")
+    for split in SPLITS:
+        split_dir = output_dir / "images" / split
+        stats.merge(
+            sync_images(
+                split_images[split], split_dir, manifest, link_mode, workers, sources
+            )
+        )
+    stats.finish()
+    if prune:
+        manifest.prune()
+    manifest.save()
 
     data_yaml = {
         "path": ".",
@@ -40,9 +85,59 @@ def export_ultralytics(project_dir: str | Path, output_dir: str | Path) -> Path:
     return output_dir
 
 
-def _split_counts(total: int) -> tuple[int, int]:
-    if total <= 0:
-        return 0, 0
-    train = int(math.floor(total * 0.8))
-    val = int(math.floor(total * 0.1))
-    return train, val
+def _remove_moved_images(
+    output_dir: Path, manifest: ExportManifest, placement: dict[str, str]
+) -> None:
+    for split in SPLITS:
+        split_dir = output_dir / "images" / split
+        if not split_dir.is_dir():
+            continue
+        for path in split_dir.iterdir():
+            owner = placement.get(path.stem)
+            if owner is None or owner == split:
+                continue
+            path.unlink()
+            manifest.release(path)
+
+
+def _adopt_legacy_images(
+    output_dir: Path,
+    manifest: ExportManifest,
+    split_images: dict[str, list[Path]],
+    sources: Optional[dict[Path, Path]],
+    prune: bool,
+) -> None:
+    legacy: dict[str, list[Path]] = {}
+    for split in SPLITS:
+        split_dir = output_dir / "images" / split
+        if not split_dir.is_dir():
+            continue
+        for path in split_dir.iterdir():
+            if "__" not in path.name and parse_frame_filename(path.name) is not None:
+                legacy.setdefault(path.name, []).append(path)
+    if not legacy:
+        return
+
+    for split, images in split_images.items():
+        for image_path in images:
+            candidates = legacy.get(image_path.name)
+            if not candidates:
+                continue
+            source = image_path if sources is None else sources[image_path]
+            name = Path(flat_export_name(image_path)).with_suffix(source.suffix).name
+            target = output_dir / "images" / split / name
+            if os.path.lexists(target):
+                continue
+            for path in candidates:
+                if filecmp.cmp(path, source, shallow=False):
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(path, target)
+                    manifest.release(path)
+                    candidates.remove(path)
+                    break
+
+    if prune:
+        for paths in legacy.values():
+            for path in paths:
+                path.unlink(missing_ok=True)
+                manifest.release(path)
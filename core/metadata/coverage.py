@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import math
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from statistics import median
+from typing import Iterable, Iterator
+
+from core.metadata.query import FrameQuery, load_frame_index
+
+DEFAULT_MIN_GAP_MS = 1000
+DEFAULT_GAP_FACTOR = 2.5
+DEFAULT_FRAME_SPAN_MS = 200
+
+
+class IntervalIndex:
+    def __init__(self, intervals: Iterable[tuple[int, int]] = ()) -> None:
+        self._starts: list[int] = []
+        self._ends: list[int] = []
+        for start, end in sorted(intervals):
+            self.add(start, end)
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def __iter__(self) -> Iterator[tuple[int, int]]:
+        return iter(zip(self._starts, self._ends))
+
+    def add(self, start: int, end: int) -> None:
+        start, end = min(start, end), max(start, end)
+        lo = bisect_left(self._ends, start)
+        hi = bisect_right(self._starts, end)
+        if lo < hi:
+            start = min(start, self._starts[lo])
+            end = max(end, self._ends[hi - 1])
+        self._starts[lo:hi] = [start]
+        self._ends[lo:hi] = [end]
+
+    def covers(self, position: int) -> bool:
+        idx = bisect_right(self._starts, position) - 1
+        return idx >= 0 and position <= self._ends[idx]
+
+    def overlaps(self, start: int, end: int) -> list[tuple[int, int]]:
+        start, end = min(start, end), max(start, end)
+        lo = bisect_left(self._ends, start)
+        hi = bisect_right(self._starts, end)
+        return [
+            (max(self._starts[idx], start), min(self._ends[idx], end))
+            for idx in range(lo, hi)
+        ]
+
+    def covered_length(self, start: int, end: int) -> int:
+        return sum(right - left for left, right in self.overlaps(start, end))
+
+    def gaps(self, start: int, end: int) -> list[tuple[int, int]]:
+        start, end = min(start, end), max(start, end)
+        gaps: list[tuple[int, int]] = []
+        cursor = start
+        for left, right in self.overlaps(start, end):
+            if left > cursor:
+                gaps.append((cursor, left))
+            cursor = max(cursor, right)
+        if cursor < end:
+            gaps.append((cursor, end))
+        return gaps
+
+    def is_fully_covered(self, start: int, end: int) -> bool:
+        idx = bisect_right(self._starts, min(start, end)) - 1
+        return idx >= 0 and self._ends[idx] >= max(start, end)
+
+
+def cluster_timestamps(
+    timestamps: Iterable[int],
+    min_gap_ms: int = DEFAULT_MIN_GAP_MS,
+    gap_factor: float = DEFAULT_GAP_FACTOR,
+) -> list[tuple[int, int]]:
+    values = sorted(set(timestamps))
+    if not values:
+        return []
+    deltas = [right - left for left, right in zip(values, values[1:])]
+    max_gap = min_gap_ms
+    fallback_step = float(DEFAULT_FRAME_SPAN_MS)
+    if deltas:
+        max_gap = max(min_gap_ms, int(median(deltas) * gap_factor))
+        fallback_step = float(median(deltas))
+    clusters: list[list[int]] = [[values[0]]]
+    for value in values[1:]:
+        if value - clusters[-1][-1] > max_gap:
+            clusters.append([value])
+        else:
+            clusters[-1].append(value)
+    intervals: list[tuple[int, int]] = []
+    for cluster in clusters:
+        start, last = cluster[0], cluster[-1]
+        if len(cluster) > 1:
+            step = (last - start) / (len(cluster) - 1)
+        else:
+            step = min(fallback_step, max_gap)
+        intervals.append((start, math.ceil(last + step)))
+    return intervals
+
+
+def load_range_coverage(project_dir: str | Path, video_id: str) -> IntervalIndex:
+    frames_csv = Path(project_dir) / "metadata" / "frames.csv"
+    records = load_frame_index(frames_csv).select(
+        FrameQuery.create(video_ids=[video_id], kinds=["range"])
+    )
+    return IntervalIndex(cluster_timestamps(record.timestamp_ms for record in records))
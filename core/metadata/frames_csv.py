@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import csv
+import os
+import re
+import shutil
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Optional
+
+from utils.metrics import timed
+
+FRAMES_CSV_HEADER = [
+    "video_id",
+    "src_video_path",
+    "timestamp_ms",
+    "frame_index",
+    "kind",
+    "image_relpath",
+    "created_at",
+    "width",
+    "height",
+]
+
+KIND_DIRS = {"keyframe": "keyframes", "range": "ranges"}
+BACKUP_SUFFIX = ".bak"
+
+_FRAME_FILENAME_PATTERN = re.compile(
+    r"^t(?P<timestamp_ms>\d+)_f(?P<frame_index>\d+)\.(?P<ext>[A-Za-z0-9]+)$"
+)
+
+
+@dataclass(frozen=True)
+class FrameRecord:
+    video_id: str
+    src_video_path: str
+    timestamp_ms: int
+    frame_index: int
+    kind: str
+    image_relpath: str
+    created_at: str
+    width: int = 0
+    height: int = 0
+
+    @classmethod
+    def create(
+        cls,
+        video_id: str,
+        src_video_path: str,
+        timestamp_ms: int,
+        frame_index: int,
+        kind: str,
+        image_relpath: str,
+        width: int = 0,
+        height: int = 0,
+    ) -> "FrameRecord":
+        return cls(
+            video_id=video_id,
+            src_video_path=src_video_path,
+            timestamp_ms=int(timestamp_ms),
+            frame_index=int(frame_index),
+            kind=kind,
+            image_relpath=image_relpath,
+            created_at=datetime.now(timezone.utc).isoformat(),
+            width=int(width),
+            height=int(height),
+        )
+
+    @classmethod
+    def from_row(cls, row: dict[str, str]) -> "FrameRecord":
+        return cls(
+            video_id=row["video_id"],
+            src_video_path=row.get("src_video_path") or "",
+            timestamp_ms=int(row["timestamp_ms"]),
+            frame_index=int(row["frame_index"]),
+            kind=row["kind"],
+            image_relpath=row["image_relpath"],
+            created_at=row.get("created_at") or "",
+            width=int(row.get("width") or 0),
+            height=int(row.get("height") or 0),
+        )
+
+    def to_row(self) -> list[str]:
+        return [
+            self.video_id,
+            self.src_video_path,
+            str(self.timestamp_ms),
+            str(self.frame_index),
+            self.kind,
+            self.image_relpath,
+            self.created_at,
+            str(self.width),
+            str(self.height),
+        ]
+
+
+def build_frame_filename(timestamp_ms: int, frame_index: int, ext: str = "jpg") -> str:
+    return f"t{max(timestamp_ms, 0):09d}_f{max(frame_index, 0):07d}.{ext}"
+
+
+def parse_frame_filename(filename: str) -> Optional[tuple[int, int, str]]:
+    match = _FRAME_FILENAME_PATTERN.match(filename)
+    if match is None:
+        return None
+    return (
+        int(match.group("timestamp_ms")),
+        int(match.group("frame_index")),
+        match.group("ext"),
+    )
+
+
+def build_image_relpath(video_folder: str, kind_dir: str, filename: str) -> str:
+    return f"frames/{video_folder}/{kind_dir}/{filename}"
+
+
+def ensure_frames_csv(frames_csv: str | Path) -> Path:
+    path = Path(frames_csv)
+    if path.exists():
+        if not _header_is_current(path):
+            _upgrade_frames_csv(path)
+        return path
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(FRAMES_CSV_HEADER)
+    return path
+
+
+@timed("metadata.csv_append")
+def append_frame_records(
+    frames_csv: str | Path,
+    records: Iterable[FrameRecord],
+    sync: bool = False,
+) -> int:
+    rows = [record.to_row() for record in records]
+    if not rows:
+        return 0
+    path = ensure_frames_csv(frames_csv)
+    with path.open("a", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerows(rows)
+        if sync:
+            handle.flush()
+            os.fsync(handle.fileno())
+    return len(rows)
+
+
+def repair_torn_tail(frames_csv: str | Path) -> bool:
+    path = Path(frames_csv)
+    if not path.exists():
+        return False
+    with path.open("rb+") as handle:
+        handle.seek(0, os.SEEK_END)
+        size = handle.tell()
+        if size == 0:
+            return False
+        handle.seek(size - 1)
+        if handle.read(1) == b"\n":
+            return False
+        block = 4096
+        position = size
+        while position > 0:
+            start = max(position - block, 0)
+            handle.seek(start)
+            chunk = handle.read(position - start)
+            cut = chunk.rfind(b"\n")
+            if cut >= 0:
+                handle.truncate(start + cut + 1)
+                break
+            position = start
+        else:
+            handle.truncate(0)
+        handle.flush()
+        os.fsync(handle.fileno())
+    if path.stat().st_size == 0:
+        path.unlink()
+        ensure_frames_csv(path)
+    return True
+
+
+def write_frames_csv(frames_csv: str | Path, records: Iterable[FrameRecord]) -> Path:
+    path = Path(frames_csv)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(path.name + ".tmp")
+    with temp_path.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(FRAMES_CSV_HEADER)
+        writer.writerows(record.to_row() for record in records)
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temp_path, path)
+    return path
+
+
+def _header_is_current(path: Path) -> bool:
+    with path.open("r", newline="", encoding="utf-8") as handle:
+        header = next(csv.reader(handle), [])
+    return header[: len(FRAMES_CSV_HEADER)] == FRAMES_CSV_HEADER
+
+
+def _upgrade_frames_csv(path: Path) -> None:
+    shutil.copy2(path, path.with_name(path.name + BACKUP_SUFFIX))
+    with path.open("r", newline="", encoding="utf-8") as handle:
+        reader = csv.reader(handle)
+        header = next(reader, [])
+        rows = [row for row in reader if row]
+    columns = FRAMES_CSV_HEADER + [name for name in header if name not in FRAMES_CSV_HEADER]
+
+    temp_path = path.with_name(path.name + ".tmp")
+    with temp_path.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(columns)
+        for row in rows:
+            values = dict(zip(header, row))
+            writer.writerow([values.get(name, "") for name in columns])
+        handle.flush()
+        os.fsync(handle.fileno())
+    os.replace(temp_path, path)
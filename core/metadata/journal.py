@@ -0,0 +1,330 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import uuid
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Iterable, Optional
+
+from core.metadata.frames_csv import (
+    FRAMES_CSV_HEADER,
+    FrameRecord,
+    append_frame_records,
+    repair_torn_tail,
+)
+from core.metadata.reader import read_frames_csv
+from utils.file_lock import locked_file, same_file, try_lock, unlock
+from utils.metrics import timed
+
+JOURNAL_DIR_NAME = "journals"
+JOURNAL_SUFFIX = ".journal"
+LEGACY_JOURNAL_NAME = "frames.journal"
+FRAMES_LOCK_NAME = "frames.csv.lock"
+STAGING_SUFFIX = ".staging"
+
+
+def staging_path_for(final_path: str | Path) -> Path:
+    final_path = Path(final_path)
+    return final_path.with_name(final_path.name + STAGING_SUFFIX)
+
+
+def journal_dir(project_dir: str | Path) -> Path:
+    return Path(project_dir) / "metadata" / JOURNAL_DIR_NAME
+
+
+def frames_lock_path(project_dir: str | Path) -> Path:
+    return Path(project_dir) / "metadata" / FRAMES_LOCK_NAME
+
+
+@dataclass(frozen=True)
+class RecoveryReport:
+    replayed: int
+    rolled_back: int
+    repaired_csv_tail: bool
+    live_journals: int = 0
+
+
+@dataclass
+class _Txn:
+    txn_id: str
+    records: list[FrameRecord]
+    staged: list[tuple[str, str]]
+
+
+class FrameJournal:
+    def __init__(
+        self,
+        project_dir: str | Path,
+        group_size: int = 256,
+        group_interval_s: float = 1.0,
+    ) -> None:
+        self._root = Path(project_dir)
+        self._frames_csv = self._root / "metadata" / "frames.csv"
+        self._journal_path: Optional[Path] = None
+        self._handle: Optional[IO[bytes]] = None
+        self._group_size = max(group_size, 1)
+        self._group_interval_s = max(group_interval_s, 0.0)
+        self._lock = threading.RLock()
+        self._pending: list[_Txn] = []
+        self._open: dict[str, _Txn] = {}
+        self._pending_frames = 0
+        self._first_pending_at = 0.0
+
+    @property
+    def frames_csv(self) -> Path:
+        return self._frames_csv
+
+    def __enter__(self) -> "FrameJournal":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def begin(self, staged: Iterable[tuple[str | Path, str | Path]]) -> str:
+        txn = _Txn(
+            txn_id=uuid.uuid4().hex,
+            records=[],
+            staged=[(self._relpath(src), self._relpath(dst)) for src, dst in staged],
+        )
+        with self._lock:
+            self._append_lines([_encode("begin", txn)], sync=True)
+            self._open[txn.txn_id] = txn
+        return txn.txn_id
+
+    def abort(self, txn_id: str) -> None:
+        with self._lock:
+            txn = self._open.pop(txn_id, None)
+        if txn is None:
+            return
+        for staged_rel, _ in txn.staged:
+            (self._root / staged_rel).unlink(missing_ok=True)
+
+    def submit(
+        self,
+        records: Iterable[FrameRecord],
+        staged: Iterable[tuple[str | Path, str | Path]],
+        txn_id: Optional[str] = None,
+    ) -> None:
+        txn = _Txn(
+            txn_id=txn_id or uuid.uuid4().hex,
+            records=list(records),
+            staged=[(self._relpath(src), self._relpath(dst)) for src, dst in staged],
+        )
+        with self._lock:
+            if txn_id is None or self._open.pop(txn_id, None) is None:
+                self._append_lines([_encode("begin", txn)], sync=True)
+            if not self._pending:
+                self._first_pending_at = time.monotonic()
+            self._pending.append(txn)
+            self._pending_frames += max(len(txn.records), 1)
+            elapsed = time.monotonic() - self._first_pending_at
+            if (
+                self._pending_frames >= self._group_size
+                or elapsed >= self._group_interval_s
+            ):
+                self.flush()
+
+    @timed("metadata.journal_flush")
+    def flush(self) -> list[FrameRecord]:
+        with self._lock:
+            if not self._pending:
+                return []
+            pending = self._pending
+            self._pending = []
+            self._pending_frames = 0
+            for txn in pending:
+                for staged_rel, _ in txn.staged:
+                    _fsync_file(self._root / staged_rel)
+            self._append_lines([_encode("commit", txn) for txn in pending], sync=True)
+            with locked_file(frames_lock_path(self._root)):
+                applied = _apply(self._root, pending, known_relpaths=None)
+            self._truncate()
+            return applied
+
+    def close(self) -> None:
+        with self._lock:
+            self.flush()
+            if self._handle is None:
+                return
+            path = self._journal_path
+            unlock(self._handle)
+            self._handle.close()
+            self._handle = None
+            self._journal_path = None
+            if path is not None and not self._open:
+                path.unlink(missing_ok=True)
+
+    def recover(self) -> RecoveryReport:
+        return recover_journal(self._root)
+
+    def _relpath(self, path: str | Path) -> str:
+        path = Path(path)
+        if path.is_absolute():
+            try:
+                path = path.relative_to(self._root)
+            except ValueError:
+                path = Path(os.path.relpath(path, self._root))
+        return path.as_posix()
+
+    def _ensure_handle(self) -> IO[bytes]:
+        if self._handle is not None:
+            return self._handle
+        directory = journal_dir(self._root)
+        directory.mkdir(parents=True, exist_ok=True)
+        while True:
+            path = directory / f"{os.getpid()}-{uuid.uuid4().hex[:12]}{JOURNAL_SUFFIX}"
+            handle = path.open("ab")
+            if try_lock(handle) and same_file(handle, path):
+                self._handle = handle
+                self._journal_path = path
+                return handle
+            handle.close()
+
+    def _append_lines(self, lines: list[str], sync: bool) -> None:
+        handle = self._ensure_handle()
+        handle.write("".join(lines).encode("utf-8"))
+        handle.flush()
+        if sync:
+            os.fsync(handle.fileno())
+
+    def _truncate(self) -> None:
+        if self._handle is None:
+            return
+        self._handle.truncate(0)
+        self._handle.write(
+            "".join(_encode("begin", txn) for txn in self._open.values()).encode("utf-8")
+        )
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+
+
+def recover_journal(project_dir: str | Path) -> RecoveryReport:
+    root = Path(project_dir)
+    frames_csv = root / "metadata" / "frames.csv"
+    paths = sorted(journal_dir(root).glob(f"*{JOURNAL_SUFFIX}"))
+    legacy = root / "metadata" / LEGACY_JOURNAL_NAME
+    if legacy.exists():
+        paths.append(legacy)
+
+    replayed = rolled_back = live = 0
+    with locked_file(frames_lock_path(root)):
+        repaired = repair_torn_tail(frames_csv)
+        known: Optional[set[str]] = None
+        for path in paths:
+            try:
+                handle = path.open("r+b")
+            except OSError:
+                continue
+            recovered = False
+            with handle:
+                if not try_lock(handle):
+                    live += 1
+                    continue
+                try:
+                    if not same_file(handle, path):
+                        continue
+                    begins: dict[str, _Txn] = {}
+                    commits: dict[str, _Txn] = {}
+                    for state, txn in _read_entries(handle):
+                        if state == "begin":
+                            begins[txn.txn_id] = txn
+                        elif state == "commit":
+                            commits[txn.txn_id] = txn
+                    if commits:
+                        if known is None:
+                            known = {row.image_relpath for row in read_frames_csv(frames_csv)}
+                        replayed += len(_apply(root, list(commits.values()), known))
+                    for txn_id, txn in begins.items():
+                        if txn_id in commits:
+                            continue
+                        for staged_rel, _ in txn.staged:
+                            staged_path = root / staged_rel
+                            if staged_path.exists():
+                                staged_path.unlink(missing_ok=True)
+                                rolled_back += 1
+                    recovered = True
+                finally:
+                    unlock(handle)
+            if recovered:
+                path.unlink(missing_ok=True)
+
+    return RecoveryReport(
+        replayed=replayed,
+        rolled_back=rolled_back,
+        repaired_csv_tail=repaired,
+        live_journals=live,
+    )
+
+
+def _apply(
+    root: Path, txns: list[_Txn], known_relpaths: Optional[set[str]]
+) -> list[FrameRecord]:
+    for txn in txns:
+        for staged_rel, final_rel in txn.staged:
+            staged_path = root / staged_rel
+            if staged_path.exists():
+                os.replace(staged_path, root / final_rel)
+
+    records: list[FrameRecord] = []
+    for txn in txns:
+        for record in txn.records:
+            if known_relpaths is not None and record.image_relpath in known_relpaths:
+                continue
+            image_path = root / record.image_relpath
+            if not image_path.exists() or image_path.stat().st_size == 0:
+                continue
+            if known_relpaths is not None:
+                known_relpaths.add(record.image_relpath)
+            records.append(record)
+    append_frame_records(root / "metadata" / "frames.csv", records, sync=True)
+    return records
+
+
+def _encode(state: str, txn: _Txn) -> str:
+    payload: dict[str, object] = {
+        "state": state,
+        "txn": txn.txn_id,
+        "staged": txn.staged,
+    }
+    if state == "commit":
+        payload["records"] = [record.to_row() for record in txn.records]
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    crc = zlib.crc32(body.encode("utf-8"))
+    return f"{crc:08x} {body}\n"
+
+
+def _read_entries(handle: IO[bytes]) -> list[tuple[str, _Txn]]:
+    handle.seek(0)
+    text = handle.read().decode("utf-8", errors="replace")
+    entries: list[tuple[str, _Txn]] = []
+    for line in text.split("\n")[:-1]:
+        crc_text, _, body = line.partition(" ")
+        try:
+            if int(crc_text, 16) != zlib.crc32(body.encode("utf-8")):
+                break
+            payload = json.loads(body)
+            records = [
+                FrameRecord.from_row(dict(zip(FRAMES_CSV_HEADER, row)))
+                for row in payload.get("records", [])
+            ]
+            txn = _Txn(
+                txn_id=str(payload["txn"]),
+                records=records,
+                staged=[(str(s), str(d)) for s, d in payload.get("staged", [])],
+            )
+        except (ValueError, KeyError, IndexError, TypeError):
+            break
+        entries.append((str(payload.get("state")), txn))
+    return entries
+
+
+def _fsync_file(path: Path) -> None:
+    try:
+        with path.open("r+b") as handle:
+            os.fsync(handle.fileno())
+    except OSError:
+        return
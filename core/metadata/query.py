@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from core.metadata.frames_csv import FrameRecord
+from core.metadata.reader import iter_frames_csv
+from utils.metrics import timed
+
+
+@dataclass(frozen=True)
+class FrameQuery:
+    video_ids: frozenset[str] = frozenset()
+    kinds: frozenset[str] = frozenset()
+    time_windows: tuple[tuple[int, int], ...] = ()
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+    @classmethod
+    def create(
+        cls,
+        video_ids: Iterable[str] = (),
+        kinds: Iterable[str] = (),
+        time_windows: Iterable[tuple[int, int]] = (),
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+    ) -> "FrameQuery":
+        windows = sorted(
+            (min(start, end), max(start, end)) for start, end in time_windows
+        )
+        return cls(
+            video_ids=frozenset(video_ids),
+            kinds=frozenset(kinds),
+            time_windows=tuple(windows),
+            created_after=_as_utc(created_after),
+            created_before=_as_utc(created_before),
+        )
+
+    @property
+    def is_empty(self) -> bool:
+        return not (
+            self.video_ids
+            or self.kinds
+            or self.time_windows
+            or self.created_after
+            or self.created_before
+        )
+
+    def matches(self, record: FrameRecord) -> bool:
+        if self.video_ids and record.video_id not in self.video_ids:
+            return False
+        if self.kinds and record.kind not in self.kinds:
+            return False
+        if self.time_windows and not any(
+            start <= record.timestamp_ms <= end for start, end in self.time_windows
+        ):
+            return False
+        return self.matches_created(record)
+
+    def matches_created(self, record: FrameRecord) -> bool:
+        if self.created_after is None and self.created_before is None:
+            return True
+        created = _parse_created(record.created_at)
+        if created is None:
+            return False
+        if self.created_after is not None and created < self.created_after:
+            return False
+        if self.created_before is not None and created > self.created_before:
+            return False
+        return True
+
+
+class FrameIndex:
+    def __init__(self, records: Iterable[FrameRecord]) -> None:
+        self._records = list(records)
+        buckets: dict[tuple[str, str], list[tuple[int, int]]] = {}
+        for position, record in enumerate(self._records):
+            buckets.setdefault((record.video_id, record.kind), []).append(
+                (record.timestamp_ms, position)
+            )
+        self._timestamps: dict[tuple[str, str], list[int]] = {}
+        self._positions: dict[tuple[str, str], list[int]] = {}
+        for key, items in buckets.items():
+            items.sort()
+            self._timestamps[key] = [timestamp for timestamp, _ in items]
+            self._positions[key] = [position for _, position in items]
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    @property
+    def video_ids(self) -> set[str]:
+        return {video_id for video_id, _ in self._timestamps}
+
+    def select(self, query: Optional[FrameQuery] = None) -> list[FrameRecord]:
+        if query is None or query.is_empty:
+            return list(self._records)
+        positions: list[int] = []
+        for key in self._timestamps:
+            video_id, kind = key
+            if query.video_ids and video_id not in query.video_ids:
+                continue
+            if query.kinds and kind not in query.kinds:
+                continue
+            positions.extend(self._window_positions(key, query.time_windows))
+        positions.sort()
+        selected = (self._records[position] for position in positions)
+        return [record for record in selected if query.matches_created(record)]
+
+    def _window_positions(
+        self, key: tuple[str, str], windows: tuple[tuple[int, int], ...]
+    ) -> list[int]:
+        bucket = self._positions[key]
+        if not windows:
+            return list(bucket)
+        timestamps = self._timestamps[key]
+        positions: list[int] = []
+        last_hi = 0
+        for start, end in windows:
+            lo = max(bisect_left(timestamps, start), last_hi)
+            hi = bisect_right(timestamps, end)
+            if hi > lo:
+                positions.extend(bucket[lo:hi])
+                last_hi = hi
+        return positions
+
+
+_INDEX_CACHE: dict[str, tuple[tuple[int, int], FrameIndex]] = {}
+_INDEX_LOCK = threading.Lock()
+
+
+@timed("metadata.load_index")
+def load_frame_index(frames_csv: str | Path) -> FrameIndex:
+    path = Path(frames_csv)
+    try:
+        stat = path.stat()
+        signature = (stat.st_size, stat.st_mtime_ns)
+    except OSError:
+        return FrameIndex(())
+    cache_key = str(path.resolve())
+    with _INDEX_LOCK:
+        cached = _INDEX_CACHE.get(cache_key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+    index = FrameIndex(iter_frames_csv(path))
+    with _INDEX_LOCK:
+        _INDEX_CACHE[cache_key] = (signature, index)
+    return index
+
+
+def iter_selected_frames(
+    project_dir: str | Path, query: Optional[FrameQuery] = None
+) -> Iterator[FrameRecord]:
+    frames_csv = Path(project_dir) / "metadata" / "frames.csv"
+    if query is None or query.is_empty:
+        yield from iter_frames_csv(frames_csv)
+        return
+    yield from load_frame_index(frames_csv).select(query)
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None or value.tzinfo is not None:
+        return value
+    return value.replace(tzinfo=timezone.utc)
+
+
+def _parse_created(value: str) -> Optional[datetime]:
+    try:
+        return _as_utc(datetime.fromisoformat(value))
+    except ValueError:
+        return None
@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+import csv
+from pathlib import Path
+from typing import Iterator
+
+from core.metadata.frames_csv import FrameRecord
+from utils.metrics import timed
+
+
+def iter_frames_csv(frames_csv: str | Path) -> Iterator[FrameRecord]:
+    path = Path(frames_csv)
+    if not path.exists():
+        return
+    with path.open("r", newline="", encoding="utf-8") as handle:
+        reader = csv.DictReader(handle)
+        for row in reader:
+            try:
+                yield FrameRecord.from_row(row)
+            except (KeyError, TypeError, ValueError):
+                continue
+
+
+@timed("metadata.csv_read")
+def read_frames_csv(frames_csv: str | Path) -> list[FrameRecord]:
+    return list(iter_frames_csv(frames_csv))
@@ -0,0 +1,358 @@
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from core.metadata.frames_csv import (
+    KIND_DIRS,
+    FrameRecord,
+    parse_frame_filename,
+    write_frames_csv,
+)
+from core.metadata.journal import STAGING_SUFFIX, recover_journal
+from core.metadata.reader import read_frames_csv
+from core.project.sources import read_sources
+from utils.image_header import read_image_size
+
+IMAGE_EXTS = (".jpg", ".jpeg", ".png")
+INTEGRITY_CACHE_NAME = "integrity_cache.csv"
+_INTEGRITY_CACHE_HEADER = ["image_relpath", "size", "mtime_ns", "status"]
+
+_JPEG_MAGIC = b"\xff\xd8\xff"
+_PNG_MAGIC = b"\x89PNG\r\n\x1a\n"
+_TAIL_BYTES = 64
+
+
+@dataclass(frozen=True)
+class FileEntry:
+    image_relpath: str
+    size: int
+    mtime_ns: int
+
+
+@dataclass
+class IntegrityReport:
+    total_records: int = 0
+    total_files: int = 0
+    rechecked: int = 0
+    orphans: list[str] = field(default_factory=list)
+    missing: list[str] = field(default_factory=list)
+    duplicates: list[str] = field(default_factory=list)
+    empty: list[str] = field(default_factory=list)
+    corrupt: list[str] = field(default_factory=list)
+    staging: list[str] = field(default_factory=list)
+    unknown_sources: list[str] = field(default_factory=list)
+
+    @property
+    def is_clean(self) -> bool:
+        return not (
+            self.orphans
+            or self.missing
+            or self.duplicates
+            or self.empty
+            or self.corrupt
+            or self.staging
+            or self.unknown_sources
+        )
+
+    def to_dict(self) -> dict[str, object]:
+        payload = asdict(self)
+        payload["is_clean"] = self.is_clean
+        return payload
+
+
+def scan_project(
+    project_dir: str | Path,
+    workers: int = 8,
+    check_headers: bool = True,
+    incremental: bool = True,
+) -> IntegrityReport:
+    project_dir = Path(project_dir)
+    workers = max(workers, 1)
+    files, staging = _walk_frames(project_dir, workers)
+
+    cache_path = project_dir / "metadata" / INTEGRITY_CACHE_NAME
+    cache = _read_cache(cache_path) if incremental else {}
+    statuses: dict[str, str] = {}
+    to_check: list[FileEntry] = []
+    for entry in files:
+        cached = cache.get(entry.image_relpath)
+        if cached is not None and cached[0] == entry.size and cached[1] == entry.mtime_ns:
+            if cached[2] != "unchecked" or not check_headers:
+                statuses[entry.image_relpath] = cached[2]
+                continue
+        to_check.append(entry)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        checked = pool.map(
+            lambda item: _check_entry(project_dir, item, check_headers),
+            to_check,
+            chunksize=256,
+        )
+        for entry, status in zip(to_check, checked):
+            statuses[entry.image_relpath] = status
+
+    _write_cache(cache_path, files, statuses)
+
+    records = read_frames_csv(project_dir / "metadata" / "frames.csv")
+    counts = Counter(record.image_relpath for record in records)
+    record_paths = set(counts)
+    file_paths = {entry.image_relpath for entry in files}
+    source_ids = {
+        row.get("video_id", "") for row in read_sources(project_dir / "sources.csv")
+    }
+
+    return IntegrityReport(
+        total_records=len(records),
+        total_files=len(files),
+        rechecked=len(to_check),
+        orphans=sorted(file_paths - record_paths),
+        missing=sorted(record_paths - file_paths),
+        duplicates=sorted(path for path, count in counts.items() if count > 1),
+        empty=sorted(path for path, status in statuses.items() if status == "empty"),
+        corrupt=sorted(
+            path for path, status in statuses.items() if status == "corrupt"
+        ),
+        staging=sorted(staging),
+        unknown_sources=sorted(
+            {record.video_id for record in records} - source_ids
+        ),
+    )
+
+
+def repair_project(
+    project_dir: str | Path,
+    workers: int = 8,
+    check_headers: bool = True,
+    prune_missing: bool = True,
+    adopt_orphans: bool = True,
+    drop_duplicates: bool = True,
+    remove_empty: bool = False,
+) -> IntegrityReport:
+    project_dir = Path(project_dir)
+    recovery = recover_journal(project_dir)
+    report = scan_project(project_dir, workers=workers, check_headers=check_headers)
+
+    if recovery.live_journals == 0:
+        for staged_rel in report.staging:
+            (project_dir / staged_rel).unlink(missing_ok=True)
+    else:
+        adopt_orphans = False
+
+    dropped = set(report.missing) if prune_missing else set()
+    if remove_empty:
+        for image_rel in report.empty:
+            (project_dir / image_rel).unlink(missing_ok=True)
+            dropped.add(image_rel)
+
+    frames_csv = project_dir / "metadata" / "frames.csv"
+    records: list[FrameRecord] = []
+    seen: set[str] = set()
+    for record in read_frames_csv(frames_csv):
+        if record.image_relpath in dropped:
+            continue
+        if drop_duplicates and record.image_relpath in seen:
+            continue
+        seen.add(record.image_relpath)
+        records.append(record)
+
+    if adopt_orphans:
+        sources = {
+            row.get("video_id", ""): row.get("src_video_path", "")
+            for row in read_sources(project_dir / "sources.csv")
+        }
+        for image_rel in report.orphans:
+            if image_rel in dropped:
+                continue
+            record = rebuild_record(project_dir, image_rel, sources)
+            if record is not None:
+                records.append(record)
+
+    write_frames_csv(frames_csv, records)
+    return scan_project(project_dir, workers=workers, check_headers=check_headers)
+
+
+def rebuild_record(
+    project_dir: str | Path,
+    image_relpath: str,
+    sources: Optional[dict[str, str]] = None,
+) -> Optional[FrameRecord]:
+    parts = image_relpath.split("/")
+    if len(parts) != 4 or parts[0] != "frames":
+        return None
+    _, video_folder, kind_dir, filename = parts
+    kinds = {value: key for key, value in KIND_DIRS.items()}
+    kind = kinds.get(kind_dir)
+    parsed = parse_frame_filename(filename)
+    if kind is None or parsed is None:
+        return None
+    timestamp_ms, frame_index, _ = parsed
+    image_path = Path(project_dir) / image_relpath
+    try:
+        mtime = image_path.stat().st_mtime
+    except OSError:
+        return None
+    width, height = read_image_size(image_path) or (0, 0)
+    return FrameRecord(
+        video_id=video_folder,
+        src_video_path=(sources or {}).get(video_folder, ""),
+        timestamp_ms=timestamp_ms,
+        frame_index=frame_index,
+        kind=kind,
+        image_relpath=image_relpath,
+        created_at=datetime.fromtimestamp(mtime, timezone.utc).isoformat(),
+        width=width,
+        height=height,
+    )
+
+
+def check_image_header(image_path: str | Path) -> bool:
+    try:
+        with Path(image_path).open("rb") as handle:
+            head = handle.read(len(_PNG_MAGIC))
+            handle.seek(0, os.SEEK_END)
+            size = handle.tell()
+            handle.seek(max(size - _TAIL_BYTES, 0))
+            tail = handle.read(_TAIL_BYTES)
+    except OSError:
+        return False
+    if head.startswith(_JPEG_MAGIC):
+        return b"\xff\xd9" in tail
+    if head.startswith(_PNG_MAGIC):
+        return b"IEND" in tail
+    return False
+
+
+def _check_entry(project_dir: Path, entry: FileEntry, check_headers: bool) -> str:
+    if entry.size == 0:
+        return "empty"
+    if not check_headers:
+        return "unchecked"
+    if check_image_header(project_dir / entry.image_relpath):
+        return "ok"
+    return "corrupt"
+
+
+def _walk_frames(project_dir: Path, workers: int) -> tuple[list[FileEntry], list[str]]:
+    frames_dir = project_dir / "frames"
+    if not frames_dir.exists():
+        return [], []
+    roots = [Path(entry.path) for entry in os.scandir(frames_dir) if entry.is_dir()]
+    files: list[FileEntry] = []
+    staging: list[str] = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for dir_files, dir_staging in pool.map(
+            lambda root: _walk_dir(project_dir, root), roots
+        ):
+            files.extend(dir_files)
+            staging.extend(dir_staging)
+    for entry in os.scandir(frames_dir):
+        if entry.is_file() and entry.name.lower().endswith(IMAGE_EXTS):
+            stat = entry.stat()
+            files.append(
+                FileEntry(f"frames/{entry.name}", stat.st_size, stat.st_mtime_ns)
+            )
+    return files, staging
+
+
+def _walk_dir(project_dir: Path, root: Path) -> tuple[list[FileEntry], list[str]]:
+    files: list[FileEntry] = []
+    staging: list[str] = []
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            entries = list(os.scandir(current))
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(Path(entry.path))
+                continue
+            name = entry.name.lower()
+            relpath = Path(entry.path).relative_to(project_dir).as_posix()
+            if name.endswith(STAGING_SUFFIX):
+                staging.append(relpath)
+            elif name.endswith(IMAGE_EXTS):
+                stat = entry.stat()
+                files.append(FileEntry(relpath, stat.st_size, stat.st_mtime_ns))
+    return files, staging
+
+
+def _read_cache(cache_path: Path) -> dict[str, tuple[int, int, str]]:
+    if not cache_path.exists():
+        return {}
+    cache: dict[str, tuple[int, int, str]] = {}
+    with cache_path.open("r", newline="", encoding="utf-8") as handle:
+        for row in csv.DictReader(handle):
+            try:
+                cache[row["image_relpath"]] = (
+                    int(row["size"]),
+                    int(row["mtime_ns"]),
+                    row["status"],
+                )
+            except (KeyError, TypeError, ValueError):
+                continue
+    return cache
+
+
+def _write_cache(
+    cache_path: Path, files: list[FileEntry], statuses: dict[str, str]
+) -> None:
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = cache_path.with_name(cache_path.name + ".tmp")
+    with temp_path.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(_INTEGRITY_CACHE_HEADER)
+        for entry in files:
+            writer.writerow(
+                [
+                    entry.image_relpath,
+                    entry.size,
+                    entry.mtime_ns,
+                    statuses.get(entry.image_relpath, "unchecked"),
+                ]
+            )
+    os.replace(temp_path, cache_path)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="BubForge 项目完整性检查")
+    parser.add_argument("project_dir", help="项目根目录")
+    parser.add_argument("--workers", type=int, default=8, help="并发线程数")
+    parser.add_argument("--no-headers", action="store_true", help="跳过图片头校验")
+    parser.add_argument("--full", action="store_true", help="忽略增量缓存，全部重查")
+    parser.add_argument("--repair", action="store_true", help="根据文件名修复元数据")
+    parser.add_argument("--remove-empty", action="store_true", help="修复时删除 0 字节图片")
+    args = parser.parse_args(argv)
+
+    if args.repair:
+        report = repair_project(
+            args.project_dir,
+            workers=args.workers,
+            check_headers=not args.no_headers,
+            remove_empty=args.remove_empty,
+        )
+    else:
+        report = scan_project(
+            args.project_dir,
+            workers=args.workers,
+            check_headers=not args.no_headers,
+            incremental=not args.full,
+        )
+    json.dump(report.to_dict(), sys.stdout, ensure_ascii=False, indent=2)
+    sys.stdout.write("\n")
+    return 0 if report.is_clean else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
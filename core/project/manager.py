@@ -7,7 +7,14 @@ from pathlib import Path
 import yaml
 
 from core.metadata.frames_csv import ensure_frames_csv
-from utils.hash_gen import short_hash_for_path
+from core.metadata.journal import recover_journal
+from core.project.sources import (
+    find_source_by_fingerprint,
+    normalize_source_path,
+    upsert_source,
+    write_sources,
+)
+from utils.hash_gen import content_fingerprint, short_hash_for_path
 
 
 @dataclass(frozen=True)
@@ -22,47 +29,48 @@ class ProjectPaths:
     app_log: Path
 
 
-def init_project(project_dir: str | Path) -> ProjectPaths:
+def project_paths(project_dir: str | Path) -> ProjectPaths:
     root = Path(project_dir)
-    project_yaml = root / "project.yaml"
-    sources_csv = root / "sources.csv"
-    frames_dir = root / "frames"
     metadata_dir = root / "metadata"
-    frames_csv = metadata_dir / "frames.csv"
     logs_dir = root / "logs"
-    app_log = logs_dir / "app.log"
+    return ProjectPaths(
+        root=root,
+        project_yaml=root / "project.yaml",
+        sources_csv=root / "sources.csv",
+        frames_dir=root / "frames",
+        metadata_dir=metadata_dir,
+        frames_csv=metadata_dir / "frames.csv",
+        logs_dir=logs_dir,
+        app_log=logs_dir / "app.log",
+    )
+
+
+def init_project(project_dir: str | Path) -> ProjectPaths:
+    paths = project_paths(project_dir)
 
-    frames_dir.mkdir(parents=True, exist_ok=True)
-    metadata_dir.mkdir(parents=True, exist_ok=True)
-    logs_dir.mkdir(parents=True, exist_ok=True)
+    paths.frames_dir.mkdir(parents=True, exist_ok=True)
+    paths.metadata_dir.mkdir(parents=True, exist_ok=True)
+    paths.logs_dir.mkdir(parents=True, exist_ok=True)
 
-    if not project_yaml.exists():
+    if not paths.project_yaml.exists():
         payload = {
-            "name": root.name,
+            "name": paths.root.name,
             "created_at": datetime.now(timezone.utc).isoformat(),
             "version": "0.1",
         }
-        project_yaml.write_text(
+        paths.project_yaml.write_text(
             yaml.safe_dump(payload, sort_keys=False), encoding="utf-8"
         )
 
-    if not sources_csv.exists():
-        sources_csv.write_text("video_id,src_video_path\n", encoding="utf-8")
+    if not paths.sources_csv.exists():
+        write_sources(paths.sources_csv, [])
 
-    ensure_frames_csv(frames_csv)
-    if not app_log.exists():
-        app_log.write_text("", encoding="utf-8")
+    ensure_frames_csv(paths.frames_csv)
+    recover_journal(paths.root)
+    if not paths.app_log.exists():
+        paths.app_log.write_text("", encoding="utf-8")
 
-    return ProjectPaths(
-        root=root,
-        project_yaml=project_yaml,
-        sources_csv=sources_csv,
-        frames_dir=frames_dir,
-        metadata_dir=metadata_dir,
-        frames_csv=frames_csv,
-        logs_dir=logs_dir,
-        app_log=app_log,
-    )
+    return paths
 
 
 def get_video_folder_name(video_path: str | Path, hash_len: int = 8) -> str:
@@ -72,6 +80,24 @@ def get_video_folder_name(video_path: str | Path, hash_len: int = 8) -> str:
     return f"{stem}__{short_hash}"
 
 
+def resolve_video_folder(
+    project_dir: str | Path, video_path: str | Path, hash_len: int = 8
+) -> str:
+    project_dir = Path(project_dir)
+    path = Path(video_path)
+    fingerprint = content_fingerprint(path)
+    video_folder = find_source_by_fingerprint(project_dir, fingerprint)
+    if video_folder is None:
+        video_folder = f"{path.stem}__{fingerprint[:hash_len]}"
+    upsert_source(
+        project_dir / "sources.csv",
+        video_folder,
+        normalize_source_path(project_dir, path),
+        fingerprint,
+    )
+    return video_folder
+
+
 def ensure_video_subdirs(
     project_dir: str | Path, video_folder: str
 ) -> tuple[Path, Path]:
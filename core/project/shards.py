@@ -0,0 +1,345 @@
+from __future__ import annotations
+
+import csv
+import filecmp
+import json
+import math
+import os
+import shutil
+from dataclasses import asdict, dataclass, replace
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from core.metadata.coverage import load_range_coverage
+from core.metadata.journal import FrameJournal, staging_path_for
+from core.metadata.reader import read_frames_csv
+from core.project.manager import ensure_video_subdirs, init_project
+from core.project.sources import read_sources, upsert_source
+from core.video.batch import (
+    BatchEvent,
+    BatchPlan,
+    BatchReport,
+    PlannedRange,
+    VideoJob,
+    autotune_plan,
+    execute_batch,
+    plan_batch,
+)
+from core.video.probe import VideoProbe
+from core.video.spec import RangeSpec
+from utils.hash_gen import content_fingerprint
+
+SHARD_MANIFEST_VERSION = 1
+SHARD_COPY_NAME = "shard.json"
+SHARD_DONE_NAME = "shard_done.json"
+SHARD_MERGED_NAME = "shard_merged.json"
+MERGE_CONFLICTS_NAME = "merge_conflicts.csv"
+MERGE_CONFLICTS_HEADER = ["shard", "video_id", "image_relpath", "reason"]
+
+
+@dataclass(frozen=True)
+class MergeConflict:
+    shard: str
+    video_id: str
+    image_relpath: str
+    reason: str
+
+
+@dataclass(frozen=True)
+class MergeReport:
+    shards: int
+    merged: int
+    duplicates: int
+    conflicts: list[MergeConflict]
+    incomplete: list[str]
+    already_merged: list[str]
+
+
+def write_shard_manifests(
+    project_dir: str | Path,
+    specs: Iterable[RangeSpec],
+    shard_count: int,
+    output_dir: str | Path,
+    merge_gap_ms: int = 0,
+) -> tuple[list[Path], BatchPlan]:
+    project_dir = Path(project_dir).resolve()
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    plan = plan_batch(project_dir, specs, merge_gap_ms=merge_gap_ms)
+    pending = [_pending_job(project_dir, job) for job in plan.jobs]
+    plan = BatchPlan(
+        jobs=sorted(
+            (job for job in pending if job is not None),
+            key=lambda job: job.work_ms,
+            reverse=True,
+        ),
+        errors=plan.errors,
+        failed_specs=plan.failed_specs,
+    )
+    sources = {
+        row.get("video_id"): row for row in read_sources(project_dir / "sources.csv")
+    }
+
+    bins: list[list[VideoJob]] = [[] for _ in range(max(shard_count, 1))]
+    loads = [0] * len(bins)
+    for job in plan.jobs:
+        target = loads.index(min(loads))
+        bins[target].append(job)
+        loads[target] += job.work_ms
+
+    paths: list[Path] = []
+    for shard_id, jobs in enumerate(bins):
+        if not jobs:
+            continue
+        payload = {
+            "version": SHARD_MANIFEST_VERSION,
+            "shard": f"shard-{shard_id:04d}",
+            "project": str(project_dir),
+            "jobs": [_encode_job(job, sources.get(job.video_folder)) for job in jobs],
+        }
+        path = output_dir / f"{payload['shard']}.json"
+        temp_path = path.with_name(path.name + ".tmp")
+        temp_path.write_text(
+            json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        os.replace(temp_path, path)
+        paths.append(path)
+    return paths, plan
+
+
+def _pending_job(project_dir: Path, job: VideoJob) -> Optional[VideoJob]:
+    coverage = load_range_coverage(project_dir, job.video_folder)
+    if not len(coverage):
+        return job
+    ranges: list[PlannedRange] = []
+    for item in job.ranges:
+        step_ms = 1000.0 / item.fps
+        for start_ms, end_ms in coverage.gaps(item.start_ms, item.end_ms):
+            if start_ms > item.start_ms:
+                steps = math.ceil((start_ms - item.start_ms) / step_ms - 1e-9)
+                start_ms = item.start_ms + int(round(steps * step_ms))
+            if start_ms < end_ms:
+                ranges.append(PlannedRange(start_ms, end_ms, item.fps))
+    if not ranges:
+        return None
+    return replace(job, ranges=tuple(ranges))
+
+
+def load_shard_manifest(manifest_path: str | Path) -> tuple[str, BatchPlan]:
+    path = Path(manifest_path)
+    payload = json.loads(path.read_text(encoding="utf-8"))
+    if payload.get("version") != SHARD_MANIFEST_VERSION:
+        raise ValueError(f"不支持的分片清单版本: {path}")
+    jobs = [_decode_job(entry) for entry in payload.get("jobs", [])]
+    return str(payload["shard"]), BatchPlan(jobs=jobs, errors=[], failed_specs=0)
+
+
+def run_shard(
+    manifest_path: str | Path,
+    staging_dir: str | Path,
+    cpu_budget: Optional[int] = None,
+    hwaccel: bool = False,
+    on_event: Optional[Callable[[BatchEvent], None]] = None,
+    autotune: bool = False,
+) -> BatchReport:
+    manifest_path = Path(manifest_path)
+    staging_dir = Path(staging_dir).resolve()
+    shard, plan = load_shard_manifest(manifest_path)
+    paths = init_project(staging_dir)
+    (paths.root / SHARD_DONE_NAME).unlink(missing_ok=True)
+    (paths.root / SHARD_MERGED_NAME).unlink(missing_ok=True)
+    shutil.copyfile(manifest_path, paths.root / SHARD_COPY_NAME)
+
+    payload = json.loads(manifest_path.read_text(encoding="utf-8"))
+    for entry in payload.get("jobs", []):
+        upsert_source(
+            paths.sources_csv,
+            entry["video_id"],
+            entry["video_path"],
+            entry.get("fingerprint") or "",
+        )
+        ensure_video_subdirs(paths.root, entry["video_id"])
+
+    if autotune:
+        autotune_plan(plan, cpu_budget, hwaccel=hwaccel)
+    report = execute_batch(
+        paths.root,
+        plan,
+        cpu_budget=cpu_budget,
+        hwaccel=hwaccel,
+        on_event=on_event,
+    )
+    done = {"shard": shard, **asdict(report)}
+    done_path = paths.root / SHARD_DONE_NAME
+    temp_path = done_path.with_name(done_path.name + ".tmp")
+    temp_path.write_text(json.dumps(done, ensure_ascii=False), encoding="utf-8")
+    os.replace(temp_path, done_path)
+    return report
+
+
+def merge_shards(
+    project_dir: str | Path, staging_dirs: Iterable[str | Path]
+) -> MergeReport:
+    project_dir = Path(project_dir).resolve()
+    paths = init_project(project_dir)
+    known = {record.image_relpath for record in read_frames_csv(paths.frames_csv)}
+    journal = FrameJournal(project_dir)
+    conflicts: list[MergeConflict] = []
+    incomplete: list[str] = []
+    already_merged: list[str] = []
+    shards = merged = duplicates = 0
+
+    with journal:
+        for staging in staging_dirs:
+            staging = Path(staging).resolve()
+            done_path = staging / SHARD_DONE_NAME
+            if not done_path.exists():
+                incomplete.append(str(staging))
+                continue
+            if _merged_into(staging, project_dir):
+                already_merged.append(str(staging))
+                continue
+            shard = str(json.loads(done_path.read_text(encoding="utf-8")).get("shard"))
+            shards += 1
+
+            blocked = _merge_sources(project_dir, staging, shard, conflicts)
+            records = []
+            moves: list[tuple[Path, Path]] = []
+            staged: list[tuple[Path, Path]] = []
+            for record in read_frames_csv(staging / "metadata" / "frames.csv"):
+                relpath = record.image_relpath
+                if record.video_id in blocked:
+                    continue
+                source = staging / relpath
+                target = project_dir / relpath
+                if not source.exists():
+                    if relpath not in known:
+                        conflicts.append(
+                            MergeConflict(shard, record.video_id, relpath, "分片缺少图片")
+                        )
+                    continue
+                if target.exists():
+                    if not filecmp.cmp(source, target, shallow=False):
+                        conflicts.append(
+                            MergeConflict(shard, record.video_id, relpath, "图片内容不一致")
+                        )
+                        continue
+                    duplicates += 1
+                    if relpath in known:
+                        continue
+                    records.append(record)
+                    known.add(relpath)
+                    continue
+                staged_path = staging_path_for(target)
+                moves.append((source, staged_path))
+                staged.append((staged_path, target))
+                records.append(record)
+                known.add(relpath)
+
+            txn_id = journal.begin(staged) if staged else None
+            try:
+                for source, staged_path in moves:
+                    staged_path.parent.mkdir(parents=True, exist_ok=True)
+                    _link_or_copy(source, staged_path)
+            except OSError:
+                if txn_id is not None:
+                    journal.abort(txn_id)
+                raise
+            if records:
+                journal.submit(records, staged, txn_id=txn_id)
+                merged += len(staged)
+            journal.flush()
+            (staging / SHARD_MERGED_NAME).write_text(
+                json.dumps({"shard": shard, "project": str(project_dir)}),
+                encoding="utf-8",
+            )
+
+    _append_conflicts(paths.metadata_dir / MERGE_CONFLICTS_NAME, conflicts)
+    return MergeReport(
+        shards=shards,
+        merged=merged,
+        duplicates=duplicates,
+        conflicts=conflicts,
+        incomplete=incomplete,
+        already_merged=already_merged,
+    )
+
+
+def _merged_into(staging: Path, project_dir: Path) -> bool:
+    try:
+        payload = json.loads((staging / SHARD_MERGED_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return False
+    return isinstance(payload, dict) and payload.get("project") == str(project_dir)
+
+
+def _merge_sources(
+    project_dir: Path, staging: Path, shard: str, conflicts: list[MergeConflict]
+) -> set[str]:
+    existing = {
+        row.get("video_id"): row for row in read_sources(project_dir / "sources.csv")
+    }
+    blocked: set[str] = set()
+    for row in read_sources(staging / "sources.csv"):
+        video_id = row.get("video_id") or ""
+        fingerprint = row.get("fingerprint") or ""
+        current = existing.get(video_id)
+        if current is None:
+            upsert_source(
+                project_dir / "sources.csv",
+                video_id,
+                row.get("src_video_path") or "",
+                fingerprint,
+            )
+            continue
+        known_fingerprint = current.get("fingerprint") or ""
+        if fingerprint and known_fingerprint and fingerprint != known_fingerprint:
+            blocked.add(video_id)
+            conflicts.append(MergeConflict(shard, video_id, "", "视频指纹不一致"))
+    return blocked
+
+
+def _encode_job(job: VideoJob, source: Optional[dict[str, str]]) -> dict[str, object]:
+    source = source or {}
+    return {
+        "video_path": str(job.video_path),
+        "video_id": job.video_folder,
+        "fingerprint": source.get("fingerprint") or content_fingerprint(job.video_path),
+        "probe": asdict(job.probe),
+        "ranges": [[item.start_ms, item.end_ms, item.fps] for item in job.ranges],
+    }
+
+
+def _decode_job(entry: dict[str, object]) -> VideoJob:
+    ranges = tuple(
+        PlannedRange(int(start), int(end), float(fps))
+        for start, end, fps in entry["ranges"]
+    )
+    return VideoJob(
+        video_path=Path(str(entry["video_path"])),
+        video_folder=str(entry["video_id"]),
+        probe=VideoProbe(**entry["probe"]),
+        ranges=ranges,
+    )
+
+
+def _link_or_copy(source: Path, target: Path) -> None:
+    target.unlink(missing_ok=True)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copy2(source, target)
+
+
+def _append_conflicts(path: Path, conflicts: list[MergeConflict]) -> None:
+    if not conflicts:
+        return
+    new_file = not path.exists()
+    with path.open("a", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        if new_file:
+            writer.writerow(MERGE_CONFLICTS_HEADER)
+        for conflict in conflicts:
+            writer.writerow(
+                [conflict.shard, conflict.video_id, conflict.image_relpath, conflict.reason]
+            )
@@ -1,8 +1,13 @@
 from __future__ import annotations
 
 import csv
+import os
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Optional
+
+from utils.hash_gen import content_fingerprint
+
+SOURCES_CSV_HEADER = ["video_id", "src_video_path", "fingerprint"]
 
 
 def normalize_source_path(project_dir: str | Path, video_path: str | Path) -> str:
@@ -14,6 +19,13 @@ def normalize_source_path(project_dir: str | Path, video_path: str | Path) -> st
         return str(video_path)
 
 
+def resolve_source_path(project_dir: str | Path, src_video_path: str) -> Path:
+    path = Path(src_video_path)
+    if path.is_absolute():
+        return path
+    return Path(project_dir) / path
+
+
 def read_sources(sources_csv: str | Path) -> list[dict[str, str]]:
     path = Path(sources_csv)
     if not path.exists():
@@ -23,23 +35,35 @@ def read_sources(sources_csv: str | Path) -> list[dict[str, str]]:
         return list(reader)
 
 
+def write_sources(sources_csv: str | Path, rows: Iterable[dict[str, str]]) -> None:
+    path = Path(sources_csv)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(path.name + ".tmp")
+    with temp_path.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(SOURCES_CSV_HEADER)
+        for row in rows:
+            writer.writerow([row.get(column) or "" for column in SOURCES_CSV_HEADER])
+    os.replace(temp_path, path)
+
+
 def append_source(
     sources_csv: str | Path,
     video_id: str,
     src_video_path: str,
+    fingerprint: str = "",
 ) -> None:
     path = Path(sources_csv)
-    existing = {row.get("video_id") for row in read_sources(path)}
-    if video_id in existing:
+    rows = read_sources(path)
+    if video_id in {row.get("video_id") for row in rows}:
         return
     if not path.exists():
-        path.parent.mkdir(parents=True, exist_ok=True)
-        with path.open("w", newline="", encoding="utf-8") as handle:
-            writer = csv.writer(handle)
-            writer.writerow(["video_id", "src_video_path"])
+        write_sources(path, [])
+    elif _needs_header_upgrade(path):
+        write_sources(path, rows)
     with path.open("a", newline="", encoding="utf-8") as handle:
         writer = csv.writer(handle)
-        writer.writerow([video_id, src_video_path])
+        writer.writerow([video_id, src_video_path, fingerprint])
 
 
 def append_sources(
@@ -48,3 +72,62 @@ def append_sources(
 ) -> None:
     for video_id, src_video_path in rows:
         append_source(sources_csv, video_id, src_video_path)
+
+
+def upsert_source(
+    sources_csv: str | Path,
+    video_id: str,
+    src_video_path: str,
+    fingerprint: str,
+) -> None:
+    path = Path(sources_csv)
+    rows = read_sources(path)
+    for row in rows:
+        if row.get("video_id") != video_id:
+            continue
+        if (
+            row.get("src_video_path") == src_video_path
+            and row.get("fingerprint") == fingerprint
+            and not _needs_header_upgrade(path)
+        ):
+            return
+        row["src_video_path"] = src_video_path
+        row["fingerprint"] = fingerprint
+        write_sources(path, rows)
+        return
+    append_source(path, video_id, src_video_path, fingerprint)
+
+
+def find_source_by_fingerprint(
+    project_dir: str | Path, fingerprint: str
+) -> Optional[str]:
+    sources_csv = Path(project_dir) / "sources.csv"
+    rows = read_sources(sources_csv)
+    for row in rows:
+        if row.get("fingerprint") == fingerprint:
+            return row.get("video_id")
+
+    match: Optional[str] = None
+    backfilled = False
+    for row in rows:
+        if row.get("fingerprint"):
+            continue
+        source_path = resolve_source_path(project_dir, row.get("src_video_path", ""))
+        if not source_path.is_file():
+            continue
+        try:
+            row["fingerprint"] = content_fingerprint(source_path)
+        except OSError:
+            continue
+        backfilled = True
+        if match is None and row["fingerprint"] == fingerprint:
+            match = row.get("video_id")
+    if backfilled:
+        write_sources(sources_csv, rows)
+    return match
+
+
+def _needs_header_upgrade(sources_csv: Path) -> bool:
+    with sources_csv.open("r", newline="", encoding="utf-8") as handle:
+        header = next(csv.reader(handle), [])
+    return header != SOURCES_CSV_HEADER
@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from fractions import Fraction
+from pathlib import Path
+from typing import Callable, Iterable, Optional
+
+from core.metadata.journal import FrameJournal
+from core.project.manager import ensure_video_subdirs, resolve_video_folder
+from core.video.extractor import extract_range_frames
+from core.video.probe import VideoProbe, probe_videos
+from core.video.spec import RangeSpec
+from core.video.tuning import (
+    CoreBudget,
+    FFmpegConfig,
+    TuningCache,
+    TuningResult,
+    autotune_cached,
+    default_cpu_budget,
+    resolve_config,
+    tuning_key,
+)
+
+DEFAULT_PROBE_WORKERS = 4
+MIN_CHUNK_MS = 30_000
+
+
+@dataclass(frozen=True)
+class PlannedRange:
+    start_ms: int
+    end_ms: int
+    fps: float
+
+
+@dataclass(frozen=True)
+class VideoJob:
+    video_path: Path
+    video_folder: str
+    probe: VideoProbe
+    ranges: tuple[PlannedRange, ...]
+
+    @property
+    def work_ms(self) -> int:
+        return sum(item.end_ms - item.start_ms for item in self.ranges)
+
+
+@dataclass(frozen=True)
+class BatchEvent:
+    video_path: str
+    video_id: str
+    start_ms: int
+    end_ms: int
+    frames: int = 0
+    skipped: int = 0
+    error: str = ""
+
+
+@dataclass(frozen=True)
+class BatchPlan:
+    jobs: list[VideoJob]
+    errors: list[BatchEvent]
+    failed_specs: int
+
+    @property
+    def total_ranges(self) -> int:
+        return sum(len(job.ranges) for job in self.jobs)
+
+
+@dataclass(frozen=True)
+class BatchReport:
+    videos: int
+    ranges: int
+    frames: int
+    skipped: int
+    failed: int
+
+
+def group_specs(specs: Iterable[RangeSpec]) -> dict[Path, list[RangeSpec]]:
+    grouped: dict[Path, list[RangeSpec]] = {}
+    for spec in specs:
+        grouped.setdefault(spec.video_path, []).append(spec)
+    return grouped
+
+
+def merge_ranges(
+    ranges: Iterable[PlannedRange], merge_gap_ms: int = 0
+) -> list[PlannedRange]:
+    merged: list[PlannedRange] = []
+    open_by_fps: dict[float, int] = {}
+    for item in sorted(ranges, key=lambda value: (value.start_ms, value.end_ms)):
+        if item.end_ms <= item.start_ms:
+            continue
+        idx = open_by_fps.get(item.fps)
+        if idx is not None and item.start_ms <= merged[idx].end_ms + merge_gap_ms:
+            previous = merged[idx]
+            merged[idx] = PlannedRange(
+                previous.start_ms, max(previous.end_ms, item.end_ms), item.fps
+            )
+            continue
+        open_by_fps[item.fps] = len(merged)
+        merged.append(item)
+    return merged
+
+
+def split_range(item: PlannedRange, chunk_ms: int) -> list[PlannedRange]:
+    step = Fraction(1000) / Fraction(item.fps).limit_denominator(1000)
+    grid_ms = step.numerator
+    if chunk_ms <= 0 or item.end_ms - item.start_ms <= chunk_ms:
+        return [item]
+    chunk_ms = -(-chunk_ms // grid_ms) * grid_ms
+    chunks: list[PlannedRange] = []
+    start_ms = item.start_ms
+    while start_ms < item.end_ms:
+        end_ms = min(start_ms + chunk_ms, item.end_ms)
+        chunks.append(PlannedRange(start_ms, end_ms, item.fps))
+        start_ms = end_ms
+    return chunks
+
+
+def plan_batch(
+    project_dir: str | Path,
+    specs: Iterable[RangeSpec],
+    merge_gap_ms: int = 0,
+    probe_workers: int = DEFAULT_PROBE_WORKERS,
+) -> BatchPlan:
+    project_dir = Path(project_dir)
+    grouped = group_specs(specs)
+    errors: list[BatchEvent] = []
+    failed_specs = 0
+
+    existing = [path for path in grouped if path.is_file()]
+    for path in grouped:
+        if not path.is_file():
+            errors.append(BatchEvent(str(path), "", 0, 0, error="找不到视频文件"))
+            failed_specs += len(grouped[path])
+
+    jobs: list[VideoJob] = []
+    for result in probe_videos(existing, project_dir, workers=probe_workers):
+        path = Path(result.video_path)
+        if result.probe is None:
+            errors.append(BatchEvent(str(path), "", 0, 0, error=result.error))
+            failed_specs += len(grouped[path])
+            continue
+        video_folder = resolve_video_folder(project_dir, path)
+        ensure_video_subdirs(project_dir, video_folder)
+        duration_ms = int(result.probe.duration_s * 1000)
+        planned = [PlannedRange(*spec.resolve(duration_ms)) for spec in grouped[path]]
+        ranges = tuple(merge_ranges(planned, merge_gap_ms))
+        if ranges:
+            jobs.append(VideoJob(path, video_folder, result.probe, ranges))
+
+    jobs.sort(key=lambda job: job.work_ms, reverse=True)
+    return BatchPlan(jobs=jobs, errors=errors, failed_specs=failed_specs)
+
+
+def autotune_plan(
+    plan: BatchPlan,
+    cpu_budget: Optional[int] = None,
+    cache: Optional[TuningCache] = None,
+    hwaccel: bool = False,
+    on_result: Optional[Callable[[str, Optional[TuningResult]], None]] = None,
+) -> None:
+    budget = cpu_budget or default_cpu_budget()
+    own_cache = cache is None
+    cache = cache or TuningCache()
+    seen: set[str] = set()
+    for job in plan.jobs:
+        key = tuning_key(job.probe, budget)
+        if key in seen or cache.get(key) is not None:
+            continue
+        seen.add(key)
+        result = autotune_cached(
+            job.video_path, job.probe, budget, cache=cache, hwaccel=hwaccel
+        )
+        if on_result is not None:
+            on_result(key, result)
+    if own_cache:
+        cache.save()
+
+
+@dataclass
+class _RangeProgress:
+    job: VideoJob
+    item: PlannedRange
+    pending: int
+    frames: int = 0
+    skipped: int = 0
+    error: str = ""
+
+
+def execute_batch(
+    project_dir: str | Path,
+    plan: BatchPlan,
+    cpu_budget: Optional[int] = None,
+    hwaccel: bool = False,
+    journal: Optional[FrameJournal] = None,
+    on_event: Optional[Callable[[BatchEvent], None]] = None,
+    tuning: Optional[TuningCache] = None,
+) -> BatchReport:
+    project_dir = Path(project_dir)
+    cores = CoreBudget(cpu_budget or default_cpu_budget())
+    tuning = tuning or TuningCache()
+    own_journal = journal is None
+    journal = journal or FrameJournal(project_dir)
+    lock = threading.Lock()
+    totals = {"frames": 0, "skipped": 0, "failed": 0}
+
+    tasks: list[tuple[_RangeProgress, FFmpegConfig, PlannedRange]] = []
+    for job in plan.jobs:
+        config = resolve_config(job.probe, cores.total, tuning)
+        processes = config.processes(cores.total)
+        chunk_ms = max(MIN_CHUNK_MS, -(-job.work_ms // processes)) if processes > 1 else 0
+        for item in job.ranges:
+            chunks = split_range(item, chunk_ms)
+            progress = _RangeProgress(job, item, pending=len(chunks))
+            tasks.extend((progress, config, chunk) for chunk in chunks)
+
+    def report(progress: _RangeProgress, frames: int, skipped: int, error: str) -> None:
+        with lock:
+            progress.frames += frames
+            progress.skipped += skipped
+            progress.error = progress.error or error
+            progress.pending -= 1
+            if progress.pending:
+                return
+            totals["frames"] += progress.frames
+            totals["skipped"] += progress.skipped
+            totals["failed"] += 1 if progress.error else 0
+            if on_event is not None:
+                on_event(
+                    BatchEvent(
+                        str(progress.job.video_path),
+                        progress.job.video_folder,
+                        progress.item.start_ms,
+                        progress.item.end_ms,
+                        frames=progress.frames,
+                        skipped=progress.skipped,
+                        error=progress.error,
+                    )
+                )
+
+    def run_chunk(progress: _RangeProgress, config: FFmpegConfig, chunk: PlannedRange) -> None:
+        job = progress.job
+        try:
+            with cores.reserve(config.threads):
+                result = extract_range_frames(
+                    project_dir=project_dir,
+                    video_path=job.video_path,
+                    video_folder=job.video_folder,
+                    video_id=job.video_folder,
+                    src_video_path=str(job.video_path),
+                    start_ms=chunk.start_ms,
+                    end_ms=chunk.end_ms,
+                    fps=chunk.fps,
+                    video_fps=job.probe.fps,
+                    journal=journal,
+                    hwaccel=hwaccel,
+                    threads=config.threads,
+                    filter_threads=config.filter_threads,
+                )
+            journal.flush()
+        except (RuntimeError, OSError) as exc:
+            report(progress, 0, 0, str(exc))
+            return
+        report(progress, len(result.records), result.skipped, "")
+
+    workers = max(min(cores.total, len(tasks)), 1)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for future in [pool.submit(run_chunk, *task) for task in tasks]:
+            future.result()
+    if own_journal:
+        journal.close()
+
+    return BatchReport(
+        videos=len(plan.jobs),
+        ranges=plan.total_ranges,
+        frames=totals["frames"],
+        skipped=totals["skipped"],
+        failed=totals["failed"] + plan.failed_specs,
+    )
@@ -7,6 +7,8 @@ from typing import Optional
 import cv2
 import numpy as np
 
+from utils.metrics import increment, timed
+
 
 @dataclass
 class FrameData:
@@ -55,24 +57,28 @@ class VideoCaptureController:
     def height(self) -> int:
         return self._height
 
+    @timed("video.decode")
     def read_next(self) -> Optional[FrameData]:
         if self._cap is None:
             return None
         ret, frame = self._cap.read()
         if not ret:
             return None
+        increment("video.frames_decoded")
         frame_index = int(self._cap.get(cv2.CAP_PROP_POS_FRAMES)) - 1
         timestamp_ms = int(round((frame_index / max(self._fps, 1e-6)) * 1000))
         return FrameData(
             frame_index=frame_index, timestamp_ms=timestamp_ms, image=frame
         )
 
+    @timed("video.seek")
     def get_frame_at(self, frame_index: int) -> Optional[FrameData]:
         if self._cap is None:
             return None
         self._cap.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
         return self.read_next()
 
+    @timed("video.seek")
     def get_frame_at_ms(self, timestamp_ms: int) -> Optional[FrameData]:
         if self._cap is None:
             return None
@@ -3,6 +3,7 @@ from __future__ import annotations
 import re
 import shutil
 import subprocess
+import tempfile
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Iterable, Optional
@@ -12,8 +13,12 @@ from core.metadata.frames_csv import (
     build_frame_filename,
     build_image_relpath,
 )
-from utils.ffmpeg_check import ensure_ffmpeg
+from core.metadata.journal import FrameJournal, staging_path_for
+from utils.ffmpeg_check import FFmpegToolchain, get_toolchain
+from utils.image_header import read_image_size
+from utils.metrics import increment, span, timed
 
+TEMP_DIR_PREFIX = ".tmp_extract_"
 _SHOWINFO_PATTERN = re.compile(r"pts_time:(?P<pts>[0-9.]+)")
 
 
@@ -23,6 +28,7 @@ class ExtractRangeResult:
     skipped: int
 
 
+@timed("extract.range")
 def extract_range_frames(
     project_dir: str | Path,
     video_path: str | Path,
@@ -35,8 +41,12 @@ def extract_range_frames(
     video_fps: float,
     ext: str = "jpg",
     ffmpeg_dir: Optional[Path] = None,
+    journal: Optional[FrameJournal] = None,
+    hwaccel: bool = False,
+    threads: int = 0,
+    filter_threads: int = 0,
 ) -> ExtractRangeResult:
-    ffmpeg_path, _ = ensure_ffmpeg(ffmpeg_dir)
+    toolchain = get_toolchain(ffmpeg_dir)
     project_dir = Path(project_dir)
     ranges_dir = project_dir / "frames" / video_folder / "ranges"
     ranges_dir.mkdir(parents=True, exist_ok=True)
@@ -46,35 +56,35 @@ def extract_range_frames(
     if end_s <= start_s:
         return ExtractRangeResult(records=[], skipped=0)
 
-    temp_dir = ranges_dir / ".tmp_extract"
-    if temp_dir.exists():
-        shutil.rmtree(temp_dir)
-    temp_dir.mkdir(parents=True, exist_ok=True)
+    temp_dir = Path(tempfile.mkdtemp(prefix=TEMP_DIR_PREFIX, dir=ranges_dir))
 
     output_pattern = str(temp_dir / "frame_%07d.jpg")
-    cmd = [
-        ffmpeg_path,
-        "-hide_banner",
-        "-loglevel",
-        "info",
-        "-ss",
-        f"{start_s}",
-        "-to",
-        f"{end_s}",
-        "-i",
-        str(video_path),
-        "-vf",
-        f"fps={fps},showinfo",
-        "-q:v",
-        "2",
+    cmd = build_extract_command(
+        toolchain,
+        video_path,
+        start_s,
+        end_s,
+        fps,
         output_pattern,
-    ]
+        hwaccel,
+        threads=threads,
+        filter_threads=filter_threads,
+    )
 
-    timestamps = _run_ffmpeg_with_timestamps(cmd)
+    try:
+        with span("extract.ffmpeg"):
+            timestamps = _run_ffmpeg_with_timestamps(cmd)
+    except RuntimeError:
+        increment("extract.ffmpeg_failures")
+        shutil.rmtree(temp_dir, ignore_errors=True)
+        raise
     timestamps = _normalize_timestamps(timestamps, start_s)
 
     temp_files = sorted(temp_dir.glob("frame_*.jpg"))
+    width, height = (read_image_size(temp_files[0]) if temp_files else None) or (0, 0)
     records: list[FrameRecord] = []
+    moves: list[tuple[Path, Path]] = []
+    staged: list[tuple[Path, Path]] = []
     skipped = 0
 
     for idx, temp_file in enumerate(temp_files):
@@ -88,13 +98,16 @@ def extract_range_frames(
         image_relpath = build_image_relpath(video_folder, "ranges", filename)
         output_path = project_dir / image_relpath
 
-        if output_path.exists():
+        staged_path = staging_path_for(output_path)
+        if output_path.exists() or staged_path.exists():
             skipped += 1
-            temp_file.unlink(missing_ok=True)
             continue
 
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        temp_file.replace(output_path)
+        if journal is None:
+            moves.append((temp_file, output_path))
+        else:
+            moves.append((temp_file, staged_path))
+            staged.append((staged_path, output_path))
         records.append(
             FrameRecord.create(
                 video_id=video_id,
@@ -103,13 +116,59 @@ def extract_range_frames(
                 frame_index=frame_index,
                 kind="range",
                 image_relpath=image_relpath,
+                width=width,
+                height=height,
             )
         )
 
-    shutil.rmtree(temp_dir, ignore_errors=True)
+    txn_id = journal.begin(staged) if journal is not None and staged else None
+    try:
+        for temp_file, target in moves:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            temp_file.replace(target)
+    except OSError:
+        if txn_id is not None:
+            journal.abort(txn_id)
+        raise
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    increment("extract.frames", len(records))
+    if journal is not None and records:
+        journal.submit(records, staged, txn_id=txn_id)
     return ExtractRangeResult(records=records, skipped=skipped)
 
 
+def build_extract_command(
+    toolchain: FFmpegToolchain,
+    video_path: str | Path,
+    start_s: float,
+    end_s: float,
+    fps: float,
+    output_pattern: str,
+    hwaccel: bool,
+    threads: int = 0,
+    filter_threads: int = 0,
+) -> list[str]:
+    cmd = [toolchain.ffmpeg, "-hide_banner", "-loglevel", "info"]
+    if filter_threads > 0:
+        cmd.extend(["-filter_threads", str(filter_threads)])
+    if hwaccel and toolchain.hwaccels:
+        cmd.extend(["-hwaccel", "auto"])
+    if threads > 0:
+        cmd.extend(["-threads", str(threads)])
+    cmd.extend(["-ss", f"{start_s}", "-to", f"{end_s}", "-i", str(video_path)])
+    filters = [f"fps={fps}"]
+    if toolchain.has_filter("showinfo"):
+        filters.append("showinfo")
+    cmd.extend(["-an", "-sn", "-dn", "-vf", ",".join(filters)])
+    if toolchain.has_encoder("mjpeg"):
+        cmd.extend(["-c:v", "mjpeg"])
+    if threads > 0:
+        cmd.extend(["-threads", str(threads)])
+    cmd.extend(["-q:v", "2", output_pattern])
+    return cmd
+
+
 def _run_ffmpeg_with_timestamps(cmd: Iterable[str]) -> list[float]:
     timestamps: list[float] = []
     process = subprocess.Popen(
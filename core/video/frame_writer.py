@@ -11,6 +11,8 @@ from core.metadata.frames_csv import (
     build_frame_filename,
     build_image_relpath,
 )
+from core.metadata.journal import FrameJournal, staging_path_for
+from utils.metrics import timed
 
 
 def save_keyframe(
@@ -22,33 +24,51 @@ def save_keyframe(
     frame_index: int,
     image: np.ndarray,
     ext: str = "jpg",
+    journal: Optional[FrameJournal] = None,
 ) -> Optional[FrameRecord]:
     filename = build_frame_filename(timestamp_ms, frame_index, ext=ext)
     image_relpath = build_image_relpath(video_folder, "keyframes", filename)
     output_path = Path(project_dir) / image_relpath
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    if output_path.exists():
+    staged_path = staging_path_for(output_path)
+    if output_path.exists() or staged_path.exists():
         return None
 
-    _write_image(output_path, image, ext)
-
-    return FrameRecord.create(
+    height, width = image.shape[:2] if image is not None else (0, 0)
+    record = FrameRecord.create(
         video_id=video_id,
         src_video_path=src_video_path,
         timestamp_ms=timestamp_ms,
         frame_index=frame_index,
         kind="keyframe",
         image_relpath=image_relpath,
+        width=width,
+        height=height,
     )
+    if journal is None:
+        _write_image(output_path, image, ext)
+        return record
+
+    staged = [(staged_path, output_path)]
+    txn_id = journal.begin(staged)
+    try:
+        _write_image(staged_path, image, ext)
+    except (RuntimeError, OSError):
+        journal.abort(txn_id)
+        raise
+    journal.submit([record], staged, txn_id=txn_id)
+    return record
 
 
+@timed("keyframe.write")
 def _write_image(output_path: Path, image: np.ndarray, ext: str) -> None:
     if image is None or image.size == 0:
         raise RuntimeError("关键帧为空，无法写入")
     safe_image = np.ascontiguousarray(image)
-    success = cv2.imwrite(str(output_path), safe_image)
-    if success:
-        return
+    if output_path.suffix.lower() == f".{ext}".lower():
+        success = cv2.imwrite(str(output_path), safe_image)
+        if success:
+            return
     encoded = cv2.imencode(f".{ext}", safe_image)
     if not encoded[0]:
         raise RuntimeError("关键帧写入失败")
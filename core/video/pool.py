@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from core.metadata.coverage import IntervalIndex
+from core.video.capture import FrameData, VideoCaptureController
+
+DEFAULT_MAX_OPEN = 4
+DEFAULT_MAX_CACHE_BYTES = 256 * 1024 * 1024
+DEFAULT_FRAMES_PER_VIDEO = 32
+
+
+@dataclass
+class VideoMarkers:
+    in_ms: Optional[int] = None
+    out_ms: Optional[int] = None
+    ranges: list[tuple[int, int]] = field(default_factory=list)
+    keyframes: list[tuple[int, int]] = field(default_factory=list)
+    coverage: IntervalIndex = field(default_factory=IntervalIndex)
+
+
+class PooledVideo:
+    def __init__(
+        self,
+        video_path: Path,
+        capture: VideoCaptureController,
+        max_frames: int = DEFAULT_FRAMES_PER_VIDEO,
+    ) -> None:
+        self.video_path = video_path
+        self.capture = capture
+        self.video_folder: Optional[str] = None
+        self.last_frame_index = 0
+        self._max_frames = max(max_frames, 1)
+        self._frames: OrderedDict[int, FrameData] = OrderedDict()
+        self._cached_bytes = 0
+        self._resume_at: Optional[int] = None
+
+    @property
+    def cached_bytes(self) -> int:
+        return self._cached_bytes
+
+    def frame_at(self, frame_index: int) -> Optional[FrameData]:
+        cached = self._frames.get(frame_index)
+        if cached is not None:
+            self._frames.move_to_end(frame_index)
+            self._resume_at = frame_index + 1
+            return cached
+        frame = self.capture.get_frame_at(frame_index)
+        self._resume_at = None
+        if frame is not None:
+            self._remember(frame)
+        return frame
+
+    def read_next(self) -> Optional[FrameData]:
+        if self._resume_at is not None:
+            frame_index = self._resume_at
+            self._resume_at = None
+            return self.capture.get_frame_at(frame_index)
+        return self.capture.read_next()
+
+    def drop_oldest_frame(self) -> bool:
+        if not self._frames:
+            return False
+        _, frame = self._frames.popitem(last=False)
+        self._cached_bytes -= frame.image.nbytes
+        return True
+
+    def clear_frames(self) -> None:
+        self._frames.clear()
+        self._cached_bytes = 0
+
+    def close(self) -> None:
+        self.clear_frames()
+        self.capture.close()
+
+    def _remember(self, frame: FrameData) -> None:
+        previous = self._frames.pop(frame.frame_index, None)
+        if previous is not None:
+            self._cached_bytes -= previous.image.nbytes
+        self._frames[frame.frame_index] = frame
+        self._cached_bytes += frame.image.nbytes
+        while len(self._frames) > self._max_frames:
+            self.drop_oldest_frame()
+
+
+class CapturePool:
+    def __init__(
+        self,
+        max_open: int = DEFAULT_MAX_OPEN,
+        max_cache_bytes: int = DEFAULT_MAX_CACHE_BYTES,
+        frames_per_video: int = DEFAULT_FRAMES_PER_VIDEO,
+    ) -> None:
+        self._max_open = max(max_open, 1)
+        self._max_cache_bytes = max(max_cache_bytes, 0)
+        self._frames_per_video = frames_per_video
+        self._entries: OrderedDict[Path, PooledVideo] = OrderedDict()
+        self._pending: dict[Path, Future[Optional[PooledVideo]]] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def __contains__(self, video_path: str | Path) -> bool:
+        return _pool_key(video_path) in self._entries
+
+    def acquire(self, video_path: str | Path) -> PooledVideo:
+        key = _pool_key(video_path)
+        entry = self._entries.get(key)
+        if entry is None:
+            with self._lock:
+                pending = self._pending.pop(key, None)
+            if pending is not None:
+                entry = pending.result()
+            if entry is None:
+                entry = self._open(key)
+                if entry is None:
+                    raise RuntimeError("无法打开视频")
+            self._entries[key] = entry
+        self._entries.move_to_end(key)
+        self._evict()
+        return entry
+
+    def preopen(self, video_path: str | Path) -> None:
+        key = _pool_key(video_path)
+        if key in self._entries or not key.exists():
+            return
+        with self._lock:
+            if key in self._pending:
+                return
+            stale = [self._pending.pop(other) for other in list(self._pending)]
+            self._pending[key] = self._executor.submit(self._open, key, True)
+        for future in stale:
+            future.add_done_callback(_close_unused)
+
+    def enforce_memory_cap(self) -> None:
+        total = sum(entry.cached_bytes for entry in self._entries.values())
+        for entry in list(self._entries.values()):
+            while total > self._max_cache_bytes and entry.cached_bytes:
+                before = entry.cached_bytes
+                entry.drop_oldest_frame()
+                total -= before - entry.cached_bytes
+            if total <= self._max_cache_bytes:
+                return
+
+    def close_all(self) -> None:
+        with self._lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for future in pending:
+            entry = future.result()
+            if entry is not None:
+                entry.close()
+        for entry in self._entries.values():
+            entry.close()
+        self._entries.clear()
+
+    def shutdown(self) -> None:
+        self.close_all()
+        self._executor.shutdown(wait=True)
+
+    def _open(self, key: Path, warm: bool = False) -> Optional[PooledVideo]:
+        capture = VideoCaptureController()
+        try:
+            capture.open(key)
+        except RuntimeError:
+            return None
+        entry = PooledVideo(key, capture, self._frames_per_video)
+        if warm:
+            entry.frame_at(0)
+        return entry
+
+    def _evict(self) -> None:
+        while len(self._entries) > self._max_open:
+            _, entry = self._entries.popitem(last=False)
+            entry.close()
+        self.enforce_memory_cap()
+
+
+def _close_unused(future: Future[Optional[PooledVideo]]) -> None:
+    entry = future.result()
+    if entry is not None:
+        entry.close()
+
+
+def _pool_key(video_path: str | Path) -> Path:
+    return Path(video_path).expanduser().resolve()
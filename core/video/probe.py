@@ -1,12 +1,21 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, fields
 import json
+import os
 import subprocess
+import threading
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Optional
 
-from utils.ffmpeg_check import ensure_ffmpeg
+from utils.ffmpeg_check import get_toolchain
+from utils.hash_gen import content_fingerprint
+
+PROBE_CACHE_NAME = "probe_cache.json"
+PROBE_CACHE_VERSION = 1
+GOP_SAMPLE_PACKETS = 600
+_VFR_TOLERANCE = 0.01
 
 
 @dataclass(frozen=True)
@@ -17,16 +26,24 @@ class VideoProbe:
     width: int
     height: int
     total_frames: int
+    codec_name: str = ""
+    pix_fmt: str = ""
+    rotation: int = 0
+    gop_size: int = 0
+    is_vfr: bool = False
+
+
+@dataclass(frozen=True)
+class BatchProbeResult:
+    video_path: str
+    probe: Optional[VideoProbe]
+    error: str = ""
 
 
 def probe_video(
     video_path: str | Path, ffprobe_path: Optional[str] = None
 ) -> VideoProbe:
-    ffprobe, _ = ensure_ffmpeg(
-        custom_dir=None if ffprobe_path is None else Path(ffprobe_path).parent
-    )
-    if ffprobe_path is not None:
-        ffprobe = ffprobe_path
+    ffprobe = ffprobe_path or get_toolchain().ffprobe
 
     cmd = [
         ffprobe,
@@ -34,10 +51,12 @@ def probe_video(
         "error",
         "-select_streams",
         "v:0",
+        "-read_intervals",
+        f"%+#{GOP_SAMPLE_PACKETS}",
         "-show_entries",
-        "stream=width,height,avg_frame_rate,r_frame_rate,nb_frames",
-        "-show_entries",
-        "format=duration",
+        "stream=codec_name,pix_fmt,width,height,avg_frame_rate,r_frame_rate,nb_frames"
+        ":stream_tags=rotate:stream_side_data=rotation"
+        ":format=duration:packet=pts_time,flags",
         "-of",
         "json",
         str(video_path),
@@ -55,13 +74,16 @@ def probe_video(
     stream = streams[0]
     width = int(stream.get("width", 0))
     height = int(stream.get("height", 0))
-    fps = _parse_fps(stream.get("avg_frame_rate") or stream.get("r_frame_rate"))
+    avg_fps = _parse_fps(stream.get("avg_frame_rate"))
+    real_fps = _parse_fps(stream.get("r_frame_rate"))
+    fps = avg_fps or real_fps
     duration_s = float(payload.get("format", {}).get("duration", 0.0))
     total_frames = _parse_total_frames(stream.get("nb_frames"), duration_s, fps)
 
     if width <= 0 or height <= 0 or fps <= 0 or duration_s <= 0:
         raise ValueError("视频元数据不完整")
 
+    packets = payload.get("packets", [])
     return VideoProbe(
         video_path=str(video_path),
         duration_s=duration_s,
@@ -69,9 +91,132 @@ def probe_video(
         width=width,
         height=height,
         total_frames=total_frames,
+        codec_name=str(stream.get("codec_name") or ""),
+        pix_fmt=str(stream.get("pix_fmt") or ""),
+        rotation=_parse_rotation(stream),
+        gop_size=_estimate_gop_size(packets),
+        is_vfr=_detect_vfr(avg_fps, real_fps, packets),
     )
 
 
+class ProbeCache:
+    def __init__(self, project_dir: str | Path) -> None:
+        self._path = Path(project_dir) / "metadata" / PROBE_CACHE_NAME
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict[str, object]] = self._load()
+        self._dirty = False
+
+    def get(self, fingerprint: str, video_path: str | Path) -> Optional[VideoProbe]:
+        with self._lock:
+            entry = self._entries.get(fingerprint)
+        if entry is None:
+            return None
+        known = {item.name for item in fields(VideoProbe)}
+        values = {key: value for key, value in entry.items() if key in known}
+        values["video_path"] = str(video_path)
+        try:
+            return VideoProbe(**values)
+        except TypeError:
+            return None
+
+    def put(self, fingerprint: str, probe: VideoProbe) -> None:
+        entry = asdict(probe)
+        entry.pop("video_path", None)
+        with self._lock:
+            self._entries[fingerprint] = entry
+            self._dirty = True
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = {"version": PROBE_CACHE_VERSION, "entries": self._entries}
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self._path.with_name(self._path.name + ".tmp")
+            temp_path.write_text(
+                json.dumps(payload, ensure_ascii=False), encoding="utf-8"
+            )
+            os.replace(temp_path, self._path)
+            self._dirty = False
+
+    def _load(self) -> dict[str, dict[str, object]]:
+        if not self._path.exists():
+            return {}
+        try:
+            payload = json.loads(self._path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if payload.get("version") != PROBE_CACHE_VERSION:
+            return {}
+        entries = payload.get("entries", {})
+        return entries if isinstance(entries, dict) else {}
+
+
+def probe_video_cached(
+    video_path: str | Path,
+    project_dir: str | Path,
+    ffprobe_path: Optional[str] = None,
+    cache: Optional[ProbeCache] = None,
+) -> VideoProbe:
+    own_cache = cache is None
+    cache = cache or ProbeCache(project_dir)
+    fingerprint = content_fingerprint(video_path)
+    probe = cache.get(fingerprint, video_path)
+    if probe is None:
+        probe = probe_video(video_path, ffprobe_path)
+        cache.put(fingerprint, probe)
+        if own_cache:
+            cache.save()
+    return probe
+
+
+def probe_videos(
+    video_paths: Iterable[str | Path],
+    project_dir: Optional[str | Path] = None,
+    workers: int = 4,
+    ffprobe_path: Optional[str] = None,
+) -> list[BatchProbeResult]:
+    paths = [str(path) for path in video_paths]
+    cache = ProbeCache(project_dir) if project_dir is not None else None
+    results: dict[str, BatchProbeResult] = {}
+    fingerprints: dict[str, str] = {}
+    pending: list[str] = []
+
+    for path in paths:
+        if cache is None:
+            pending.append(path)
+            continue
+        try:
+            fingerprints[path] = content_fingerprint(path)
+        except OSError as exc:
+            results[path] = BatchProbeResult(path, None, str(exc))
+            continue
+        cached = cache.get(fingerprints[path], path)
+        if cached is not None:
+            results[path] = BatchProbeResult(path, cached)
+        else:
+            pending.append(path)
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=max(workers, 1)) as pool:
+            futures = {
+                path: pool.submit(probe_video, path, ffprobe_path) for path in pending
+            }
+            for path, future in futures.items():
+                try:
+                    probe = future.result()
+                except (RuntimeError, ValueError, OSError) as exc:
+                    results[path] = BatchProbeResult(path, None, str(exc))
+                    continue
+                results[path] = BatchProbeResult(path, probe)
+                if cache is not None:
+                    cache.put(fingerprints[path], probe)
+
+    if cache is not None:
+        cache.save()
+    return [results[path] for path in paths]
+
+
 def _parse_fps(value: str | None) -> float:
     if not value:
         return 0.0
@@ -89,3 +234,49 @@ def _parse_total_frames(nb_frames: str | None, duration_s: float, fps: float) ->
     if duration_s > 0 and fps > 0:
         return int(round(duration_s * fps))
     return 0
+
+
+def _parse_rotation(stream: dict[str, object]) -> int:
+    for side_data in stream.get("side_data_list", []) or []:
+        if isinstance(side_data, dict) and "rotation" in side_data:
+            try:
+                return int(float(side_data["rotation"])) % 360
+            except (TypeError, ValueError):
+                break
+    tags = stream.get("tags") or {}
+    if isinstance(tags, dict) and tags.get("rotate"):
+        try:
+            return int(float(tags["rotate"])) % 360
+        except (TypeError, ValueError):
+            return 0
+    return 0
+
+
+def _estimate_gop_size(packets: list[dict[str, str]]) -> int:
+    keyframes = [
+        idx for idx, packet in enumerate(packets) if "K" in (packet.get("flags") or "")
+    ]
+    if len(keyframes) < 2:
+        return 0
+    gaps = [right - left for left, right in zip(keyframes, keyframes[1:])]
+    return max(gaps)
+
+
+def _detect_vfr(
+    avg_fps: float, real_fps: float, packets: list[dict[str, str]]
+) -> bool:
+    if avg_fps > 0 and real_fps > 0:
+        if abs(avg_fps - real_fps) / real_fps > _VFR_TOLERANCE:
+            return True
+    pts: list[float] = []
+    for packet in packets:
+        try:
+            pts.append(float(packet["pts_time"]))
+        except (KeyError, TypeError, ValueError):
+            continue
+    pts.sort()
+    deltas = [right - left for left, right in zip(pts, pts[1:]) if right > left]
+    if len(deltas) < 2:
+        return False
+    shortest = min(deltas)
+    return max(deltas) - shortest > max(shortest * _VFR_TOLERANCE * 10, 1e-3)
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import csv
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+DEFAULT_SPEC_FPS = 5.0
+
+
+@dataclass(frozen=True)
+class RangeSpec:
+    video_path: Path
+    start_ms: int = 0
+    end_ms: Optional[int] = None
+    fps: float = DEFAULT_SPEC_FPS
+    count: int = 0
+
+    def resolve(self, duration_ms: int) -> tuple[int, int, float]:
+        end_ms = duration_ms if self.end_ms is None else min(self.end_ms, duration_ms)
+        start_ms = max(min(self.start_ms, end_ms), 0)
+        fps = self.fps
+        if self.count > 0 and end_ms > start_ms:
+            fps = self.count / ((end_ms - start_ms) / 1000.0)
+        return start_ms, end_ms, fps
+
+
+def load_range_specs(
+    spec_path: str | Path, default_fps: float = DEFAULT_SPEC_FPS
+) -> list[RangeSpec]:
+    path = Path(spec_path)
+    if path.suffix.lower() == ".csv":
+        return _load_csv_specs(path, default_fps)
+    try:
+        payload = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError) as exc:
+        raise ValueError(f"无法读取任务文件: {path} ({exc})") from exc
+    if isinstance(payload, list):
+        payload = {"videos": payload}
+    if not isinstance(payload, dict):
+        raise ValueError(f"任务文件格式错误: {path}")
+
+    default_fps = _positive_fps(payload.get("fps", default_fps), "fps")
+    specs: list[RangeSpec] = []
+    for idx, entry in enumerate(payload.get("videos") or [], start=1):
+        if not isinstance(entry, dict):
+            raise ValueError(f"任务第 {idx} 项格式错误，应为对象: {entry!r}")
+        specs.extend(_parse_video_entry(entry, path.parent, default_fps))
+    return specs
+
+
+def _load_csv_specs(path: Path, default_fps: float) -> list[RangeSpec]:
+    try:
+        with path.open("r", newline="", encoding="utf-8-sig") as handle:
+            rows = list(csv.DictReader(handle))
+    except OSError as exc:
+        raise ValueError(f"无法读取任务文件: {path} ({exc})") from exc
+
+    specs: list[RangeSpec] = []
+    for line_no, row in enumerate(rows, start=2):
+        raw_path = (row.get("video") or row.get("path") or "").strip()
+        if not raw_path:
+            raise ValueError(f"任务文件第 {line_no} 行缺少视频路径")
+        video_path = _resolve_spec_path(raw_path, path.parent)
+        start = (row.get("start_ms") or "").strip()
+        end = (row.get("end_ms") or "").strip()
+        try:
+            fps = float(row.get("fps") or default_fps)
+            start_ms = int(start or 0)
+            end_ms = int(end) if end else None
+        except ValueError as exc:
+            raise ValueError(f"任务文件第 {line_no} 行数值无效: {exc}") from exc
+        if fps <= 0:
+            raise ValueError(f"任务文件第 {line_no} 行 fps 必须大于 0: {fps}")
+        if not start and not end:
+            specs.append(RangeSpec(video_path, fps=fps))
+            continue
+        if end_ms is not None and end_ms <= start_ms:
+            raise ValueError(f"任务文件第 {line_no} 行区间无效: {start_ms} -> {end_ms}")
+        specs.append(RangeSpec(video_path, start_ms, end_ms, fps))
+    return specs
+
+
+def _positive_fps(value: object, name: str) -> float:
+    fps = float(value)
+    if not fps > 0:
+        raise ValueError(f"{name} 必须大于 0: {value}")
+    return fps
+
+
+def _positive_option(options: dict[str, object], name: str) -> int:
+    if name not in options:
+        return 0
+    value = int(options[name])
+    if value <= 0:
+        raise ValueError(f"uniform.{name} 必须大于 0: {options[name]}")
+    return value
+
+
+def _resolve_spec_path(raw_path: str, base_dir: Path) -> Path:
+    video_path = Path(raw_path).expanduser()
+    if not video_path.is_absolute():
+        video_path = base_dir / video_path
+    return video_path.resolve()
+
+
+def _parse_video_entry(
+    entry: dict[str, object], base_dir: Path, default_fps: float
+) -> list[RangeSpec]:
+    raw_path = entry.get("path") or entry.get("video")
+    if not raw_path:
+        raise ValueError("任务缺少视频路径 (path)")
+    video_path = _resolve_spec_path(str(raw_path), base_dir)
+    fps = _positive_fps(entry.get("fps", default_fps), "fps")
+
+    specs: list[RangeSpec] = []
+    for item in entry.get("ranges") or []:
+        if isinstance(item, dict):
+            start_ms = int(item["start_ms"])
+            end_ms = int(item["end_ms"])
+            item_fps = _positive_fps(item.get("fps", fps), "fps")
+        else:
+            start_ms, end_ms = (int(value) for value in item)
+            item_fps = fps
+        if end_ms <= start_ms:
+            raise ValueError(f"区间无效: {video_path} {start_ms} -> {end_ms}")
+        specs.append(RangeSpec(video_path, start_ms, end_ms, item_fps))
+
+    uniform = entry.get("uniform")
+    if uniform:
+        options = uniform if isinstance(uniform, dict) else {}
+        interval_ms = _positive_option(options, "interval_ms")
+        uniform_fps = _positive_fps(options.get("fps", fps), "uniform.fps")
+        if interval_ms > 0:
+            uniform_fps = 1000.0 / interval_ms
+        specs.append(
+            RangeSpec(
+                video_path,
+                fps=uniform_fps,
+                count=_positive_option(options, "count"),
+            )
+        )
+    return specs
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, Optional
+
+from core.video.extractor import build_extract_command
+from core.video.probe import VideoProbe
+from utils.ffmpeg_check import get_toolchain, toolchain_cache_path
+
+TUNING_CACHE_NAME = "ffmpeg_tuning.json"
+TUNING_CACHE_VERSION = 1
+DEFAULT_THREADS = 2
+DEFAULT_SAMPLE_MS = 4000
+DEFAULT_SAMPLE_FPS = 5.0
+
+
+@dataclass(frozen=True)
+class FFmpegConfig:
+    threads: int = DEFAULT_THREADS
+    filter_threads: int = 1
+
+    def processes(self, cpu_budget: int) -> int:
+        return max(cpu_budget // max(self.threads, 1), 1)
+
+
+@dataclass(frozen=True)
+class TuningResult:
+    config: FFmpegConfig
+    processes: int
+    wall_s: float
+    throughput: float
+
+
+def default_cpu_budget() -> int:
+    return os.cpu_count() or 1
+
+
+def tuning_key(probe: VideoProbe, cpu_budget: int) -> str:
+    codec = probe.codec_name or "unknown"
+    return f"{codec}|{probe.width}x{probe.height}|{cpu_budget}"
+
+
+def tuning_cache_path() -> Path:
+    return toolchain_cache_path().with_name(TUNING_CACHE_NAME)
+
+
+class TuningCache:
+    def __init__(self, path: Optional[str | Path] = None) -> None:
+        self._path = Path(path) if path is not None else tuning_cache_path()
+        self._lock = threading.Lock()
+        self._entries: dict[str, dict[str, object]] = self._load()
+        self._dirty = False
+
+    def get(self, key: str) -> Optional[FFmpegConfig]:
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        try:
+            return FFmpegConfig(
+                threads=int(entry["threads"]),
+                filter_threads=int(entry["filter_threads"]),
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def put(self, key: str, result: TuningResult) -> None:
+        with self._lock:
+            self._entries[key] = {
+                "threads": result.config.threads,
+                "filter_threads": result.config.filter_threads,
+                "processes": result.processes,
+                "throughput": round(result.throughput, 3),
+                "tuned_at": int(time.time()),
+            }
+            self._dirty = True
+
+    def save(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = {"version": TUNING_CACHE_VERSION, "entries": self._entries}
+            try:
+                self._path.parent.mkdir(parents=True, exist_ok=True)
+                temp_path = self._path.with_name(
+                    self._path.name + f".{os.getpid()}.tmp"
+                )
+                temp_path.write_text(
+                    json.dumps(payload, ensure_ascii=False, indent=2), encoding="utf-8"
+                )
+                os.replace(temp_path, self._path)
+            except OSError:
+                return
+            self._dirty = False
+
+    def _load(self) -> dict[str, dict[str, object]]:
+        try:
+            payload = json.loads(self._path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(payload, dict) or payload.get("version") != TUNING_CACHE_VERSION:
+            return {}
+        entries = payload.get("entries", {})
+        return entries if isinstance(entries, dict) else {}
+
+
+class CoreBudget:
+    def __init__(self, total: int) -> None:
+        self._total = max(total, 1)
+        self._free = self._total
+        self._condition = threading.Condition()
+
+    @property
+    def total(self) -> int:
+        return self._total
+
+    @contextmanager
+    def reserve(self, cores: int) -> Iterator[None]:
+        cores = min(max(cores, 1), self._total)
+        with self._condition:
+            while self._free < cores:
+                self._condition.wait()
+            self._free -= cores
+        try:
+            yield
+        finally:
+            with self._condition:
+                self._free += cores
+                self._condition.notify_all()
+
+
+def resolve_config(
+    probe: VideoProbe, cpu_budget: int, cache: Optional[TuningCache] = None
+) -> FFmpegConfig:
+    if cache is not None:
+        tuned = cache.get(tuning_key(probe, cpu_budget))
+        if tuned is not None:
+            return tuned
+    return FFmpegConfig(threads=min(DEFAULT_THREADS, max(cpu_budget, 1)))
+
+
+def candidate_configs(cpu_budget: int) -> list[FFmpegConfig]:
+    candidates: list[FFmpegConfig] = []
+    threads = 1
+    while threads <= max(cpu_budget, 1):
+        candidates.append(FFmpegConfig(threads=threads, filter_threads=1))
+        if threads >= 4:
+            candidates.append(FFmpegConfig(threads=threads, filter_threads=threads // 2))
+        threads *= 2
+    return candidates
+
+
+def autotune(
+    video_path: str | Path,
+    probe: VideoProbe,
+    cpu_budget: Optional[int] = None,
+    sample_ms: int = DEFAULT_SAMPLE_MS,
+    fps: float = DEFAULT_SAMPLE_FPS,
+    hwaccel: bool = False,
+    ffmpeg_dir: Optional[Path] = None,
+) -> list[TuningResult]:
+    budget = cpu_budget or default_cpu_budget()
+    toolchain = get_toolchain(ffmpeg_dir)
+    duration_ms = max(int(probe.duration_s * 1000), 1)
+    sample_ms = min(sample_ms, duration_ms)
+
+    results: list[TuningResult] = []
+    for config in candidate_configs(budget):
+        processes = config.processes(budget)
+        span_ms = max(duration_ms - sample_ms, 0)
+        offsets = [span_ms * idx // max(processes, 1) for idx in range(processes)]
+        temp_root = Path(tempfile.mkdtemp(prefix="bubforge_tune_"))
+        try:
+            started = time.perf_counter()
+            running = []
+            for idx, offset in enumerate(offsets):
+                out_dir = temp_root / str(idx)
+                out_dir.mkdir()
+                cmd = build_extract_command(
+                    toolchain,
+                    video_path,
+                    offset / 1000.0,
+                    (offset + sample_ms) / 1000.0,
+                    fps,
+                    str(out_dir / "frame_%07d.jpg"),
+                    hwaccel,
+                    threads=config.threads,
+                    filter_threads=config.filter_threads,
+                )
+                running.append(
+                    subprocess.Popen(
+                        cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+                    )
+                )
+            failed = any([process.wait() != 0 for process in running])
+            wall_s = time.perf_counter() - started
+        finally:
+            shutil.rmtree(temp_root, ignore_errors=True)
+        if failed:
+            continue
+        throughput = processes * (sample_ms / 1000.0) / max(wall_s, 1e-6)
+        results.append(TuningResult(config, processes, wall_s, throughput))
+
+    results.sort(key=lambda result: result.throughput, reverse=True)
+    return results
+
+
+def autotune_cached(
+    video_path: str | Path,
+    probe: VideoProbe,
+    cpu_budget: Optional[int] = None,
+    cache: Optional[TuningCache] = None,
+    **options: object,
+) -> Optional[TuningResult]:
+    budget = cpu_budget or default_cpu_budget()
+    own_cache = cache is None
+    cache = cache or TuningCache()
+    results = autotune(video_path, probe, budget, **options)
+    if not results:
+        return None
+    cache.put(tuning_key(probe, budget), results[0])
+    if own_cache:
+        cache.save()
+    return results[0]
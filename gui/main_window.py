@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import time
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Optional
@@ -23,25 +24,32 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
+from core.export.presets import save_preset
 from core.export.registry import get_exporter
-from core.metadata.reader import read_frames_csv
-from core.metadata.frames_csv import append_frame_records
+from core.metadata.coverage import load_range_coverage
+from core.metadata.query import FrameQuery, load_frame_index
+from core.metadata.journal import FrameJournal
 from core.project.manager import (
     ensure_video_subdirs,
-    get_video_folder_name,
     init_project,
+    resolve_video_folder,
 )
-from core.project.sources import append_source, normalize_source_path
 from core.video.capture import VideoCaptureController
 from core.video.extractor import extract_range_frames
 from core.video.frame_writer import save_keyframe
+from core.video.pool import CapturePool, PooledVideo, VideoMarkers
 from gui.shortcuts import ShortcutMap
 from gui.style import app_stylesheet
+from gui.timecode import format_ms
 from gui.widgets.export_panel import ExportPanel
+from gui.widgets.metrics_hud import MetricsHud
 from gui.widgets.selection_panel import SelectionPanel
 from gui.widgets.timeline import TimelineWidget
+from gui.widgets.video_bin import VideoBinPanel
 from gui.widgets.video_player import VideoPlayerWidget
 from utils.ffmpeg_check import ensure_ffmpeg
+from utils.logging_config import configure_logging
+from utils.metrics import increment, observe, start_metrics_dump
 
 
 @dataclass
@@ -65,13 +73,19 @@ class MainWindow(QMainWindow):
 
         self.shortcut_map = ShortcutMap()
         self.capture = VideoCaptureController()
+        self.video_pool = CapturePool()
+        self.video_entry: Optional[PooledVideo] = None
+        self.video_markers: dict[Path, VideoMarkers] = {}
         self.play_timer = QTimer(self)
         self.play_timer.timeout.connect(self._on_playback_tick)
         self.seek_timer = QTimer(self)
         self.seek_timer.timeout.connect(self._on_seek_tick)
         self.seek_direction = 0
+        self._play_interval_ms = 0
+        self._last_tick_at: Optional[float] = None
 
         self.project_dir: Optional[Path] = None
+        self.journal: Optional[FrameJournal] = None
         self.video_path: Optional[Path] = None
         self.video_id: Optional[str] = None
         self.video_folder: Optional[str] = None
@@ -139,6 +153,7 @@ class MainWindow(QMainWindow):
         self.viewer_scroll.setFrameShape(QFrame.Shape.NoFrame)
         self.viewer_scroll.setAlignment(Qt.AlignmentFlag.AlignCenter)
         viewer_layout.addWidget(self.viewer_scroll)
+        self.metrics_hud = MetricsHud(self.viewer_scroll)
 
         transport = self._card_frame("TransportBar")
         transport_layout = QHBoxLayout(transport)
@@ -189,12 +204,16 @@ class MainWindow(QMainWindow):
         self.selection_panel = SelectionPanel()
         self.export_panel = ExportPanel()
         self.export_panel.export_button.clicked.connect(self.export_action)
+        self.video_bin = VideoBinPanel()
+        self.video_bin.videoActivated.connect(self._on_bin_video_activated)
 
         self.timeline_dock = self._make_dock("时间线", self.timeline)
         self.selection_dock = self._make_dock("素材选择", self.selection_panel)
         self.export_dock = self._make_dock("导出面板", self.export_panel)
+        self.video_bin_dock = self._make_dock("视频素材箱", self.video_bin)
 
         self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.timeline_dock)
+        self.addDockWidget(Qt.DockWidgetArea.LeftDockWidgetArea, self.video_bin_dock)
         self.addDockWidget(Qt.DockWidgetArea.LeftDockWidgetArea, self.selection_dock)
         self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.export_dock)
 
@@ -213,8 +232,14 @@ class MainWindow(QMainWindow):
 
         view_menu = self.menuBar().addMenu("视图")
         view_menu.addAction(self.timeline_dock.toggleViewAction())
+        view_menu.addAction(self.video_bin_dock.toggleViewAction())
         view_menu.addAction(self.selection_dock.toggleViewAction())
         view_menu.addAction(self.export_dock.toggleViewAction())
+        view_menu.addSeparator()
+        action_hud = QAction("性能浮层", self)
+        action_hud.setCheckable(True)
+        action_hud.toggled.connect(self.metrics_hud.set_active)
+        view_menu.addAction(action_hud)
 
     def _install_shortcut_actions(self) -> None:
         self._shortcut_actions: list[QAction] = []
@@ -282,9 +307,16 @@ class MainWindow(QMainWindow):
         directory = QFileDialog.getExistingDirectory(self, "选择项目目录")
         if not directory:
             return
+        if self.journal is not None:
+            self.journal.close()
+        self._unload_video()
         self.project_dir = Path(directory)
-        init_project(self.project_dir)
+        paths = init_project(self.project_dir)
+        configure_logging(paths.logs_dir)
+        start_metrics_dump(paths.logs_dir / "metrics.json")
+        self.journal = FrameJournal(self.project_dir)
         self.project_label.setText(f"项目：{self.project_dir}")
+        self.video_bin.load_project(self.project_dir)
 
     def open_video(self) -> None:
         if self.project_dir is None:
@@ -294,36 +326,102 @@ class MainWindow(QMainWindow):
         video_path, _ = QFileDialog.getOpenFileName(self, "选择视频文件")
         if not video_path:
             return
+        self.load_video(Path(video_path))
 
-        self.video_path = Path(video_path)
-        self.video_folder = get_video_folder_name(self.video_path)
-        self.video_id = self.video_folder
-        ensure_video_subdirs(self.project_dir, self.video_folder)
-        relpath = normalize_source_path(self.project_dir, self.video_path)
-        append_source(self.project_dir / "sources.csv", self.video_id, relpath)
-
-        self.in_ms = None
-        self.out_ms = None
-        self.ranges.clear()
-        self.keyframe_indices.clear()
+    def load_video(self, video_path: Path) -> None:
+        if self.project_dir is None:
+            return
+        self.play_timer.stop()
+        self.play_button.setText("播放")
+        self._stash_current_video()
+        try:
+            entry = self.video_pool.acquire(video_path)
+        except RuntimeError as exc:
+            QMessageBox.warning(self, "视频", str(exc))
+            return
+        if entry.video_folder is None:
+            entry.video_folder = resolve_video_folder(
+                self.project_dir, entry.video_path
+            )
+            ensure_video_subdirs(self.project_dir, entry.video_folder)
+
+        self.video_entry = entry
+        self.capture = entry.capture
+        self.video_path = entry.video_path
+        self.video_folder = entry.video_folder
+        self.video_id = entry.video_folder
+
+        markers = self.video_markers.get(entry.video_path) or self._load_markers()
+        self.in_ms = markers.in_ms
+        self.out_ms = markers.out_ms
+        self.ranges = [RangeEntry(*item) for item in markers.ranges]
+        self.keyframe_indices = {index for _, index in markers.keyframes}
         self.selection_panel.clear_all()
-        self.timeline.clear_keyframe_markers()
+        self.selection_panel.set_keyframes(markers.keyframes)
+        for entry_range in self.ranges:
+            self.selection_panel.add_range(entry_range.in_ms, entry_range.out_ms)
+
+        self.timeline.set_video_info(self.capture.total_frames, self.capture.fps)
+        self.timeline.set_keyframe_markers(sorted(self.keyframe_indices))
+        self.timeline.set_coverage(markers.coverage)
         self._refresh_in_out()
 
-        self.capture.open(self.video_path)
-        self.current_frame_index = 0
-        frame = self.capture.get_frame_at(self.current_frame_index)
+        self.current_frame_index = entry.last_frame_index
+        frame = self._frame_at(self.current_frame_index)
         if frame is not None:
-            self.current_timestamp_ms = frame.timestamp_ms
-            self.player.set_frame(frame.image)
-
-        self.timeline.set_video_info(self.capture.total_frames, self.capture.fps)
-        self.timeline.set_position(self.current_frame_index)
-        self._load_existing_keyframes()
-        self._update_status_labels(self.current_frame_index)
+            self._update_frame(frame.frame_index, frame.timestamp_ms, frame.image)
+        else:
+            self.timeline.set_position(self.current_frame_index)
+            self._update_status_labels(self.current_frame_index)
         self._sync_viewport()
         self.video_label.setText(f"视频：{self.video_path.name}")
 
+        if not self.video_bin.contains(self.video_path):
+            self.video_bin.load_project(self.project_dir)
+        self.video_bin.set_current(self.video_path)
+        next_video = self.video_bin.next_after(self.video_path)
+        if next_video is not None:
+            self.video_pool.preopen(next_video)
+
+    def _on_bin_video_activated(self, video_path: str) -> None:
+        path = Path(video_path)
+        if not path.exists():
+            QMessageBox.warning(self, "视频", f"找不到视频文件：{path}")
+            return
+        self.load_video(path)
+
+    def _stash_current_video(self) -> None:
+        entry = self.video_entry
+        if entry is None:
+            return
+        entry.last_frame_index = self.current_frame_index
+        self.video_markers[entry.video_path] = VideoMarkers(
+            in_ms=self.in_ms,
+            out_ms=self.out_ms,
+            ranges=[(item.in_ms, item.out_ms) for item in self.ranges],
+            keyframes=self.selection_panel.keyframes(),
+            coverage=self.timeline.coverage,
+        )
+
+    def _unload_video(self) -> None:
+        self.play_timer.stop()
+        self.play_button.setText("播放")
+        self.video_pool.close_all()
+        self.video_markers.clear()
+        self.video_entry = None
+        self.capture = VideoCaptureController()
+        self.video_path = None
+        self.video_folder = None
+        self.video_id = None
+        self.in_ms = None
+        self.out_ms = None
+        self.ranges = []
+        self.keyframe_indices = set()
+        self.selection_panel.clear_all()
+        self.timeline.clear_keyframe_markers()
+        self._refresh_in_out()
+        self.video_label.setText("视频：未加载")
+
     def toggle_play(self) -> None:
         if self.play_timer.isActive():
             self.play_timer.stop()
@@ -332,11 +430,21 @@ class MainWindow(QMainWindow):
         if not self._ensure_video_loaded():
             return
         interval = int(round(1000 / max(self.capture.fps, 1.0)))
+        self._play_interval_ms = interval
+        self._last_tick_at = None
         self.play_timer.start(interval)
         self.play_button.setText("暂停")
 
     def _on_playback_tick(self) -> None:
-        frame = self.capture.read_next()
+        now = time.perf_counter()
+        if self._last_tick_at is not None and self._play_interval_ms > 0:
+            elapsed_ms = (now - self._last_tick_at) * 1000
+            observe("player.tick_interval", elapsed_ms)
+            late_frames = int(elapsed_ms / self._play_interval_ms + 0.5) - 1
+            if late_frames > 0:
+                increment("player.dropped_frames", late_frames)
+        self._last_tick_at = now
+        frame = None if self.video_entry is None else self.video_entry.read_next()
         if frame is None:
             self.play_timer.stop()
             self.play_button.setText("播放")
@@ -347,7 +455,7 @@ class MainWindow(QMainWindow):
         if not self._ensure_video_loaded():
             return
         target = max(self.current_frame_index - 1, 0)
-        frame = self.capture.get_frame_at(target)
+        frame = self._frame_at(target)
         if frame is not None:
             self._update_frame(frame.frame_index, frame.timestamp_ms, frame.image)
 
@@ -355,14 +463,14 @@ class MainWindow(QMainWindow):
         if not self._ensure_video_loaded():
             return
         target = min(self.current_frame_index + 1, self.capture.total_frames - 1)
-        frame = self.capture.get_frame_at(target)
+        frame = self._frame_at(target)
         if frame is not None:
             self._update_frame(frame.frame_index, frame.timestamp_ms, frame.image)
 
     def seek_to_frame(self, frame_index: int) -> None:
         if not self._ensure_video_loaded():
             return
-        frame = self.capture.get_frame_at(frame_index)
+        frame = self._frame_at(frame_index)
         if frame is not None:
             self._update_frame(frame.frame_index, frame.timestamp_ms, frame.image)
 
@@ -398,9 +506,7 @@ class MainWindow(QMainWindow):
         if self._has_range(entry):
             return
         self.ranges.append(entry)
-        self.selection_panel.add_range(
-            f"{self._format_ms(entry.in_ms)} -> {self._format_ms(entry.out_ms)}"
-        )
+        self.selection_panel.add_range(entry.in_ms, entry.out_ms)
 
     def save_keyframe_action(self) -> None:
         if not self._ensure_video_loaded():
@@ -415,7 +521,7 @@ class MainWindow(QMainWindow):
         if video_path is None:
             return
 
-        frame = self.capture.get_frame_at(self.current_frame_index)
+        frame = self._frame_at(self.current_frame_index)
         if frame is None:
             return
 
@@ -428,18 +534,18 @@ class MainWindow(QMainWindow):
                 timestamp_ms=frame.timestamp_ms,
                 frame_index=frame.frame_index,
                 image=frame.image,
+                journal=self.journal,
             )
+            if self.journal is not None:
+                self.journal.flush()
         except RuntimeError as exc:
             QMessageBox.warning(self, "关键帧", str(exc))
             return
 
         if record is not None:
-            append_frame_records(self.project_dir / "metadata" / "frames.csv", [record])
             self.keyframe_indices.add(frame.frame_index)
             self.timeline.add_keyframe_marker(frame.frame_index)
-            self.selection_panel.add_keyframe(
-                f"{self._format_ms(frame.timestamp_ms)} / f{frame.frame_index}"
-            )
+            self.selection_panel.add_keyframe(frame.timestamp_ms, frame.frame_index)
             self.step_next()
 
     def export_action(self) -> None:
@@ -449,8 +555,18 @@ class MainWindow(QMainWindow):
         output_dir = QFileDialog.getExistingDirectory(self, "选择导出目录")
         if not output_dir:
             return
-        exporter = get_exporter(self.export_panel.current_format())
-        exporter(self.project_dir, output_dir)
+        preset = self.export_panel.current_preset()
+        exporter = get_exporter(preset.format)
+        exporter(
+            self.project_dir,
+            output_dir,
+            link_mode=preset.link_mode,
+            prune=preset.prune,
+            workers=preset.workers,
+            query=self.export_panel.current_query(self.video_id),
+            transforms=preset.transforms or None,
+        )
+        save_preset(output_dir, preset)
         QMessageBox.information(self, "完成", "导出完成")
 
     def _export_ranges(self) -> None:
@@ -477,10 +593,12 @@ class MainWindow(QMainWindow):
         if not self.ranges:
             QMessageBox.warning(self, "提示", "请先添加区间")
             return
+        entries = self._confirm_covered_ranges(self.ranges)
+        if entries is None:
+            return
 
-        records = []
-        for entry in self.ranges:
-            result = extract_range_frames(
+        for entry in entries:
+            extract_range_frames(
                 project_dir=self.project_dir,
                 video_path=video_path,
                 video_folder=self.video_folder,
@@ -490,34 +608,77 @@ class MainWindow(QMainWindow):
                 end_ms=entry.out_ms,
                 fps=fps,
                 video_fps=self.capture.fps,
+                journal=self.journal,
             )
-            records.extend(result.records)
-        append_frame_records(self.project_dir / "metadata" / "frames.csv", records)
+        if self.journal is not None:
+            self.journal.flush()
+        coverage = self.timeline.coverage
+        for entry in entries:
+            coverage.add(entry.in_ms, entry.out_ms)
+        self.timeline.set_coverage(coverage)
         QMessageBox.information(self, "完成", "区间抽帧完成")
 
+    def _confirm_covered_ranges(
+        self, entries: list[RangeEntry]
+    ) -> Optional[list[RangeEntry]]:
+        coverage = self.timeline.coverage
+        covered = [
+            entry
+            for entry in entries
+            if coverage.covered_length(entry.in_ms, entry.out_ms) > 0
+        ]
+        if not covered:
+            return list(entries)
+        lines = [
+            f"{format_ms(entry.in_ms)} -> {format_ms(entry.out_ms)}"
+            for entry in covered[:10]
+        ]
+        if len(covered) > len(lines):
+            lines.append(f"…… 共 {len(covered)} 个")
+        box = QMessageBox(self)
+        box.setIcon(QMessageBox.Icon.Warning)
+        box.setWindowTitle("区间已抽过帧")
+        box.setText("以下区间与之前抽过的片段重叠：\n" + "\n".join(lines))
+        again = box.addButton("全部重新抽取", QMessageBox.ButtonRole.AcceptRole)
+        skip = box.addButton(
+            "跳过已完全覆盖的区间", QMessageBox.ButtonRole.ActionRole
+        )
+        box.addButton(QMessageBox.StandardButton.Cancel)
+        box.exec()
+        clicked = box.clickedButton()
+        if clicked is again:
+            return list(entries)
+        if clicked is skip:
+            return [
+                entry
+                for entry in entries
+                if not coverage.is_fully_covered(entry.in_ms, entry.out_ms)
+            ]
+        return None
+
     def _has_range(self, entry: RangeEntry) -> bool:
         return any(
             r.in_ms == entry.in_ms and r.out_ms == entry.out_ms for r in self.ranges
         )
 
-    def _load_existing_keyframes(self) -> None:
+    def _load_markers(self) -> VideoMarkers:
         if self.project_dir is None or self.video_id is None:
-            return
+            return VideoMarkers()
         frames_csv = self.project_dir / "metadata" / "frames.csv"
-        rows = read_frames_csv(frames_csv)
-        key_rows = [
-            row
-            for row in rows
-            if row.video_id == self.video_id and row.kind == "keyframe"
-        ]
-        if not key_rows:
-            return
-        self.keyframe_indices = {row.frame_index for row in key_rows}
-        self.timeline.set_keyframe_markers(sorted(self.keyframe_indices))
-        for row in sorted(key_rows, key=lambda r: r.timestamp_ms):
-            self.selection_panel.add_keyframe(
-                f"{self._format_ms(row.timestamp_ms)} / f{row.frame_index}"
-            )
+        key_rows = load_frame_index(frames_csv).select(
+            FrameQuery.create(video_ids=[self.video_id], kinds=["keyframe"])
+        )
+        return VideoMarkers(
+            keyframes=[(row.timestamp_ms, row.frame_index) for row in key_rows],
+            coverage=load_range_coverage(self.project_dir, self.video_id),
+        )
+
+    def _frame_at(self, frame_index: int):
+        if self.video_entry is None:
+            return None
+        frame = self.video_entry.frame_at(frame_index)
+        self.video_pool.enforce_memory_cap()
+        return frame
 
     def _ensure_video_loaded(self) -> bool:
         if self.video_path is None:
@@ -533,6 +694,7 @@ class MainWindow(QMainWindow):
         self.current_timestamp_ms = timestamp_ms
         self.player.set_frame(image)
         self.timeline.set_position(frame_index)
+        self.selection_panel.jump_to(timestamp_ms)
         self._update_status_labels(frame_index)
 
     def _update_status_labels(self, frame_index: int) -> None:
@@ -541,7 +703,7 @@ class MainWindow(QMainWindow):
         current_ms = int(round((frame_index / max(fps, 1e-6)) * 1000))
         total_ms = int(round((total_frames / max(fps, 1e-6)) * 1000))
         self.timecode_label.setText(
-            f"{self._format_ms(current_ms)} / {self._format_ms(total_ms)}"
+            f"{format_ms(current_ms)} / {format_ms(total_ms)}"
         )
         self.frame_label.setText(f"f{frame_index} / f{total_frames}")
         self.fps_label.setText(f"FPS: {fps:.2f}" if fps > 0 else "FPS: --")
@@ -549,20 +711,17 @@ class MainWindow(QMainWindow):
     def _sync_viewport(self) -> None:
         self.player.set_viewport_size(self.viewer_scroll.viewport().size())
 
-    def _format_ms(self, timestamp_ms: int) -> str:
-        total_seconds = max(timestamp_ms, 0) / 1000.0
-        minutes = int(total_seconds // 60)
-        seconds = total_seconds % 60
-        return f"{minutes:02d}:{seconds:06.3f}"
-
     def _reset_dock_layout(self) -> None:
         self.removeDockWidget(self.timeline_dock)
+        self.removeDockWidget(self.video_bin_dock)
         self.removeDockWidget(self.selection_dock)
         self.removeDockWidget(self.export_dock)
         self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, self.timeline_dock)
+        self.addDockWidget(Qt.DockWidgetArea.LeftDockWidgetArea, self.video_bin_dock)
         self.addDockWidget(Qt.DockWidgetArea.LeftDockWidgetArea, self.selection_dock)
         self.addDockWidget(Qt.DockWidgetArea.RightDockWidgetArea, self.export_dock)
         self.timeline_dock.show()
+        self.video_bin_dock.show()
         self.selection_dock.show()
         self.export_dock.show()
 
@@ -649,7 +808,7 @@ class MainWindow(QMainWindow):
     def _seek_by_frames(self, delta: int) -> None:
         target = self.current_frame_index + delta
         target = max(0, min(target, self.capture.total_frames - 1))
-        frame = self.capture.get_frame_at(target)
+        frame = self._frame_at(target)
         if frame is not None:
             self._update_frame(frame.frame_index, frame.timestamp_ms, frame.image)
 
@@ -667,10 +826,13 @@ class MainWindow(QMainWindow):
         step = int(round(self.capture.fps))
         target = self.current_frame_index + (step * self.seek_direction)
         target = max(0, min(target, self.capture.total_frames - 1))
-        frame = self.capture.get_frame_at(target)
+        frame = self._frame_at(target)
         if frame is not None:
             self._update_frame(frame.frame_index, frame.timestamp_ms, frame.image)
 
     def closeEvent(self, event) -> None:
+        if self.journal is not None:
+            self.journal.close()
+        self.video_pool.shutdown()
         self._save_layout_state()
         super().closeEvent(event)
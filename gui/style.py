@@ -32,6 +32,16 @@ QLabel#Framecode {
     color: #9aa4b3;
 }
 
+QLabel#MetricsHud {
+    background-color: rgba(12, 15, 20, 190);
+    border: 1px solid #242a36;
+    border-radius: 6px;
+    padding: 6px 8px;
+    font-family: "Consolas", "Courier New", monospace;
+    font-size: 12px;
+    color: #9fd0ff;
+}
+
 QLabel#SectionTitle {
     font-size: 14px;
     font-weight: 600;
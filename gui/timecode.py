@@ -0,0 +1,8 @@
+from __future__ import annotations
+
+
+def format_ms(timestamp_ms: int) -> str:
+    total_seconds = max(timestamp_ms, 0) / 1000.0
+    minutes = int(total_seconds // 60)
+    seconds = total_seconds % 60
+    return f"{minutes:02d}:{seconds:06.3f}"
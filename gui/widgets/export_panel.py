@@ -1,28 +1,76 @@
 from __future__ import annotations
 
 from PySide6.QtWidgets import (
+    QCheckBox,
     QComboBox,
     QDoubleSpinBox,
     QHBoxLayout,
     QLabel,
     QPushButton,
+    QSpinBox,
     QVBoxLayout,
     QWidget,
 )
 
+from core.export.common import DEFAULT_IO_WORKERS
+from core.export.presets import ExportPreset
+from core.export.registry import exporter_names
+from core.metadata.query import FrameQuery
+
+LINK_MODE_LABELS = {
+    "复制": "copy",
+    "自动（同盘链接）": "auto",
+    "硬链接": "hardlink",
+    "写时复制 (reflink)": "reflink",
+    "符号链接": "symlink",
+}
+
+KIND_FILTER_LABELS = {
+    "全部帧": (),
+    "仅关键帧": ("keyframe",),
+    "仅区间帧": ("range",),
+}
+
+ENCODE_LABELS = {
+    "保持原格式": "",
+    "PNG (RGB)": "png",
+    "JPEG": "jpg",
+}
+
 
 class ExportPanel(QWidget):
     def __init__(self) -> None:
         super().__init__()
         self.setObjectName("SidePanel")
         self.format_combo = QComboBox()
-        self.format_combo.addItems(
-            [
-                "RawFrames + Metadata",
-                "Ultralytics Skeleton",
-                "COCO Skeleton",
-            ]
-        )
+        self.format_combo.addItems(exporter_names())
+
+        self.link_combo = QComboBox()
+        self.link_combo.addItems(list(LINK_MODE_LABELS))
+
+        self.prune_check = QCheckBox("同步删除项目中已移除的帧")
+
+        self.kind_combo = QComboBox()
+        self.kind_combo.addItems(list(KIND_FILTER_LABELS))
+        self.current_video_check = QCheckBox("仅导出当前视频")
+
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, 64)
+        self.workers_spin.setValue(DEFAULT_IO_WORKERS)
+        self.workers_spin.setSuffix(" 线程")
+
+        self.resize_spin = QSpinBox()
+        self.resize_spin.setRange(0, 8192)
+        self.resize_spin.setSingleStep(32)
+        self.resize_spin.setSpecialValueText("不缩放")
+        self.resize_spin.setSuffix(" px")
+        self.letterbox_check = QCheckBox("等比缩放并填充 (letterbox)")
+        self.encode_combo = QComboBox()
+        self.encode_combo.addItems(list(ENCODE_LABELS))
+        self.quality_spin = QSpinBox()
+        self.quality_spin.setRange(1, 100)
+        self.quality_spin.setValue(95)
+        self.quality_spin.setPrefix("JPEG 质量 ")
 
         self.fps_spin = QDoubleSpinBox()
         self.fps_spin.setRange(0.1, 120.0)
@@ -40,6 +88,24 @@ class ExportPanel(QWidget):
         format_row.addWidget(QLabel("格式"))
         format_row.addStretch(1)
 
+        link_row = QHBoxLayout()
+        link_row.addWidget(QLabel("图片落盘"))
+        link_row.addStretch(1)
+
+        workers_row = QHBoxLayout()
+        workers_row.addWidget(QLabel("并发 IO"))
+        workers_row.addStretch(1)
+        workers_row.addWidget(self.workers_spin)
+
+        scope_row = QHBoxLayout()
+        scope_row.addWidget(QLabel("导出范围"))
+        scope_row.addStretch(1)
+
+        transform_row = QHBoxLayout()
+        transform_row.addWidget(QLabel("图像变换"))
+        transform_row.addStretch(1)
+        transform_row.addWidget(self.resize_spin)
+
         fps_row = QHBoxLayout()
         fps_row.addWidget(QLabel("区间 FPS"))
         fps_row.addStretch(1)
@@ -49,6 +115,20 @@ class ExportPanel(QWidget):
         layout.addLayout(format_row)
         layout.addWidget(self.format_combo)
         layout.addSpacing(8)
+        layout.addLayout(link_row)
+        layout.addWidget(self.link_combo)
+        layout.addWidget(self.prune_check)
+        layout.addSpacing(8)
+        layout.addLayout(scope_row)
+        layout.addWidget(self.kind_combo)
+        layout.addWidget(self.current_video_check)
+        layout.addLayout(workers_row)
+        layout.addSpacing(8)
+        layout.addLayout(transform_row)
+        layout.addWidget(self.letterbox_check)
+        layout.addWidget(self.encode_combo)
+        layout.addWidget(self.quality_spin)
+        layout.addSpacing(8)
         layout.addLayout(fps_row)
         layout.addWidget(self.fps_spin)
         layout.addStretch(1)
@@ -57,5 +137,44 @@ class ExportPanel(QWidget):
     def current_format(self) -> str:
         return self.format_combo.currentText()
 
+    def current_link_mode(self) -> str:
+        return LINK_MODE_LABELS.get(self.link_combo.currentText(), "copy")
+
+    def prune_enabled(self) -> bool:
+        return self.prune_check.isChecked()
+
+    def current_query(self, video_id: str | None = None) -> FrameQuery:
+        video_ids = ()
+        if video_id and self.current_video_check.isChecked():
+            video_ids = (video_id,)
+        kinds = KIND_FILTER_LABELS.get(self.kind_combo.currentText(), ())
+        return FrameQuery.create(video_ids=video_ids, kinds=kinds)
+
+    def current_transforms(self) -> list[dict[str, object]]:
+        transforms: list[dict[str, object]] = []
+        size = int(self.resize_spin.value())
+        if size > 0:
+            op = "letterbox" if self.letterbox_check.isChecked() else "resize"
+            transforms.append({"op": op, "width": size, "height": size})
+        fmt = ENCODE_LABELS.get(self.encode_combo.currentText(), "")
+        if fmt == "jpg":
+            quality = int(self.quality_spin.value())
+            transforms.append({"op": "encode", "format": fmt, "quality": quality})
+        elif fmt:
+            transforms.append({"op": "encode", "format": fmt})
+        return transforms
+
+    def current_preset(self) -> ExportPreset:
+        return ExportPreset(
+            format=self.current_format(),
+            link_mode=self.current_link_mode(),
+            prune=self.prune_enabled(),
+            workers=self.current_workers(),
+            transforms=self.current_transforms(),
+        )
+
+    def current_workers(self) -> int:
+        return int(self.workers_spin.value())
+
     def current_fps(self) -> float:
         return float(self.fps_spin.value())
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from PySide6.QtCore import QTimer
+from PySide6.QtWidgets import QLabel, QWidget
+
+from utils.metrics import REGISTRY, MetricsRegistry
+
+HUD_REFRESH_MS = 500
+HUD_MARGIN = 8
+
+
+class MetricsHud(QLabel):
+    def __init__(self, parent: QWidget, registry: MetricsRegistry = REGISTRY) -> None:
+        super().__init__(parent)
+        self.setObjectName("MetricsHud")
+        self._registry = registry
+        self._timer = QTimer(self)
+        self._timer.setInterval(HUD_REFRESH_MS)
+        self._timer.timeout.connect(self.refresh)
+        self.hide()
+
+    def set_active(self, active: bool) -> None:
+        if active:
+            self.refresh()
+            self.show()
+            self.raise_()
+            self._timer.start()
+        else:
+            self._timer.stop()
+            self.hide()
+
+    def refresh(self) -> None:
+        lines = [
+            self._timer_line("解码", "video.decode"),
+            self._timer_line("渲染", "player.render"),
+            f"丢帧 {self._registry.counter('player.dropped_frames')}",
+        ]
+        self.setText("\n".join(lines))
+        self.adjustSize()
+        self.move(HUD_MARGIN, HUD_MARGIN)
+
+    def _timer_line(self, label: str, name: str) -> str:
+        summary = self._registry.histogram(name)
+        if summary is None:
+            return f"{label} -"
+        return f"{label} p50 {summary['p50_ms']:.1f} / p95 {summary['p95_ms']:.1f} ms"
@@ -1,14 +1,97 @@
 from __future__ import annotations
 
-from PySide6.QtWidgets import QLabel, QListWidget, QTabWidget, QVBoxLayout, QWidget
+from bisect import bisect_left, bisect_right
+from typing import Iterable
+
+from PySide6.QtCore import QAbstractListModel, QModelIndex, QPersistentModelIndex, Qt
+from PySide6.QtWidgets import (
+    QAbstractItemView,
+    QListView,
+    QTabWidget,
+    QVBoxLayout,
+    QWidget,
+)
+
+from gui.timecode import format_ms
+
+BATCH_RESET_THRESHOLD = 256
+
+
+class MarkListModel(QAbstractListModel):
+    def __init__(self, kind: str) -> None:
+        super().__init__()
+        self._kind = kind
+        self._rows: list[tuple[int, int, int]] = []
+        self._starts: list[int] = []
+
+    def rowCount(
+        self, parent: QModelIndex | QPersistentModelIndex = QModelIndex()
+    ) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(
+        self,
+        index: QModelIndex | QPersistentModelIndex,
+        role: int = Qt.ItemDataRole.DisplayRole,
+    ) -> object:
+        if not index.isValid() or not 0 <= index.row() < len(self._rows):
+            return None
+        start_ms, end_ms, frame_index = self._rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            if self._kind == "range":
+                return f"{format_ms(start_ms)} -> {format_ms(end_ms)}"
+            return f"{format_ms(start_ms)} / f{frame_index}"
+        if role == Qt.ItemDataRole.UserRole:
+            return start_ms
+        return None
+
+    def add(self, start_ms: int, end_ms: int, frame_index: int = -1) -> None:
+        row = (start_ms, end_ms, frame_index)
+        position = bisect_left(self._rows, row)
+        if position < len(self._rows) and self._rows[position] == row:
+            return
+        self.beginInsertRows(QModelIndex(), position, position)
+        self._rows.insert(position, row)
+        self._starts.insert(position, start_ms)
+        self.endInsertRows()
+
+    def add_many(self, rows: Iterable[tuple[int, int, int]]) -> None:
+        incoming = sorted(set(rows) - set(self._rows))
+        if not incoming:
+            return
+        if len(incoming) < BATCH_RESET_THRESHOLD:
+            for row in incoming:
+                self.add(*row)
+            return
+        self.beginResetModel()
+        self._rows = sorted(self._rows + incoming)
+        self._starts = [row[0] for row in self._rows]
+        self.endResetModel()
+
+    def set_rows(self, rows: Iterable[tuple[int, int, int]]) -> None:
+        self.beginResetModel()
+        self._rows = sorted(set(rows))
+        self._starts = [row[0] for row in self._rows]
+        self.endResetModel()
+
+    def clear(self) -> None:
+        self.set_rows(())
+
+    def rows(self) -> list[tuple[int, int, int]]:
+        return list(self._rows)
+
+    def row_at_or_before(self, timestamp_ms: int) -> int:
+        return bisect_right(self._starts, timestamp_ms) - 1
 
 
 class SelectionPanel(QWidget):
     def __init__(self) -> None:
         super().__init__()
         self.setObjectName("SidePanel")
-        self.keyframes_list = QListWidget()
-        self.ranges_list = QListWidget()
+        self.keyframes_model = MarkListModel("keyframe")
+        self.ranges_model = MarkListModel("range")
+        self.keyframes_list = _make_list_view(self.keyframes_model)
+        self.ranges_list = _make_list_view(self.ranges_model)
 
         tabs = QTabWidget()
         keyframe_tab = QWidget()
@@ -26,18 +109,54 @@ class SelectionPanel(QWidget):
         layout.setContentsMargins(0, 0, 0, 0)
         layout.addWidget(tabs)
 
-    def add_keyframe(self, label: str) -> None:
-        self.keyframes_list.addItem(label)
+    def add_keyframe(self, timestamp_ms: int, frame_index: int) -> None:
+        self.keyframes_model.add(timestamp_ms, timestamp_ms, frame_index)
+
+    def set_keyframes(self, keyframes: Iterable[tuple[int, int]]) -> None:
+        self.keyframes_model.set_rows(
+            (timestamp_ms, timestamp_ms, frame_index)
+            for timestamp_ms, frame_index in keyframes
+        )
 
-    def add_range(self, label: str) -> None:
-        self.ranges_list.addItem(label)
+    def keyframes(self) -> list[tuple[int, int]]:
+        return [
+            (timestamp_ms, frame_index)
+            for timestamp_ms, _, frame_index in self.keyframes_model.rows()
+        ]
+
+    def add_range(self, in_ms: int, out_ms: int) -> None:
+        self.ranges_model.add(in_ms, out_ms)
+
+    def jump_to(self, timestamp_ms: int) -> None:
+        row = self.keyframes_model.row_at_or_before(timestamp_ms)
+        if row == self.keyframes_list.currentIndex().row():
+            return
+        if row < 0:
+            self.keyframes_list.clearSelection()
+            self.keyframes_list.setCurrentIndex(QModelIndex())
+            return
+        index = self.keyframes_model.index(row)
+        self.keyframes_list.setCurrentIndex(index)
+        self.keyframes_list.scrollTo(
+            index, QAbstractItemView.ScrollHint.PositionAtCenter
+        )
 
     def clear_keyframes(self) -> None:
-        self.keyframes_list.clear()
+        self.keyframes_model.clear()
 
     def clear_ranges(self) -> None:
-        self.ranges_list.clear()
+        self.ranges_model.clear()
 
     def clear_all(self) -> None:
         self.clear_keyframes()
         self.clear_ranges()
+
+
+def _make_list_view(model: MarkListModel) -> QListView:
+    view = QListView()
+    view.setModel(model)
+    view.setUniformItemSizes(True)
+    view.setLayoutMode(QListView.LayoutMode.Batched)
+    view.setBatchSize(512)
+    view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+    return view
@@ -1,7 +1,11 @@
 from __future__ import annotations
 
+import math
+from bisect import bisect_left
+from typing import Optional
+
 from PySide6.QtCore import Qt, Signal
-from PySide6.QtGui import QColor, QPainter, QPainterPath, QPen
+from PySide6.QtGui import QColor, QImage, QPainter, QPainterPath
 from PySide6.QtWidgets import (
     QLabel,
     QHBoxLayout,
@@ -12,6 +16,14 @@ from PySide6.QtWidgets import (
     QStyle,
 )
 
+from core.metadata.coverage import IntervalIndex
+from gui.timecode import format_ms
+
+HEAT_STRIP_HEIGHT = 7
+_COVERAGE_COLOR = QColor(72, 199, 176, 120)
+_HEAT_LOW = QColor(255, 214, 102, 110)
+_HEAT_HIGH = QColor(255, 112, 67, 255)
+
 
 class MarkedSlider(QSlider):
     def __init__(self, orientation: Qt.Orientation) -> None:
@@ -19,6 +31,13 @@ class MarkedSlider(QSlider):
         self._in_value: int | None = None
         self._out_value: int | None = None
         self._key_values: list[int] = []
+        self._key_version = 0
+        self._heat_cache: Optional[QImage] = None
+        self._heat_cache_key: Optional[tuple[int, int, int, int]] = None
+        self._bands: list[tuple[int, int]] = []
+        self._band_version = 0
+        self._band_cache: Optional[QImage] = None
+        self._band_cache_key: Optional[tuple[int, int, int, int, int]] = None
 
     def set_markers(self, in_value: int | None, out_value: int | None) -> None:
         self._in_value = in_value
@@ -26,15 +45,36 @@ class MarkedSlider(QSlider):
         self.update()
 
     def set_key_markers(self, values: list[int]) -> None:
-        unique_values = sorted(
-            {v for v in values if v >= self.minimum() and v <= self.maximum()}
-        )
-        self._key_values = unique_values
+        self._key_values = sorted({v for v in values if v >= 0})
+        self._key_version += 1
+        self.update()
+
+    def add_key_marker(self, value: int) -> None:
+        if value < 0:
+            return
+        position = bisect_left(self._key_values, value)
+        if position < len(self._key_values) and self._key_values[position] == value:
+            return
+        self._key_values.insert(position, value)
+        self._key_version += 1
+        self.update()
+
+    def set_coverage_bands(self, bands: list[tuple[int, int]]) -> None:
+        self._bands = list(bands)
+        self._band_version += 1
         self.update()
 
+    def key_marker_count(self) -> int:
+        return len(self._key_values)
+
     def paintEvent(self, ev) -> None:
         super().paintEvent(ev)
-        if self._in_value is None and self._out_value is None:
+        if (
+            self._in_value is None
+            and self._out_value is None
+            and not self._key_values
+            and not self._bands
+        ):
             return
         option = QStyleOptionSlider()
         self.initStyleOption(option)
@@ -53,6 +93,10 @@ class MarkedSlider(QSlider):
             ratio = (value - self.minimum()) / (self.maximum() - self.minimum())
             return int(groove.x() + ratio * groove.width())
 
+        if self._bands:
+            bands = self._band_strip(groove.width(), groove.height())
+            painter.drawImage(groove.x(), groove.y(), bands)
+
         if self._in_value is not None and self._out_value is not None:
             left = value_to_x(min(self._in_value, self._out_value))
             right = value_to_x(max(self._in_value, self._out_value))
@@ -80,14 +124,83 @@ class MarkedSlider(QSlider):
             draw_marker(self._out_value, QColor(240, 98, 98))
 
         if self._key_values:
-            key_pen = QPen(QColor(255, 214, 102))
-            key_pen.setWidth(2)
-            painter.setPen(key_pen)
-            y1 = groove.y() + groove.height() + 2
-            y2 = y1 + 7
-            for value in self._key_values:
-                x = value_to_x(value)
-                painter.drawLine(x, y1, x, y2)
+            heat = self._heat_strip(groove.width())
+            painter.drawImage(groove.x(), groove.y() + groove.height() + 2, heat)
+
+    def _heat_strip(self, width: int) -> QImage:
+        key = (width, self.minimum(), self.maximum(), self._key_version)
+        if self._heat_cache is not None and self._heat_cache_key == key:
+            return self._heat_cache
+        width = max(width, 1)
+        image = QImage(
+            width, HEAT_STRIP_HEIGHT, QImage.Format.Format_ARGB32_Premultiplied
+        )
+        image.fill(Qt.GlobalColor.transparent)
+        counts = self._column_counts(width)
+        peak = max(counts, default=0)
+        if peak:
+            painter = QPainter(image)
+            scale = math.log1p(peak)
+            for column, count in enumerate(counts):
+                if count:
+                    ratio = math.log1p(count) / scale if peak > 1 else 1.0
+                    color = _blend(_HEAT_LOW, _HEAT_HIGH, ratio)
+                    painter.fillRect(column, 0, 1, HEAT_STRIP_HEIGHT, color)
+            painter.end()
+        self._heat_cache = image
+        self._heat_cache_key = key
+        return image
+
+    def _band_strip(self, width: int, height: int) -> QImage:
+        key = (width, height, self.minimum(), self.maximum(), self._band_version)
+        if self._band_cache is not None and self._band_cache_key == key:
+            return self._band_cache
+        width = max(width, 1)
+        height = max(height, 1)
+        image = QImage(width, height, QImage.Format.Format_ARGB32_Premultiplied)
+        image.fill(Qt.GlobalColor.transparent)
+        span = self.maximum() - self.minimum()
+        if span > 0:
+            painter = QPainter(image)
+            for start, end in self._bands:
+                left = int((start - self.minimum()) / span * width)
+                right = int((end - self.minimum()) / span * width)
+                if right < 0 or left >= width:
+                    continue
+                width_px = max(right - left, 1)
+                painter.fillRect(left, 0, width_px, height, _COVERAGE_COLOR)
+            painter.end()
+        self._band_cache = image
+        self._band_cache_key = key
+        return image
+
+    def _column_counts(self, width: int) -> list[int]:
+        minimum = self.minimum()
+        span = self.maximum() - minimum
+        values = self._key_values
+        if span <= 0:
+            return [len(values)] + [0] * (width - 1)
+        counts: list[int] = []
+        start = bisect_left(values, minimum)
+        for column in range(width):
+            if column == width - 1:
+                end = bisect_left(values, self.maximum() + 1)
+            else:
+                boundary = minimum + math.ceil((column + 1) * span / width)
+                end = bisect_left(values, boundary)
+            counts.append(end - start)
+            start = end
+        return counts
+
+
+def _blend(low: QColor, high: QColor, ratio: float) -> QColor:
+    ratio = min(max(ratio, 0.0), 1.0)
+    return QColor(
+        int(low.red() + (high.red() - low.red()) * ratio),
+        int(low.green() + (high.green() - low.green()) * ratio),
+        int(low.blue() + (high.blue() - low.blue()) * ratio),
+        int(low.alpha() + (high.alpha() - low.alpha()) * ratio),
+    )
 
 
 class TimelineWidget(QWidget):
@@ -99,7 +212,7 @@ class TimelineWidget(QWidget):
         self._total_frames = 0
         self._in_ms: int | None = None
         self._out_ms: int | None = None
-        self._keyframe_indices: set[int] = set()
+        self._coverage = IntervalIndex()
 
         self.slider = MarkedSlider(Qt.Orientation.Horizontal)
         self.slider.setObjectName("TimelineSlider")
@@ -110,10 +223,13 @@ class TimelineWidget(QWidget):
         self.label_in = QLabel("In: --")
         self.label_out = QLabel("Out: --")
         self.label_frame = QLabel("f0 / f0")
+        self.label_coverage = QLabel("")
 
         meta_layout = QHBoxLayout()
         meta_layout.addWidget(self.label_current)
         meta_layout.addStretch(1)
+        meta_layout.addWidget(self.label_coverage)
+        meta_layout.addSpacing(12)
         meta_layout.addWidget(self.label_in)
         meta_layout.addSpacing(12)
         meta_layout.addWidget(self.label_out)
@@ -129,6 +245,7 @@ class TimelineWidget(QWidget):
         self._fps = max(fps, 0.0)
         max_value = max(self._total_frames - 1, 0)
         self.slider.setRange(0, max_value)
+        self._refresh_coverage_bands()
         self._update_labels(self.slider.value())
 
     def set_position(self, frame_index: int) -> None:
@@ -146,26 +263,41 @@ class TimelineWidget(QWidget):
             None if out_ms is None else self._ms_to_frame(out_ms),
         )
         self.label_in.setText(
-            "In: --" if in_ms is None else f"In: {self._format_time(in_ms)}"
+            "In: --" if in_ms is None else f"In: {format_ms(in_ms)}"
         )
         self.label_out.setText(
-            "Out: --" if out_ms is None else f"Out: {self._format_time(out_ms)}"
+            "Out: --" if out_ms is None else f"Out: {format_ms(out_ms)}"
         )
 
     def add_keyframe_marker(self, frame_index: int) -> None:
-        if frame_index < 0:
-            return
-        self._keyframe_indices.add(frame_index)
-        self.slider.set_key_markers(sorted(self._keyframe_indices))
+        self.slider.add_key_marker(frame_index)
 
     def set_keyframe_markers(self, frame_indices: list[int]) -> None:
-        self._keyframe_indices = {idx for idx in frame_indices if idx >= 0}
-        self.slider.set_key_markers(sorted(self._keyframe_indices))
+        self.slider.set_key_markers(frame_indices)
 
     def clear_keyframe_markers(self) -> None:
-        self._keyframe_indices.clear()
         self.slider.set_key_markers([])
 
+    def set_coverage(self, coverage: IntervalIndex) -> None:
+        self._coverage = coverage
+        self._refresh_coverage_bands()
+        self._update_labels(self.slider.value())
+
+    @property
+    def coverage(self) -> IntervalIndex:
+        return self._coverage
+
+    def is_covered(self, frame_index: int) -> bool:
+        return self._coverage.covers(self._frame_to_ms(frame_index))
+
+    def _refresh_coverage_bands(self) -> None:
+        self.slider.set_coverage_bands(
+            [
+                (self._ms_to_frame(start_ms), self._ms_to_frame(end_ms))
+                for start_ms, end_ms in self._coverage
+            ]
+        )
+
     def _emit_position(self, frame_index: int) -> None:
         self._update_labels(frame_index)
         self.positionChanged.emit(frame_index)
@@ -184,13 +316,7 @@ class TimelineWidget(QWidget):
         current_ms = self._frame_to_ms(frame_index)
         total_ms = self._frame_to_ms(max(self._total_frames - 1, 0))
         self.label_current.setText(
-            f"{self._format_time(current_ms)} / {self._format_time(total_ms)}"
+            f"{format_ms(current_ms)} / {format_ms(total_ms)}"
         )
         self.label_frame.setText(f"f{frame_index} / f{max(self._total_frames - 1, 0)}")
-
-    @staticmethod
-    def _format_time(timestamp_ms: int) -> str:
-        total_seconds = max(timestamp_ms, 0) / 1000.0
-        minutes = int(total_seconds // 60)
-        seconds = total_seconds % 60
-        return f"{minutes:02d}:{seconds:06.3f}"
+        self.label_coverage.setText("已抽帧" if self.is_covered(frame_index) else "")
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Optional
+
+from PySide6.QtCore import Qt, Signal
+from PySide6.QtWidgets import QListWidget, QListWidgetItem, QVBoxLayout, QWidget
+
+from core.project.sources import read_sources, resolve_source_path
+
+
+class VideoBinPanel(QWidget):
+    videoActivated = Signal(str)
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.setObjectName("SidePanel")
+        self.video_list = QListWidget()
+        self.video_list.itemActivated.connect(self._on_item_activated)
+
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.video_list)
+
+    def load_project(self, project_dir: str | Path) -> None:
+        self.video_list.clear()
+        for row in read_sources(Path(project_dir) / "sources.csv"):
+            src = row.get("src_video_path") or ""
+            if not src:
+                continue
+            path = resolve_source_path(project_dir, src)
+            item = QListWidgetItem(path.name)
+            item.setToolTip(str(path))
+            item.setData(Qt.ItemDataRole.UserRole, str(path))
+            if not path.exists():
+                item.setForeground(Qt.GlobalColor.gray)
+            self.video_list.addItem(item)
+
+    def set_current(self, video_path: str | Path) -> None:
+        row = self._row_for(video_path)
+        if row >= 0:
+            self.video_list.setCurrentRow(row)
+
+    def contains(self, video_path: str | Path) -> bool:
+        return self._row_for(video_path) >= 0
+
+    def next_after(self, video_path: str | Path) -> Optional[Path]:
+        row = self._row_for(video_path)
+        count = self.video_list.count()
+        for offset in range(1, count):
+            item = self.video_list.item((row + offset) % count)
+            path = Path(item.data(Qt.ItemDataRole.UserRole))
+            if path.exists():
+                return path
+        return None
+
+    def _row_for(self, video_path: str | Path) -> int:
+        target = Path(video_path).resolve()
+        for row in range(self.video_list.count()):
+            item = self.video_list.item(row)
+            if Path(item.data(Qt.ItemDataRole.UserRole)).resolve() == target:
+                return row
+        return -1
+
+    def _on_item_activated(self, item: QListWidgetItem) -> None:
+        self.videoActivated.emit(item.data(Qt.ItemDataRole.UserRole))
@@ -8,6 +8,8 @@ from PySide6.QtCore import Qt, QSize
 from PySide6.QtGui import QImage, QPixmap
 from PySide6.QtWidgets import QLabel
 
+from utils.metrics import span, timed
+
 
 class VideoPlayerWidget(QLabel):
     def __init__(self) -> None:
@@ -51,31 +53,34 @@ class VideoPlayerWidget(QLabel):
         if self._last_frame is not None:
             self._render_frame()
 
+    @timed("player.render")
     def _render_frame(self) -> None:
         if self._last_frame is None:
             return
-        rgb_frame = cv2.cvtColor(self._last_frame, cv2.COLOR_BGR2RGB)
-        height, width, channels = rgb_frame.shape
-        bytes_per_line = channels * width
-        image = QImage(
-            rgb_frame.data,
-            width,
-            height,
-            bytes_per_line,
-            QImage.Format.Format_RGB888,
-        )
-        pixmap = QPixmap.fromImage(image)
+        with span("player.convert"):
+            rgb_frame = cv2.cvtColor(self._last_frame, cv2.COLOR_BGR2RGB)
+            height, width, channels = rgb_frame.shape
+            bytes_per_line = channels * width
+            image = QImage(
+                rgb_frame.data,
+                width,
+                height,
+                bytes_per_line,
+                QImage.Format.Format_RGB888,
+            )
+            pixmap = QPixmap.fromImage(image)
         target_size = self._compute_target_size(width, height)
         aspect_mode = (
             Qt.AspectRatioMode.KeepAspectRatio
             if self._keep_aspect
             else Qt.AspectRatioMode.IgnoreAspectRatio
         )
-        scaled = pixmap.scaled(
-            target_size,
-            aspect_mode,
-            Qt.TransformationMode.SmoothTransformation,
-        )
+        with span("player.scale"):
+            scaled = pixmap.scaled(
+                target_size,
+                aspect_mode,
+                Qt.TransformationMode.SmoothTransformation,
+            )
         self.setPixmap(scaled)
         self.setFixedSize(scaled.size())
 
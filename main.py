@@ -1,3 +1,4 @@
+import multiprocessing
 import sys
 
 from PySide6.QtWidgets import QApplication
@@ -13,4 +14,5 @@ def main() -> None:
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from core.video.batch import PlannedRange, split_range
+
+
+def test_split_range_keeps_chunks_on_frame_grid() -> None:
+    chunks = split_range(PlannedRange(500, 10_000, 3), 2500)
+
+    assert [(item.start_ms, item.end_ms) for item in chunks] == [
+        (500, 3500),
+        (3500, 6500),
+        (6500, 9500),
+        (9500, 10_000),
+    ]
+    assert all(item.fps == 3 for item in chunks)
+
+
+def test_split_range_leaves_short_range_whole() -> None:
+    item = PlannedRange(0, 4000, 5)
+
+    assert split_range(item, 0) == [item]
+    assert split_range(item, 4000) == [item]
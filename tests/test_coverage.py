@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from core.metadata.coverage import load_range_coverage
+from core.metadata.frames_csv import (
+    FrameRecord,
+    append_frame_records,
+    build_frame_filename,
+    build_image_relpath,
+)
+from core.project.manager import init_project
+
+VIDEO_ID = "clip__0000"
+
+
+def _write_range(project_dir, start_ms: int, end_ms: int, fps: float) -> None:
+    records = []
+    step_ms = 1000.0 / fps
+    idx = 0
+    while start_ms + idx * step_ms < end_ms - 1e-6:
+        timestamp_ms = int(round(start_ms + idx * step_ms))
+        idx += 1
+        frame_index = int(round(timestamp_ms / 1000.0 * 25))
+        filename = build_frame_filename(timestamp_ms, frame_index)
+        records.append(
+            FrameRecord.create(
+                video_id=VIDEO_ID,
+                src_video_path="clip.mp4",
+                timestamp_ms=timestamp_ms,
+                frame_index=frame_index,
+                kind="range",
+                image_relpath=build_image_relpath(VIDEO_ID, "ranges", filename),
+            )
+        )
+    append_frame_records(project_dir / "metadata" / "frames.csv", records)
+
+
+def test_reopened_coverage_matches_extracted_range(tmp_path) -> None:
+    init_project(tmp_path)
+    _write_range(tmp_path, 1000, 5000, fps=5)
+
+    coverage = load_range_coverage(tmp_path, VIDEO_ID)
+
+    assert list(coverage) == [(1000, 5000)]
+    assert coverage.is_fully_covered(1000, 5000)
+    assert not coverage.is_fully_covered(1000, 5200)
+
+
+def test_reopened_coverage_handles_fractional_fps(tmp_path) -> None:
+    init_project(tmp_path)
+    _write_range(tmp_path, 1000, 2000, fps=30)
+
+    assert load_range_coverage(tmp_path, VIDEO_ID).is_fully_covered(1000, 2000)
+
+
+def test_single_frame_range_is_reported_as_covered(tmp_path) -> None:
+    init_project(tmp_path)
+    _write_range(tmp_path, 3000, 3200, fps=5)
+
+    coverage = load_range_coverage(tmp_path, VIDEO_ID)
+
+    assert coverage.covered_length(3000, 3200) > 0
+    assert coverage.is_fully_covered(3000, 3200)
+
+
+def test_gaps_exclude_existing_coverage(tmp_path) -> None:
+    init_project(tmp_path)
+    _write_range(tmp_path, 1000, 2000, fps=5)
+    _write_range(tmp_path, 6000, 7000, fps=5)
+
+    coverage = load_range_coverage(tmp_path, VIDEO_ID)
+
+    assert coverage.gaps(0, 8000) == [(0, 1000), (2000, 6000), (7000, 8000)]
+    assert coverage.gaps(1200, 1800) == []
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import csv
+
+from core.metadata.frames_csv import FRAMES_CSV_HEADER, ensure_frames_csv
+from core.metadata.reader import read_frames_csv
+
+LEGACY_HEADER = [
+    "video_id",
+    "src_video_path",
+    "timestamp_ms",
+    "frame_index",
+    "kind",
+    "image_relpath",
+    "created_at",
+    "label",
+]
+
+
+def test_upgrade_keeps_every_row_and_extra_columns(tmp_path) -> None:
+    path = tmp_path / "frames.csv"
+    with path.open("w", newline="", encoding="utf-8") as handle:
+        writer = csv.writer(handle)
+        writer.writerow(LEGACY_HEADER)
+        writer.writerow(["clip", "a.mp4", "0", "0", "range", "frames/clip/ranges/a.jpg", "", "cat"])
+        writer.writerow(["clip", "a.mp4", "bad", "1", "range", "frames/clip/ranges/b.jpg", "", "dog"])
+    original = path.read_bytes()
+
+    ensure_frames_csv(path)
+
+    with path.open("r", newline="", encoding="utf-8") as handle:
+        rows = list(csv.DictReader(handle))
+    assert list(rows[0]) == FRAMES_CSV_HEADER + ["label"]
+    assert [row["label"] for row in rows] == ["cat", "dog"]
+    assert rows[1]["timestamp_ms"] == "bad"
+    assert (tmp_path / "frames.csv.bak").read_bytes() == original
+    assert [record.width for record in read_frames_csv(path)] == [0]
+
+    upgraded = path.read_bytes()
+    ensure_frames_csv(path)
+    assert path.read_bytes() == upgraded
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+from core.metadata.frames_csv import (
+    FrameRecord,
+    build_frame_filename,
+    build_image_relpath,
+)
+from core.metadata.journal import (
+    FrameJournal,
+    _encode,
+    _Txn,
+    journal_dir,
+    recover_journal,
+    staging_path_for,
+)
+from core.metadata.reader import read_frames_csv
+from core.project.manager import init_project
+from utils.file_lock import unlock
+
+VIDEO_ID = "clip__0000"
+
+
+def _record(timestamp_ms: int) -> FrameRecord:
+    filename = build_frame_filename(timestamp_ms, timestamp_ms // 40)
+    return FrameRecord.create(
+        video_id=VIDEO_ID,
+        src_video_path="clip.mp4",
+        timestamp_ms=timestamp_ms,
+        frame_index=timestamp_ms // 40,
+        kind="keyframe",
+        image_relpath=build_image_relpath(VIDEO_ID, "keyframes", filename),
+    )
+
+
+def _stage(project_dir, record: FrameRecord):
+    final_path = project_dir / record.image_relpath
+    final_path.parent.mkdir(parents=True, exist_ok=True)
+    staged_path = staging_path_for(final_path)
+    staged_path.write_bytes(b"jpeg")
+    return staged_path, final_path
+
+
+def _abandon(journal: FrameJournal) -> None:
+    unlock(journal._handle)
+    journal._handle.close()
+    journal._handle = None
+
+
+def _relpaths(project_dir) -> list[str]:
+    return [
+        row.image_relpath for row in read_frames_csv(project_dir / "metadata" / "frames.csv")
+    ]
+
+
+def test_recover_replays_committed_transaction(tmp_path) -> None:
+    paths = init_project(tmp_path)
+    record = _record(1000)
+    staged_path, final_path = _stage(tmp_path, record)
+    journal = FrameJournal(tmp_path)
+    txn = _Txn("t1", [record], [(journal._relpath(staged_path), journal._relpath(final_path))])
+    journal._append_lines([_encode("begin", txn), _encode("commit", txn)], sync=True)
+    _abandon(journal)
+
+    report = recover_journal(tmp_path)
+
+    assert report.replayed == 1
+    assert final_path.exists() and not staged_path.exists()
+    assert _relpaths(tmp_path) == [record.image_relpath]
+    assert not list(journal_dir(tmp_path).iterdir())
+    assert recover_journal(tmp_path).replayed == 0
+    assert _relpaths(paths.root) == [record.image_relpath]
+
+
+def test_recover_rolls_back_uncommitted_transaction(tmp_path) -> None:
+    init_project(tmp_path)
+    record = _record(2000)
+    staged_path, final_path = _stage(tmp_path, record)
+    journal = FrameJournal(tmp_path)
+    journal.begin([(staged_path, final_path)])
+    _abandon(journal)
+
+    report = recover_journal(tmp_path)
+
+    assert report.rolled_back == 1
+    assert not staged_path.exists() and not final_path.exists()
+    assert _relpaths(tmp_path) == []
+
+
+def test_recover_repairs_torn_csv_tail(tmp_path) -> None:
+    paths = init_project(tmp_path)
+    record = _record(3000)
+    staged_path, final_path = _stage(tmp_path, record)
+    with FrameJournal(tmp_path) as journal:
+        journal.submit([record], [(staged_path, final_path)])
+    with paths.frames_csv.open("a", encoding="utf-8", newline="") as handle:
+        handle.write(f"{VIDEO_ID},clip.mp4,40")
+
+    report = recover_journal(tmp_path)
+
+    assert report.repaired_csv_tail
+    assert _relpaths(tmp_path) == [record.image_relpath]
+    assert paths.frames_csv.read_text(encoding="utf-8").endswith("\n")
+
+
+def test_recover_leaves_live_journal_untouched(tmp_path) -> None:
+    init_project(tmp_path)
+    record = _record(4000)
+    staged_path, final_path = _stage(tmp_path, record)
+    journal = FrameJournal(tmp_path)
+    txn_id = journal.begin([(staged_path, final_path)])
+
+    report = recover_journal(tmp_path)
+
+    assert report.live_journals == 1
+    assert report.rolled_back == 0
+    assert staged_path.exists()
+    journal.submit([record], [(staged_path, final_path)], txn_id=txn_id)
+    journal.close()
+    assert _relpaths(tmp_path) == [record.image_relpath]
+    assert not list(journal_dir(tmp_path).iterdir())
+
+
+def test_commit_skips_records_without_image(tmp_path) -> None:
+    init_project(tmp_path)
+    kept, missing = _record(5000), _record(6000)
+    staged_path, final_path = _stage(tmp_path, kept)
+    with FrameJournal(tmp_path) as journal:
+        journal.submit([kept, missing], [(staged_path, final_path)])
+
+    assert _relpaths(tmp_path) == [kept.image_relpath]
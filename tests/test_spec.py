@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from core.video.spec import load_range_specs
+
+
+def _write_json(tmp_path, payload) -> object:
+    path = tmp_path / "jobs.json"
+    path.write_text(json.dumps(payload), encoding="utf-8")
+    return path
+
+
+@pytest.mark.parametrize(
+    "payload",
+    [
+        {"videos": ["a.mp4"]},
+        {"fps": 0, "videos": [{"path": "a.mp4"}]},
+        {"videos": [{"path": "a.mp4", "fps": -1, "ranges": [[0, 1000]]}]},
+        {"videos": [{"path": "a.mp4", "ranges": [{"start_ms": 0, "end_ms": 10, "fps": 0}]}]},
+        {"videos": [{"path": "a.mp4", "uniform": {"interval_ms": 0}}]},
+        {"videos": [{"path": "a.mp4", "uniform": {"count": -5}}]},
+    ],
+)
+def test_invalid_json_specs_raise_value_error(tmp_path, payload) -> None:
+    with pytest.raises(ValueError):
+        load_range_specs(_write_json(tmp_path, payload))
+
+
+def test_csv_rejects_non_positive_fps(tmp_path) -> None:
+    path = tmp_path / "jobs.csv"
+    path.write_text("video,start_ms,end_ms,fps\na.mp4,0,1000,0\n", encoding="utf-8")
+
+    with pytest.raises(ValueError, match="第 2 行"):
+        load_range_specs(path)
+
+
+def test_uniform_interval_sets_fps(tmp_path) -> None:
+    specs = load_range_specs(
+        _write_json(tmp_path, {"videos": [{"path": "a.mp4", "uniform": {"interval_ms": 250}}]})
+    )
+
+    assert [(spec.fps, spec.count) for spec in specs] == [(4.0, 0)]
@@ -1,15 +1,65 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
+import json
+import os
 from pathlib import Path
+import re
 import shutil
+import subprocess
+import sys
+import threading
 from typing import Optional, Tuple
 
+TOOLCHAIN_CACHE_VERSION = 1
+_EXE_SUFFIX = ".exe" if sys.platform.startswith("win") else ""
+_CAPABILITY_FLAGS = re.compile(r"^[A-Z.|]{3,6}$")
+_VERSION_PATTERN = re.compile(r"version\s+(\S+)")
+
+_resolved: dict[Optional[str], Tuple[Optional[str], Optional[str]]] = {}
+_toolchains: dict[Optional[str], "FFmpegToolchain"] = {}
+_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class FFmpegToolchain:
+    ffmpeg: str
+    ffprobe: str
+    version: str
+    filters: frozenset[str]
+    encoders: frozenset[str]
+    hwaccels: frozenset[str]
+
+    def has_filter(self, name: str) -> bool:
+        return name in self.filters
+
+    def has_encoder(self, name: str) -> bool:
+        return name in self.encoders
+
+    def has_hwaccel(self, name: str) -> bool:
+        return name in self.hwaccels
+
 
 def find_ffmpeg(
     custom_dir: Optional[Path] = None,
 ) -> Tuple[Optional[str], Optional[str]]:
-    ffmpeg_name = "ffmpeg.exe"
-    ffprobe_name = "ffprobe.exe"
+    key = None if custom_dir is None else str(custom_dir)
+    with _lock:
+        cached = _resolved.get(key)
+    if cached is not None and cached[0] and cached[1]:
+        return cached
+
+    resolved = _find_ffmpeg_uncached(custom_dir)
+    with _lock:
+        _resolved[key] = resolved
+    return resolved
+
+
+def _find_ffmpeg_uncached(
+    custom_dir: Optional[Path],
+) -> Tuple[Optional[str], Optional[str]]:
+    ffmpeg_name = f"ffmpeg{_EXE_SUFFIX}"
+    ffprobe_name = f"ffprobe{_EXE_SUFFIX}"
 
     if custom_dir:
         ffmpeg_path = custom_dir / ffmpeg_name
@@ -27,3 +77,138 @@ def ensure_ffmpeg(custom_dir: Optional[Path] = None) -> Tuple[str, str]:
     if not ffmpeg_path or not ffprobe_path:
         raise FileNotFoundError("未找到 ffmpeg/ffprobe，可在设置中配置路径")
     return ffmpeg_path, ffprobe_path
+
+
+def get_toolchain(custom_dir: Optional[Path] = None) -> FFmpegToolchain:
+    key = None if custom_dir is None else str(custom_dir)
+    with _lock:
+        cached = _toolchains.get(key)
+    if cached is not None:
+        return cached
+
+    ffmpeg_path, ffprobe_path = ensure_ffmpeg(custom_dir)
+    toolchain = _load_cached_toolchain(ffmpeg_path, ffprobe_path)
+    if toolchain is None:
+        toolchain, complete = _detect_toolchain(ffmpeg_path, ffprobe_path)
+        if complete:
+            _store_cached_toolchain(toolchain)
+    with _lock:
+        _toolchains[key] = toolchain
+    return toolchain
+
+
+def toolchain_cache_path() -> Path:
+    override = os.environ.get("BUBFORGE_CACHE_DIR")
+    if override:
+        base = Path(override)
+    elif sys.platform.startswith("win"):
+        base = Path(os.environ.get("LOCALAPPDATA") or Path.home()) / "BubForge"
+    else:
+        base = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache")
+        base = base / "bubforge"
+    return base / "ffmpeg_toolchain.json"
+
+
+def _binary_signature(ffmpeg_path: str) -> str:
+    stat = Path(ffmpeg_path).stat()
+    return f"{stat.st_mtime_ns}|{stat.st_size}"
+
+
+def _load_cached_toolchain(
+    ffmpeg_path: str, ffprobe_path: str
+) -> Optional[FFmpegToolchain]:
+    try:
+        payload = json.loads(toolchain_cache_path().read_text(encoding="utf-8"))
+        entry = payload["toolchains"][ffmpeg_path]
+        if payload.get("version") != TOOLCHAIN_CACHE_VERSION:
+            return None
+        if entry.get("signature") != _binary_signature(ffmpeg_path):
+            return None
+        return FFmpegToolchain(
+            ffmpeg=ffmpeg_path,
+            ffprobe=ffprobe_path,
+            version=str(entry.get("ffmpeg_version", "")),
+            filters=frozenset(entry.get("filters", [])),
+            encoders=frozenset(entry.get("encoders", [])),
+            hwaccels=frozenset(entry.get("hwaccels", [])),
+        )
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def _store_cached_toolchain(toolchain: FFmpegToolchain) -> None:
+    cache_path = toolchain_cache_path()
+    try:
+        payload = json.loads(cache_path.read_text(encoding="utf-8"))
+        if payload.get("version") != TOOLCHAIN_CACHE_VERSION:
+            raise ValueError
+    except (OSError, ValueError, AttributeError):
+        payload = {"version": TOOLCHAIN_CACHE_VERSION, "toolchains": {}}
+    try:
+        payload.setdefault("toolchains", {})[toolchain.ffmpeg] = {
+            "signature": _binary_signature(toolchain.ffmpeg),
+            "ffmpeg_version": toolchain.version,
+            "filters": sorted(toolchain.filters),
+            "encoders": sorted(toolchain.encoders),
+            "hwaccels": sorted(toolchain.hwaccels),
+        }
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = cache_path.with_name(cache_path.name + f".{os.getpid()}.tmp")
+        temp_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+        os.replace(temp_path, cache_path)
+    except OSError:
+        return
+
+
+def _detect_toolchain(
+    ffmpeg_path: str, ffprobe_path: str
+) -> tuple[FFmpegToolchain, bool]:
+    outputs = {
+        flag: _run_ffmpeg_query(ffmpeg_path, flag)
+        for flag in ("-version", "-hwaccels", "-filters", "-encoders")
+    }
+    complete = all(output is not None for output in outputs.values())
+    version_output = outputs["-version"] or ""
+    first_line = version_output.splitlines()[0] if version_output else ""
+    match = _VERSION_PATTERN.search(first_line)
+    hwaccels = {
+        line.strip()
+        for line in (outputs["-hwaccels"] or "").splitlines()[1:]
+        if line.strip()
+    }
+    toolchain = FFmpegToolchain(
+        ffmpeg=ffmpeg_path,
+        ffprobe=ffprobe_path,
+        version=match.group(1) if match else "",
+        filters=frozenset(_parse_capability_list(outputs["-filters"] or "")),
+        encoders=frozenset(_parse_capability_list(outputs["-encoders"] or "")),
+        hwaccels=frozenset(hwaccels),
+    )
+    return toolchain, complete
+
+
+def _run_ffmpeg_query(ffmpeg_path: str, flag: str) -> Optional[str]:
+    try:
+        result = subprocess.run(
+            [ffmpeg_path, "-hide_banner", flag],
+            capture_output=True,
+            text=True,
+            check=False,
+            timeout=30,
+        )
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    if result.returncode != 0:
+        return None
+    return result.stdout
+
+
+def _parse_capability_list(output: str) -> set[str]:
+    names: set[str] = set()
+    for line in output.splitlines():
+        parts = line.split()
+        if len(parts) < 2 or parts[1] == "=":
+            continue
+        if _CAPABILITY_FLAGS.match(parts[0]):
+            names.add(parts[1])
+    return names
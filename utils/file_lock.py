@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator
+
+if sys.platform.startswith("win"):
+    import msvcrt
+
+    def _lock(handle: IO[bytes], blocking: bool) -> bool:
+        mode = msvcrt.LK_LOCK if blocking else msvcrt.LK_NBLCK
+        handle.seek(0)
+        while True:
+            try:
+                msvcrt.locking(handle.fileno(), mode, 1)
+                return True
+            except OSError:
+                if not blocking:
+                    return False
+                time.sleep(0.05)
+
+    def _unlock(handle: IO[bytes]) -> None:
+        handle.seek(0)
+        try:
+            msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+        except OSError:
+            return
+
+else:
+    import fcntl
+
+    def _lock(handle: IO[bytes], blocking: bool) -> bool:
+        flags = fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB
+        try:
+            fcntl.flock(handle.fileno(), flags)
+        except BlockingIOError:
+            return False
+        return True
+
+    def _unlock(handle: IO[bytes]) -> None:
+        fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
+def try_lock(handle: IO[bytes]) -> bool:
+    return _lock(handle, blocking=False)
+
+
+def lock(handle: IO[bytes]) -> None:
+    _lock(handle, blocking=True)
+
+
+def unlock(handle: IO[bytes]) -> None:
+    _unlock(handle)
+
+
+def same_file(handle: IO[bytes], path: Path) -> bool:
+    try:
+        current = os.stat(path)
+    except OSError:
+        return False
+    opened = os.fstat(handle.fileno())
+    return (current.st_dev, current.st_ino) == (opened.st_dev, opened.st_ino)
+
+
+@contextmanager
+def locked_file(path: str | Path) -> Iterator[None]:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("a+b") as handle:
+        lock(handle)
+        try:
+            yield
+        finally:
+            unlock(handle)
@@ -1,8 +1,15 @@
 from __future__ import annotations
 
 import hashlib
+import threading
 from pathlib import Path
 
+FINGERPRINT_CHUNK_SIZE = 64 * 1024
+FINGERPRINT_SAMPLES = 8
+
+_fingerprint_cache: dict[tuple[int, int, int, int], str] = {}
+_fingerprint_lock = threading.Lock()
+
 
 def short_hash_for_path(path: str | Path, length: int = 8) -> str:
     resolved = Path(path).expanduser().resolve()
@@ -10,3 +17,42 @@ def short_hash_for_path(path: str | Path, length: int = 8) -> str:
     payload = f"{resolved}|{stat.st_size}|{stat.st_mtime_ns}"
     digest = hashlib.sha1(payload.encode("utf-8")).hexdigest()
     return digest[:length]
+
+
+def content_fingerprint(
+    path: str | Path,
+    chunk_size: int = FINGERPRINT_CHUNK_SIZE,
+    samples: int = FINGERPRINT_SAMPLES,
+) -> str:
+    resolved = Path(path).expanduser().resolve()
+    stat = resolved.stat()
+    key = (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+    with _fingerprint_lock:
+        cached = _fingerprint_cache.get(key)
+    if cached is not None:
+        return cached
+
+    size = stat.st_size
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{size}|".encode("ascii"))
+    with resolved.open("rb") as handle:
+        if size <= chunk_size * (samples + 2):
+            digest.update(handle.read())
+        else:
+            for offset in _sample_offsets(size, chunk_size, samples):
+                handle.seek(offset)
+                digest.update(handle.read(chunk_size))
+    fingerprint = digest.hexdigest()
+
+    with _fingerprint_lock:
+        _fingerprint_cache[key] = fingerprint
+    return fingerprint
+
+
+def _sample_offsets(size: int, chunk_size: int, samples: int) -> list[int]:
+    last = size - chunk_size
+    offsets = [0]
+    step = last / (samples + 1)
+    offsets.extend(int(step * (idx + 1)) for idx in range(samples))
+    offsets.append(last)
+    return offsets
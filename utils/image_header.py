@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import struct
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+_PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+_JPEG_SOF_MARKERS = frozenset(
+    {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+)
+_JPEG_STANDALONE_MARKERS = frozenset({0x01, 0xD8, *range(0xD0, 0xD8)})
+
+
+def read_image_size(image_path: str | Path) -> Optional[tuple[int, int]]:
+    try:
+        with Path(image_path).open("rb") as handle:
+            head = handle.read(len(_PNG_SIGNATURE))
+            if head == _PNG_SIGNATURE:
+                return _read_png_size(handle)
+            if head[:2] == b"\xff\xd8":
+                handle.seek(2)
+                return _read_jpeg_size(handle)
+    except (OSError, struct.error):
+        return None
+    return None
+
+
+def _read_png_size(handle: BinaryIO) -> Optional[tuple[int, int]]:
+    chunk = handle.read(16)
+    if len(chunk) < 16 or chunk[4:8] != b"IHDR":
+        return None
+    width, height = struct.unpack(">II", chunk[8:16])
+    return width, height
+
+
+def _read_jpeg_size(handle: BinaryIO) -> Optional[tuple[int, int]]:
+    while True:
+        byte = handle.read(1)
+        if not byte:
+            return None
+        if byte != b"\xff":
+            continue
+        marker = handle.read(1)
+        while marker == b"\xff":
+            marker = handle.read(1)
+        if not marker:
+            return None
+        code = marker[0]
+        if code == 0xD9 or code == 0xDA:
+            return None
+        if code in _JPEG_STANDALONE_MARKERS or code == 0x00:
+            continue
+        length_bytes = handle.read(2)
+        if len(length_bytes) < 2:
+            return None
+        (length,) = struct.unpack(">H", length_bytes)
+        if code in _JPEG_SOF_MARKERS:
+            payload = handle.read(5)
+            if len(payload) < 5:
+                return None
+            height, width = struct.unpack(">HH", payload[1:5])
+            return width, height
+        handle.seek(length - 2, 1)
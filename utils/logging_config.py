@@ -1,6 +1,9 @@
 from __future__ import annotations
 
+import atexit
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from pathlib import Path
 
 
@@ -17,6 +20,10 @@ def configure_logging(log_dir: str | Path, level: int = logging.INFO) -> logging
         )
         handler = logging.FileHandler(log_path, encoding="utf-8")
         handler.setFormatter(formatter)
-        logger.addHandler(handler)
+        log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+        listener = QueueListener(log_queue, handler, respect_handler_level=True)
+        listener.start()
+        atexit.register(listener.stop)
+        logger.addHandler(QueueHandler(log_queue))
 
     return logger
@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import atexit
+import functools
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, Optional, TypeVar
+
+METRICS_VERSION = 1
+DEFAULT_DUMP_INTERVAL_S = 10.0
+PROMETHEUS_PREFIX = "bubforge"
+QUANTILES = (0.5, 0.95, 0.99)
+
+_BUCKETS_PER_OCTAVE = 8
+_MIN_MS = 0.001
+_BUCKET_COUNT = 28 * _BUCKETS_PER_OCTAVE
+
+F = TypeVar("F", bound=Callable[..., object])
+
+
+class Histogram:
+    __slots__ = ("_buckets", "count", "total_ms", "max_ms")
+
+    def __init__(self) -> None:
+        self._buckets = [0] * (_BUCKET_COUNT + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, value_ms: float) -> None:
+        value_ms = max(value_ms, 0.0)
+        self._buckets[_bucket_index(value_ms)] += 1
+        self.count += 1
+        self.total_ms += value_ms
+        if value_ms > self.max_ms:
+            self.max_ms = value_ms
+
+    def quantile(self, fraction: float) -> float:
+        if self.count == 0:
+            return 0.0
+        rank = fraction * self.count
+        seen = 0
+        for idx, bucket in enumerate(self._buckets):
+            seen += bucket
+            if bucket and seen >= rank:
+                return min(_bucket_value(idx), self.max_ms)
+        return self.max_ms
+
+    def summary(self) -> dict[str, float]:
+        mean = self.total_ms / self.count if self.count else 0.0
+        data = {
+            "count": self.count,
+            "sum_ms": round(self.total_ms, 3),
+            "mean_ms": round(mean, 4),
+            "max_ms": round(self.max_ms, 4),
+        }
+        for fraction in QUANTILES:
+            data[f"p{int(fraction * 100)}_ms"] = round(self.quantile(fraction), 4)
+        return data
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._histograms: dict[str, Histogram] = {}
+        self._counters: dict[str, int] = {}
+        self._started_at = time.time()
+
+    def observe(self, name: str, value_ms: float) -> None:
+        with self._lock:
+            histogram = self._histograms.get(name)
+            if histogram is None:
+                histogram = self._histograms[name] = Histogram()
+            histogram.observe(value_ms)
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, (time.perf_counter() - started) * 1000)
+
+    def timed(self, name: str) -> Callable[[F], F]:
+        def decorate(func: F) -> F:
+            @functools.wraps(func)
+            def wrapper(*args: object, **kwargs: object) -> object:
+                started = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.observe(name, (time.perf_counter() - started) * 1000)
+
+            return wrapper  # type: ignore[return-value]
+
+        return decorate
+
+    def histogram(self, name: str) -> Optional[dict[str, float]]:
+        with self._lock:
+            histogram = self._histograms.get(name)
+            return histogram.summary() if histogram is not None else None
+
+    def counter(self, name: str) -> int:
+        with self._lock:
+            return self._counters.get(name, 0)
+
+    def snapshot(self) -> dict[str, object]:
+        with self._lock:
+            return {
+                "version": METRICS_VERSION,
+                "pid": os.getpid(),
+                "started_at": self._started_at,
+                "updated_at": time.time(),
+                "timers": {
+                    name: histogram.summary()
+                    for name, histogram in sorted(self._histograms.items())
+                },
+                "counters": dict(sorted(self._counters.items())),
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+            self._started_at = time.time()
+
+
+REGISTRY = MetricsRegistry()
+
+
+def span(name: str):
+    return REGISTRY.span(name)
+
+
+def timed(name: str) -> Callable[[F], F]:
+    return REGISTRY.timed(name)
+
+
+def observe(name: str, value_ms: float) -> None:
+    REGISTRY.observe(name, value_ms)
+
+
+def increment(name: str, amount: int = 1) -> None:
+    REGISTRY.increment(name, amount)
+
+
+def render_prometheus(snapshot: dict[str, object]) -> str:
+    lines: list[str] = []
+    for name, summary in snapshot.get("timers", {}).items():
+        metric = _prometheus_name(name) + "_ms"
+        lines.append(f"# TYPE {metric} summary")
+        for fraction in QUANTILES:
+            value = summary[f"p{int(fraction * 100)}_ms"]
+            lines.append(f'{metric}{{quantile="{fraction}"}} {value}')
+        lines.append(f"{metric}_sum {summary['sum_ms']}")
+        lines.append(f"{metric}_count {summary['count']}")
+    for name, value in snapshot.get("counters", {}).items():
+        metric = _prometheus_name(name) + "_total"
+        lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric} {value}")
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics(path: str | Path, registry: MetricsRegistry = REGISTRY) -> Path:
+    path = Path(path)
+    snapshot = registry.snapshot()
+    if path.suffix.lower() == ".prom":
+        text = render_prometheus(snapshot)
+    else:
+        text = json.dumps(snapshot, ensure_ascii=False, indent=2)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(path.name + f".{os.getpid()}.tmp")
+    temp_path.write_text(text, encoding="utf-8")
+    os.replace(temp_path, path)
+    return path
+
+
+class MetricsDumper:
+    def __init__(
+        self,
+        path: str | Path,
+        interval_s: float = DEFAULT_DUMP_INTERVAL_S,
+        registry: MetricsRegistry = REGISTRY,
+    ) -> None:
+        self.path = Path(path)
+        self.interval_s = max(interval_s, 0.5)
+        self._registry = registry
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="metrics-dump", daemon=True
+        )
+
+    def start(self) -> "MetricsDumper":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=self.interval_s)
+        self._dump()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            self._dump()
+
+    def _dump(self) -> None:
+        try:
+            write_metrics(self.path, self._registry)
+        except OSError:
+            return
+
+
+_dumper: Optional[MetricsDumper] = None
+_dumper_lock = threading.Lock()
+
+
+def start_metrics_dump(
+    path: str | Path, interval_s: float = DEFAULT_DUMP_INTERVAL_S
+) -> MetricsDumper:
+    global _dumper
+    with _dumper_lock:
+        if _dumper is not None:
+            if _dumper.path == Path(path):
+                return _dumper
+            _dumper.stop()
+        else:
+            atexit.register(stop_metrics_dump)
+        _dumper = MetricsDumper(path, interval_s).start()
+        return _dumper
+
+
+def stop_metrics_dump() -> None:
+    global _dumper
+    with _dumper_lock:
+        if _dumper is not None:
+            _dumper.stop()
+            _dumper = None
+
+
+def _bucket_index(value_ms: float) -> int:
+    if value_ms <= _MIN_MS:
+        return 0
+    idx = int(math.log2(value_ms / _MIN_MS) * _BUCKETS_PER_OCTAVE) + 1
+    return min(idx, _BUCKET_COUNT)
+
+
+def _bucket_value(idx: int) -> float:
+    if idx == 0:
+        return _MIN_MS
+    return _MIN_MS * 2 ** (idx / _BUCKETS_PER_OCTAVE)
+
+
+def _prometheus_name(name: str) -> str:
+    cleaned = "".join(ch if ch.isalnum() else "_" for ch in name.lower())
+    return f"{PROMETHEUS_PREFIX}_{cleaned.strip('_')}"